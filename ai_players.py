@@ -6,56 +6,109 @@ import json
 import os
 import random
 import re
-import sys
 
-import anthropic
-import openai
+from board import is_valid_location, get_valid_moves
+from config import DEFAULT_CONFIG
+from metrics import metrics
+from prompts import PromptBuilder
 
-from board import board_to_string, is_valid_location, get_valid_moves, ROW_COUNT, COLUMN_COUNT, ROTATION_INTERVAL
-
-# Set up OpenAI API key
-try:
-    # First try to read from environment variable
-    api_key = os.getenv("OPENAI_API_KEY")
-    
-    # If not found in environment, try to read from .env file
-    if api_key is None:
+def read_api_key(name):
+    """
+    Read an API key from the environment, falling back to an
+    `export NAME='...'` line in the .env file next to this module.
+    Returns None if the key cannot be found.
+    """
+    api_key = os.getenv(name)
+    if not api_key:
         env_path = os.path.join(os.path.dirname(__file__), '.env')
         if os.path.exists(env_path):
             with open(env_path, 'r') as f:
                 for line in f:
-                    if line.startswith('export OPENAI_API_KEY='):
+                    if line.startswith(f'export {name}='):
                         api_key = line.split('=')[1].strip().strip("'")
                         break
-    
-    if api_key is None:
-        raise Exception("Could not find OpenAI API key")
+    return api_key or None
+
+# Provider clients are created on first use, so importing this module (and
+# the rules engine through it) does not pay for the SDK imports or need keys
+_openai = None
+_anthropic_client = None
+
+def get_openai():
+    """Import and configure the OpenAI SDK on first use."""
+    global _openai
+    if _openai is None:
+        api_key = read_api_key("OPENAI_API_KEY")
+        if api_key is None:
+            raise RuntimeError("Error setting up OpenAI API key: Could not find OpenAI API key")
         
-    openai.api_key = api_key
-except Exception as e:
-    sys.exit(f"Error setting up OpenAI API key: {str(e)}")
-
-# Set up Claude API
-try:
-    anthropic_api_key = os.getenv("ANTHROPIC_API_KEY")
-    if not anthropic_api_key:
-        env_path = os.path.join(os.path.dirname(__file__), '.env')
-        if os.path.exists(env_path):
-            with open(env_path, 'r') as f:
-                for line in f:
-                    if line.startswith('export ANTHROPIC_API_KEY='):
-                        anthropic_api_key = line.split('=')[1].strip().strip("'")
-                        break
-    
-    if not anthropic_api_key:
-        raise Exception("Could not find Anthropic API key")
+        import openai
+        openai.api_key = api_key
+        _openai = openai
+    return _openai
+
+def get_anthropic_client():
+    """Import the Anthropic SDK and create the client on first use."""
+    global _anthropic_client
+    if _anthropic_client is None:
+        anthropic_api_key = read_api_key("ANTHROPIC_API_KEY")
+        if not anthropic_api_key:
+            raise RuntimeError("Error setting up Anthropic API key: Could not find Anthropic API key")
         
-    anthropic_client = anthropic.Anthropic(api_key=anthropic_api_key)
-except Exception as e:
-    sys.exit(f"Error setting up Anthropic API key: {str(e)}")
+        import anthropic
+        _anthropic_client = anthropic.Anthropic(api_key=anthropic_api_key)
+    return _anthropic_client
+
+class LiveTransport:
+    """
+    Sends player requests to the provider APIs. A request is the keyword
+    arguments of the SDK call; the response is the text the model returned.
+    """
 
-# Game history to track moves
-game_history = []
+    def setup(self, provider):
+        """Create the provider client, raising RuntimeError if its key is missing."""
+        if provider == 'gpt':
+            get_openai()
+        else:
+            get_anthropic_client()
+
+    def send(self, provider, request):
+        """Send one request and return the response text."""
+        if provider == 'gpt':
+            response = get_openai().ChatCompletion.create(**request)
+            return response.choices[0].message['content']
+        message = get_anthropic_client().messages.create(**request)
+        return message.content[0].text
+
+# Transport used by get_move_from_gpt and get_move_from_claude; replaced by
+# the recorder and replayer in llm_record
+_transport = LiveTransport()
+
+def get_transport():
+    """Get the transport the players send their requests through."""
+    return _transport
+
+def set_transport(transport):
+    """Replace the transport the players send their requests through; returns the previous one."""
+    global _transport
+    previous, _transport = _transport, transport
+    return previous
+
+class ReplayMiss(LookupError):
+    """
+    Raised by a replaying transport for a request it holds no response for.
+    The players let it through instead of falling back, since a random move
+    would make the replay silently diverge from the recorded run.
+    """
+
+# Models and sampling settings used by the players
+GPT_MODEL = "gpt-4o"
+CLAUDE_MODEL = "claude-3-7-sonnet-latest"
+TEMPERATURE = 0.5
+CLAUDE_MAX_TOKENS = 150
+
+# Bump when the prompt text changes, so cached or recorded moves are not reused
+PROMPT_VERSION = 1
 
 def get_random_valid_move(board, rotation_state):
     """Get a random valid move."""
@@ -64,185 +117,195 @@ def get_random_valid_move(board, rotation_state):
         return random.choice(valid_moves)
     return None
 
-def get_move_from_gpt(board, player, turn_number, rotation_state=0):
-    """
-    Get a move from GPT (OpenAI) with improved context and game history.
-    """
-    board_str = board_to_string(board, rotation_state)
-    
+def format_history(history):
+    """Format the move history block shared by both prompts."""
+    history_str = ""
+    if history:
+        history_str = "Move history (format: turn_number-player-column):\n"
+        history_str += "\n".join([f"{i+1}-{move['player']}-{move['column']}" for i, move in enumerate(history)])
+        history_str += "\n\n"
+    return history_str
+
+def get_valid_columns(board, rotation_state=0):
+    """Get the valid moves as 1-indexed column numbers, as shown to the models."""
     # Get current dimensions
     ROWS, COLS = board.shape
     
     # Get valid moves (always columns with gravity pulling down)
-    valid_columns = [col + 1 for col in range(COLS) if is_valid_location(board, col, rotation_state)]
-    
-    # Core rules explanation with rotation
-    rules_summary = (
-        "Rules: This is Connect 5 with rotation. Players take turns dropping pieces. "
-        "A piece always falls downward (gravity pulls down). "
-        "Every 6 moves (3 turns each player), the board rotates 90 degrees clockwise, and pieces fall to realign with gravity. "
-        "The goal is to connect five of your pieces in a row horizontally, vertically, or diagonally."
-    )
+    return [col + 1 for col in range(COLS) if is_valid_location(board, col, rotation_state)]
+
+def build_gpt_messages(board, player, turn_number, rotation_state=0, history=None, config=DEFAULT_CONFIG):
+    """
+    Build the chat messages sent to GPT for one move, in the full encoding.
+    `history` is the game's list of move dicts (none if omitted).
+    """
+    builder = PromptBuilder.from_history(history or [], config=config)
+    return builder.gpt_messages(board, player, turn_number, rotation_state)
+
+def build_claude_prompt(board, player, turn_number, rotation_state=0, history=None, config=DEFAULT_CONFIG):
+    """
+    Build the (system, user) prompts sent to Claude for one move, in the full encoding.
+    `history` is the game's list of move dicts (none if omitted).
+    """
+    builder = PromptBuilder.from_history(history or [], config=config)
+    return builder.claude_prompt(board, player, turn_number, rotation_state)
+
+def parse_gpt_move(response_content):
+    """
+    Parse GPT's JSON response into a 0-indexed column.
+    Raises an exception if the response is not valid JSON with a 'move' field.
+    """
+    response_json = json.loads(response_content)
+    return int(response_json['move']) - 1  # Convert to 0-indexed
+
+def parse_claude_move(response_content):
+    """
+    Parse Claude's response into a 0-indexed column.
+    Looks for a JSON object first and falls back to a bare "move": N.
+    Returns None if no move can be found.
+    """
+    # Use regex to find the JSON object
+    json_match = re.search(r'({[\s\S]*?})', response_content)
+    if not json_match:
+        print(f"❌ Could not parse JSON from Claude's response: {response_content}")
+        # Fallback to just finding the move number
+        move_match = re.search(r'"move":\s*(\d+)', response_content)
+        if not move_match:
+            print("❌ Could not parse move number either.")
+            return None
+        return int(move_match.group(1)) - 1  # Convert to 0-indexed
     
-    # Provide the full game history as context
-    history_str = ""
-    if game_history:
-        history_str = "Move history (format: turn_number-player-column):\n"
-        history_str += "\n".join([f"{i+1}-{move['player']}-{move['column']}" for i, move in enumerate(game_history)])
-        history_str += "\n\n"
+    try:
+        response_json = json.loads(json_match.group(1))
+        return int(response_json['move']) - 1  # Convert to 0-indexed
+    except json.JSONDecodeError:
+        print(f"❌ Invalid JSON from Claude: {json_match.group(1)}")
+        # Fallback to just finding the move number
+        move_match = re.search(r'"move":\s*(\d+)', response_content)
+        if not move_match:
+            print("❌ Could not parse move number either.")
+            return None
+        return int(move_match.group(1)) - 1  # Convert to 0-indexed
+
+def check_move(board, move, rotation_state, ai_name, fallback=get_random_valid_move, model=None):
+    """
+    Return the move if it is valid, otherwise report it and return the
+    fallback move (a random valid move by default). Invalid moves are
+    counted in the metrics under `model` (ai_name if not given).
+    """
+    # Get current dimensions
+    ROWS, COLS = board.shape
     
-    # Information about gravity
-    current_gravity = "down"  # Gravity always pulls down
-    next_rotation = (turn_number) % ROTATION_INTERVAL == 0
+    # Check if move is valid (column must be in valid range and have space)
+    if move not in range(COLS) or not is_valid_location(board, move, rotation_state):
+        print(f"❌ {ai_name} suggested an invalid move: {move+1}. Valid moves are: {get_valid_columns(board, rotation_state)}")
+        print("Making a random valid move instead.")
+        metrics.count('invalid_moves', model=model or ai_name)
+        metrics.count('fallbacks', model=model or ai_name, reason='invalid_move')
+        return fallback(board, rotation_state)
     
-    prompt = (
-        f"{rules_summary}\n\n"
-        f"Current board state (Turn {turn_number}, Rotation: {rotation_state % 4}):\n{board_str}\n\n"
-        f"{'Board will rotate after this move!' if next_rotation else ''}\n\n"
-        f"{history_str}"
-        f"Valid moves: {valid_columns}\n\n"
-        f"You are playing as {'Player 1 (X)' if player == 1 else 'Player 2 (O)'}. "
-        "Analyze the board and choose the best valid column to drop your piece. "
-        "Respond with a JSON object containing a 'move' field with an integer value representing your chosen column number."
-    )
+    return move
+
+def build_request(provider, board, player, turn_number, rotation_state=0, history=None, prompt=None,
+                  config=DEFAULT_CONFIG):
+    """
+    Build the API request ('gpt' or 'claude') for one move: the keyword
+    arguments of the SDK call, as sent through the transport. Without a
+    `prompt` builder the prompt describes the rules of `config`.
+    """
+    if provider == 'gpt':
+        if prompt is None:
+            messages = build_gpt_messages(board, player, turn_number, rotation_state, history, config)
+        else:
+            messages = prompt.gpt_messages(board, player, turn_number, rotation_state)
+        return {
+            "model": GPT_MODEL,
+            "messages": messages,
+            "response_format": {"type": "json_object"},
+            "temperature": TEMPERATURE
+        }
     
-    messages = [
-        {
-            "role": "system",
-            "content": (
-                "You are an expert Connect 5 AI. Analyze the current board state and choose the best move. "
-                "Respond with a JSON object containing a 'move' field with an integer value from the valid moves provided."
-            )
-        },
-        {"role": "user", "content": prompt}
-    ]
+    if prompt is None:
+        system_prompt, user_prompt = build_claude_prompt(board, player, turn_number, rotation_state, history, config)
+    else:
+        system_prompt, user_prompt = prompt.claude_prompt(board, player, turn_number, rotation_state)
+    return {
+        "model": CLAUDE_MODEL,
+        "max_tokens": CLAUDE_MAX_TOKENS,
+        "temperature": TEMPERATURE,
+        "system": system_prompt,
+        "messages": [
+            {"role": "user", "content": user_prompt}
+        ]
+    }
+
+def get_move_from_gpt(board, player, turn_number, rotation_state=0, history=None, fallback=get_random_valid_move,
+                      prompt=None, config=DEFAULT_CONFIG):
+    """
+    Get a move from GPT (OpenAI) with improved context and game history.
+    If GPT fails or suggests an invalid move, fallback(board, rotation_state) is returned.
+    `prompt` is the game's PromptBuilder; without one the prompt is built from
+    `history` and the rules of `config`.
+    """
+    metrics.count('moves', model=GPT_MODEL)
+    with metrics.timer('build_request', model=GPT_MODEL):
+        request = build_request('gpt', board, player, turn_number, rotation_state, history, prompt, config)
+    response_content = None
     
     try:
+        # A missing API key falls back like any other failed request
+        _transport.setup('gpt')
         print("\n🤖 GPT-4 is thinking...")
-        response = openai.ChatCompletion.create(
-            model="gpt-4o",
-            messages=messages,
-            response_format={"type": "json_object"},
-            temperature=0.5
-        )
-        
-        # Parse the JSON response
-        response_content = response.choices[0].message['content']
+        with metrics.timer('llm_request', model=GPT_MODEL):
+            response_content = _transport.send('gpt', request)
         print(f"🤖 GPT-4 response: {response_content}")
         
-        response_json = json.loads(response_content)
-        move = int(response_json['move']) - 1  # Convert to 0-indexed
-        
-        # Check if move is valid (column must be in valid range and have space)
-        # Get current dimensions
-        ROWS, COLS = board.shape
-        
-        if move not in range(COLS) or not is_valid_location(board, move, rotation_state):
-            print(f"❌ GPT-4 suggested an invalid move: {move+1}. Valid moves are: {valid_columns}")
-            print("Making a random valid move instead.")
-            return get_random_valid_move(board, rotation_state)
-            
-        return move
+        # Parse the JSON response
+        with metrics.timer('parse', model=GPT_MODEL):
+            move = parse_gpt_move(response_content)
+        return check_move(board, move, rotation_state, "GPT-4", fallback, GPT_MODEL)
+    except ReplayMiss:
+        raise
     except Exception as e:
+        metrics.count('fallbacks', model=GPT_MODEL, reason='error' if response_content is None else 'parse_error')
         print(f"❌ Error getting move from GPT-4: {str(e)}")
-        print(f"Response content: {response.choices[0].message['content'] if 'response' in locals() else 'No response'}")
+        print(f"Response content: {response_content if response_content is not None else 'No response'}")
         print("Making a random valid move instead.")
-        return get_random_valid_move(board, rotation_state)
+        return fallback(board, rotation_state)
 
-def get_move_from_claude(board, player, turn_number, rotation_state=0):
+def get_move_from_claude(board, player, turn_number, rotation_state=0, history=None, fallback=get_random_valid_move,
+                         prompt=None, config=DEFAULT_CONFIG):
     """
     Get a move from Claude (Anthropic) with improved context and game history.
+    If Claude fails or suggests an invalid move, fallback(board, rotation_state) is returned.
+    `prompt` is the game's PromptBuilder; without one the prompt is built from
+    `history` and the rules of `config`.
     """
-    board_str = board_to_string(board, rotation_state)
-    
-    # Get current dimensions
-    ROWS, COLS = board.shape
-    
-    # Get valid moves (always columns with gravity pulling down)
-    valid_columns = [col + 1 for col in range(COLS) if is_valid_location(board, col, rotation_state)]
-    
-    # Provide the full game history as context
-    history_str = ""
-    if game_history:
-        history_str = "Move history (format: turn_number-player-column):\n"
-        history_str += "\n".join([f"{i+1}-{move['player']}-{move['column']}" for i, move in enumerate(game_history)])
-        history_str += "\n\n"
-    
-    # Information about gravity
-    current_gravity = "down"  # Gravity always pulls down
-    next_rotation = (turn_number) % ROTATION_INTERVAL == 0
-    
-    system_prompt = (
-        "You are an expert Connect 5 AI. Analyze the current board state and choose the best move. "
-        "Respond with a JSON object containing a 'move' field with the chosen column number from the valid moves provided."
-    )
-    
-    user_prompt = (
-        "Rules: This is Connect 5 with rotation. Players take turns dropping pieces. "
-        "A piece always falls downward (gravity pulls down). "
-        "Every 6 moves (3 turns each player), the board rotates 90 degrees clockwise, and pieces fall to realign with gravity. "
-        "The goal is to connect five of your pieces in a row horizontally, vertically, or diagonally.\n\n"
-        f"Current board state (Turn {turn_number}, Rotation: {rotation_state % 4}):\n{board_str}\n\n"
-        f"{'Board will rotate after this move!' if next_rotation else ''}\n\n"
-        f"{history_str}"
-        f"Valid moves: {valid_columns}\n\n"
-        f"You are playing as {'Player 1 (X)' if player == 1 else 'Player 2 (O)'}. "
-        "Analyze the board and choose the best valid column to drop your piece. "
-        "Respond with a JSON object containing a 'move' field with the chosen column number."
-    )
+    metrics.count('moves', model=CLAUDE_MODEL)
+    with metrics.timer('build_request', model=CLAUDE_MODEL):
+        request = build_request('claude', board, player, turn_number, rotation_state, history, prompt, config)
+    response_content = None
     
     try:
+        # A missing API key falls back like any other failed request
+        _transport.setup('claude')
         print("\n🤖 Claude is thinking...")
-        message = anthropic_client.messages.create(
-            model="claude-3-7-sonnet-latest",
-            max_tokens=150,
-            temperature=0.5,
-            system=system_prompt,
-            messages=[
-                {"role": "user", "content": user_prompt}
-            ]
-        )
-        
-        # Extract the move from the response
-        response_content = message.content[0].text
+        with metrics.timer('llm_request', model=CLAUDE_MODEL):
+            response_content = _transport.send('claude', request)
         print(f"🤖 Claude response: {response_content}")
         
-        # Use regex to find the JSON object
-        json_match = re.search(r'({[\s\S]*?})', response_content)
-        if not json_match:
-            print(f"❌ Could not parse JSON from Claude's response: {response_content}")
-            # Fallback to just finding the move number
-            move_match = re.search(r'"move":\s*(\d+)', response_content)
-            if not move_match:
-                print("❌ Could not parse move number either.")
-                print("Making a random valid move instead.")
-                return get_random_valid_move(board, rotation_state)
-            move = int(move_match.group(1)) - 1  # Convert to 0-indexed
-        else:
-            try:
-                response_json = json.loads(json_match.group(1))
-                move = int(response_json['move']) - 1  # Convert to 0-indexed
-            except json.JSONDecodeError:
-                print(f"❌ Invalid JSON from Claude: {json_match.group(1)}")
-                # Fallback to just finding the move number
-                move_match = re.search(r'"move":\s*(\d+)', response_content)
-                if not move_match:
-                    print("❌ Could not parse move number either.")
-                    print("Making a random valid move instead.")
-                    return get_random_valid_move(board, rotation_state)
-                move = int(move_match.group(1)) - 1  # Convert to 0-indexed
-        
-        # Check if move is valid (column must be in valid range and have space)
-        # Get current dimensions
-        ROWS, COLS = board.shape
-        
-        if move not in range(COLS) or not is_valid_location(board, move, rotation_state):
-            print(f"❌ Claude suggested an invalid move: {move+1}. Valid moves are: {valid_columns}")
+        with metrics.timer('parse', model=CLAUDE_MODEL):
+            move = parse_claude_move(response_content)
+        if move is None:
+            metrics.count('fallbacks', model=CLAUDE_MODEL, reason='parse_error')
             print("Making a random valid move instead.")
-            return get_random_valid_move(board, rotation_state)
-            
-        return move
+            return fallback(board, rotation_state)
+        
+        return check_move(board, move, rotation_state, "Claude", fallback, CLAUDE_MODEL)
+    except ReplayMiss:
+        raise
     except Exception as e:
+        metrics.count('fallbacks', model=CLAUDE_MODEL, reason='error' if response_content is None else 'parse_error')
         print(f"❌ Error getting move from Claude: {str(e)}")
         print("Making a random valid move instead.")
-        return get_random_valid_move(board, rotation_state)
\ No newline at end of file
+        return fallback(board, rotation_state)
@@ -0,0 +1,339 @@
+"""
+Connect 5 with Rotation - Async AI Players Module
+Contains asyncio versions of the GPT and Claude players with pooled HTTP
+clients, per-provider rate limiting and retries, so many games can run
+concurrently on one event loop
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from ai_players import (
+    CLAUDE_MAX_TOKENS, CLAUDE_MODEL, GPT_MODEL, TEMPERATURE, build_gpt_messages, build_claude_prompt,
+    parse_gpt_move, parse_claude_move, check_move, get_random_valid_move, read_api_key
+)
+from board import create_board, is_board_full, is_valid_location, drop_and_check, rotate_if_due
+from config import DEFAULT_CONFIG, VARIANTS, get_config
+from game_records import GameRecordWriter
+
+OPENAI_BASE_URL = "https://api.openai.com"
+ANTHROPIC_BASE_URL = "https://api.anthropic.com"
+ANTHROPIC_VERSION = "2023-06-01"
+
+# Pooled clients shared by every game that does not pass its own
+_default_clients = None
+
+# Responses worth retrying: rate limited or a server-side failure
+RETRY_STATUSES = {429, 500, 502, 503, 504, 529}
+
+
+class ProviderError(Exception):
+    """Raised when a provider request fails after all retries."""
+
+    def __init__(self, status, body):
+        super().__init__(f"HTTP {status}: {body}")
+        self.status = status
+        self.body = body
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter: `rate` requests per second on average with
+    bursts of up to `capacity` requests.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens=1):
+        """Wait until `tokens` tokens are available and take them."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+
+class HttpxBackend:
+    """
+    HTTP backend over one pooled httpx.AsyncClient (keep-alive connections are
+    reused across requests and games). httpx is installed with the openai and
+    anthropic SDKs.
+    """
+
+    def __init__(self, base_url, max_connections=100, timeout=60.0):
+        import httpx
+
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    async def post(self, path, payload, headers):
+        """POST a JSON payload and return (status, parsed body or text, headers)."""
+        response = await self.client.post(path, json=payload, headers=headers)
+        try:
+            body = response.json()
+        except ValueError:
+            body = response.text
+        return response.status_code, body, response.headers
+
+    async def aclose(self):
+        """Close the pooled connections."""
+        await self.client.aclose()
+
+
+class ProviderClient:
+    """
+    Base client for one LLM provider. The backend is pluggable: any object with
+    `async post(path, payload, headers) -> (status, body, headers)` works, so a
+    client can be pointed at a local mock server or an in-process fake.
+    """
+
+    def __init__(self, backend, api_key=None, requests_per_second=5.0, burst=None,
+                 max_retries=5, backoff=0.5, max_backoff=30.0):
+        self.backend = backend
+        self.api_key = api_key
+        self.bucket = TokenBucket(requests_per_second, burst)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.requests = 0
+        self.retries = 0
+
+    async def post(self, path, payload, headers):
+        """Send a rate-limited request, retrying 429/5xx with exponential backoff."""
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            self.requests += 1
+            status, body, response_headers = await self.backend.post(path, payload, headers)
+            if status < 400:
+                return body
+            if status not in RETRY_STATUSES or attempt == self.max_retries:
+                raise ProviderError(status, body)
+
+            self.retries += 1
+            delay = min(self.max_backoff, self.backoff * 2 ** attempt) * (0.5 + random.random() / 2)
+            retry_after = (response_headers or {}).get('retry-after')
+            if retry_after:
+                try:
+                    delay = max(delay, float(retry_after))
+                except ValueError:
+                    pass
+            await asyncio.sleep(delay)
+
+    async def aclose(self):
+        """Close the backend if it holds connections."""
+        close = getattr(self.backend, 'aclose', None)
+        if close is not None:
+            await close()
+
+
+class OpenAIClient(ProviderClient):
+    """Chat Completions client for GPT."""
+
+    async def chat(self, messages, model=GPT_MODEL, temperature=TEMPERATURE):
+        """Send chat messages and return the text of the first choice."""
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        payload = {
+            "model": model,
+            "messages": messages,
+            "response_format": {"type": "json_object"},
+            "temperature": temperature,
+        }
+        body = await self.post("/v1/chat/completions", payload, headers)
+        return body["choices"][0]["message"]["content"]
+
+
+class AnthropicClient(ProviderClient):
+    """Messages API client for Claude."""
+
+    async def message(self, system, messages, model=CLAUDE_MODEL, max_tokens=CLAUDE_MAX_TOKENS,
+                      temperature=TEMPERATURE):
+        """Send a message request and return the text of the first content block."""
+        headers = {"x-api-key": self.api_key or "", "anthropic-version": ANTHROPIC_VERSION}
+        payload = {
+            "model": model,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "system": system,
+            "messages": messages,
+        }
+        body = await self.post("/v1/messages", payload, headers)
+        return body["content"][0]["text"]
+
+
+def create_clients(openai_base_url=OPENAI_BASE_URL, anthropic_base_url=ANTHROPIC_BASE_URL,
+                   requests_per_second=5.0, max_connections=100):
+    """Create a pooled (OpenAIClient, AnthropicClient) pair to share between games."""
+    gpt_client = OpenAIClient(
+        HttpxBackend(openai_base_url, max_connections),
+        api_key=read_api_key("OPENAI_API_KEY"),
+        requests_per_second=requests_per_second,
+    )
+    claude_client = AnthropicClient(
+        HttpxBackend(anthropic_base_url, max_connections),
+        api_key=read_api_key("ANTHROPIC_API_KEY"),
+        requests_per_second=requests_per_second,
+    )
+    return gpt_client, claude_client
+
+
+def get_default_clients():
+    """Get the shared (OpenAIClient, AnthropicClient) pair, creating it on first use."""
+    global _default_clients
+    if _default_clients is None:
+        _default_clients = create_clients()
+    return _default_clients
+
+
+async def get_move_from_gpt_async(board, player, turn_number, rotation_state=0, history=(), client=None,
+                                  config=DEFAULT_CONFIG):
+    """
+    Async version of get_move_from_gpt. `history` is the per-game move list;
+    there is no shared module history so concurrent games stay independent.
+    """
+    client = client or get_default_clients()[0]
+    messages = build_gpt_messages(board, player, turn_number, rotation_state, list(history), config)
+    try:
+        response_content = await client.chat(messages)
+        move = parse_gpt_move(response_content)
+        return check_move(board, move, rotation_state, "GPT-4")
+    except Exception as e:
+        print(f"❌ Error getting move from GPT-4: {str(e)}")
+        print("Making a random valid move instead.")
+        return get_random_valid_move(board, rotation_state)
+
+
+async def get_move_from_claude_async(board, player, turn_number, rotation_state=0, history=(), client=None,
+                                     config=DEFAULT_CONFIG):
+    """
+    Async version of get_move_from_claude. `history` is the per-game move list;
+    there is no shared module history so concurrent games stay independent.
+    """
+    client = client or get_default_clients()[1]
+    system_prompt, user_prompt = build_claude_prompt(board, player, turn_number, rotation_state, list(history),
+                                                     config)
+    try:
+        response_content = await client.message(system_prompt, [{"role": "user", "content": user_prompt}])
+        move = parse_claude_move(response_content)
+        if move is None:
+            print("Making a random valid move instead.")
+            return get_random_valid_move(board, rotation_state)
+        return check_move(board, move, rotation_state, "Claude")
+    except Exception as e:
+        print(f"❌ Error getting move from Claude: {str(e)}")
+        print("Making a random valid move instead.")
+        return get_random_valid_move(board, rotation_state)
+
+
+async def play_gpt_vs_claude_async(gpt_client, claude_client, config=DEFAULT_CONFIG):
+    """
+    Play one headless GPT vs Claude game with the same rules as
+    play_gpt_vs_claude. Returns the winner (0 for a draw), length, rotations and history.
+    """
+    board = create_board(config)
+    turn = 0
+    rotation_state = 0
+    history = []
+    winner = 0
+
+    while True:
+        current_player = 1 if turn % 2 == 0 else 2
+        if current_player == 1:
+            col = await get_move_from_gpt_async(board, current_player, turn + 1, rotation_state, history, gpt_client,
+                                                config)
+        else:
+            col = await get_move_from_claude_async(board, current_player, turn + 1, rotation_state, history,
+                                                   claude_client, config)
+
+        if col is None or not is_valid_location(board, col, rotation_state):
+            col = get_random_valid_move(board, rotation_state)
+            if col is None:
+                break
+
+        _, result = drop_and_check(board, col, current_player, rotation_state, config)
+        history.append({
+            "turn": turn + 1,
+            "player": current_player,
+            "column": col + 1,
+            "rotation": rotation_state % 4
+        })
+        turn += 1
+        if result is not None:
+            winner = current_player if result else 0
+            break
+
+        board, rotation_state, winners = rotate_if_due(board, turn, rotation_state, config)
+        if winners:
+            winner = winners.pop() if len(winners) == 1 else 0
+            break
+        if winners is not None and is_board_full(board):
+            # Without gravity the rotated pieces can fill every column: a draw
+            break
+
+    return {"winner": winner, "length": turn, "rotations": rotation_state, "history": history}
+
+
+async def _play_and_record(gpt_client, claude_client, config, writer):
+    result = await play_gpt_vs_claude_async(gpt_client, claude_client, config)
+    if writer is not None:
+        writer.append([move["column"] - 1 for move in result["history"]], result["winner"], ('gpt', 'claude'),
+                      result["rotations"])
+    return result
+
+
+async def run_concurrent_games(n_games, gpt_client, claude_client, config=DEFAULT_CONFIG, writer=None):
+    """
+    Run n_games games concurrently on the current event loop. With a game
+    record `writer` (game_records.GameRecordWriter) every game is appended
+    as soon as it finishes.
+    """
+    return await asyncio.gather(*(
+        _play_and_record(gpt_client, claude_client, config, writer) for _ in range(n_games)
+    ))
+
+
+async def _main(args):
+    gpt_client, claude_client = create_clients(
+        args.openai_base_url, args.anthropic_base_url, args.requests_per_second, args.max_connections
+    )
+    config = get_config(args.variant)
+    writer = GameRecordWriter(args.save_games, config, buffer_games=1) if args.save_games else None
+    try:
+        start = time.perf_counter()
+        results = await run_concurrent_games(args.games, gpt_client, claude_client, config, writer)
+        elapsed = time.perf_counter() - start
+    finally:
+        await gpt_client.aclose()
+        await claude_client.aclose()
+        if writer is not None:
+            writer.close()
+
+    moves = sum(result["length"] for result in results)
+    print(f"{len(results)} games, {moves} moves in {elapsed:.1f}s ({moves / elapsed:.1f} moves/s)")
+    print(f"Requests: GPT {gpt_client.requests} ({gpt_client.retries} retries), "
+          f"Claude {claude_client.requests} ({claude_client.retries} retries)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run concurrent GPT vs Claude games")
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument('--openai-base-url', default=OPENAI_BASE_URL)
+    parser.add_argument('--anthropic-base-url', default=ANTHROPIC_BASE_URL)
+    parser.add_argument('--requests-per-second', type=float, default=5.0)
+    parser.add_argument('--max-connections', type=int, default=100)
+    parser.add_argument('--variant', choices=sorted(VARIANTS), default='default',
+                        help="board size and rotation rules (see config.VARIANTS)")
+    parser.add_argument('--save-games', metavar='LOG', help="append every game to LOG (see game_records.py)")
+    asyncio.run(_main(parser.parse_args()))
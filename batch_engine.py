@@ -0,0 +1,175 @@
+"""
+Connect 5 with Rotation - Batch Engine Module
+Contains a vectorized engine that steps many games at once
+"""
+import numpy as np
+
+from board import five_in_a_row, rotate_board
+from config import DEFAULT_CONFIG
+
+# Winner code for a rotation that completes a line for both players
+BOTH_WIN = 3
+
+
+class BatchGame:
+    """
+    N independent games held in a single (N, size, size) tensor.
+
+    Every board lives in the bottom-left corner of a square of side
+    max(rows, cols). Games with an even rotation state use the original
+    rows x cols shape, games with an odd rotation state the swapped one.
+    Row 0 is the bottom row, exactly like the boards in board.py. All games
+    follow the rules of `config`.
+    """
+
+    def __init__(self, n_games, config=DEFAULT_CONFIG):
+        self.n_games = n_games
+        self.config = config
+        self.base_shape = (config.rows, config.cols)
+        self.rotation_interval = config.rotation_interval
+        self.size = max(config.rows, config.cols)
+
+        self.boards = np.zeros((n_games, self.size, self.size), dtype=np.int8)
+        self.heights = np.zeros((n_games, self.size), dtype=np.int16)
+        self.turn = np.zeros(n_games, dtype=np.int32)
+        self.rotation_state = np.zeros(n_games, dtype=np.int32)
+        self.done = np.zeros(n_games, dtype=bool)
+        # 0 = no winner (still running or draw), 1/2 = player, BOTH_WIN = double win after rotation
+        self.winner = np.zeros(n_games, dtype=np.int8)
+
+    def reset(self, games=None):
+        """Reset the selected games (all games by default) to an empty board."""
+        if games is None:
+            games = slice(None)
+        self.boards[games] = 0
+        self.heights[games] = 0
+        self.turn[games] = 0
+        self.rotation_state[games] = 0
+        self.done[games] = False
+        self.winner[games] = 0
+
+    def shapes(self):
+        """Get the current (rows, cols) of every game as two arrays."""
+        rows, cols = self.base_shape
+        odd = self.rotation_state % 2 == 1
+        return np.where(odd, cols, rows), np.where(odd, rows, cols)
+
+    def current_player(self):
+        """Get the piece (1 or 2) to move in every game."""
+        return (self.turn % 2 + 1).astype(np.int8)
+
+    def valid_moves(self):
+        """
+        Get a boolean (N, size) mask of playable columns.
+        Finished games have no valid moves.
+        """
+        rows, cols = self.shapes()
+        columns = np.arange(self.size)
+        return (
+            (columns[None, :] < cols[:, None])
+            & (self.heights < rows[:, None])
+            & ~self.done[:, None]
+        )
+
+    def random_moves(self, rng=None):
+        """Pick a uniformly random valid column for every game (-1 if none)."""
+        rng = np.random.default_rng() if rng is None else rng
+        valid = self.valid_moves()
+        scores = np.where(valid, rng.random(valid.shape), -1.0)
+        moves = scores.argmax(axis=1)
+        moves[~valid.any(axis=1)] = -1
+        return moves
+
+    def get_board(self, game):
+        """Get the board of one game as an int array, as board.py would hold it."""
+        rows, cols = self.shapes()
+        return self.boards[game, :rows[game], :cols[game]].astype(int)
+
+    def step(self, moves):
+        """
+        Play one move in every live game.
+        Follows the same order as the interactive game loop: drop, win check for
+        the mover, draw check, then the rotation step every
+        rotation_interval moves followed by a win check for both players.
+        Returns the indices of the games that finished during this step.
+        """
+        moves = np.asarray(moves)
+        live = np.flatnonzero(~self.done)
+        if live.size == 0:
+            return live
+
+        cols = moves[live]
+        valid = self.valid_moves()
+        in_range = (cols >= 0) & (cols < self.size)
+        if not in_range.all() or not valid[live, cols].all():
+            raise ValueError("Invalid move for at least one live game")
+
+        # Drop
+        players = self.current_player()[live]
+        rows = self.heights[live, cols]
+        self.boards[live, rows, cols] = players
+        self.heights[live, cols] += 1
+
+        # The mover cannot have had a line before this move, so a full scan of
+        # the mover's pieces only finds lines through the new piece
+        won = five_in_a_row(self.boards[live] == players[:, None, None], self.config.win_length)
+        self.winner[live[won]] = players[won]
+
+        finished = won | self._full(live)
+        self.done[live[finished]] = True
+        self.turn[live] += 1
+
+        if self.rotation_interval:
+            rotating = live[~finished & (self.turn[live] % self.rotation_interval == 0)]
+            if rotating.size:
+                self._rotate(rotating)
+                found = five_in_a_row(np.stack([self.boards[rotating] == 1, self.boards[rotating] == 2], axis=1),
+                                      self.config.win_length)
+                scored = found.any(axis=1)
+                codes = np.where(found.all(axis=1), BOTH_WIN, np.where(found[:, 0], 1, 2))
+                self.winner[rotating[scored]] = codes[scored]
+                self.done[rotating[scored]] = True
+                if not self.config.gravity_after_rotation:
+                    # Floating pieces can fill the top of every column: a draw
+                    self.done[rotating[self._full(rotating)]] = True
+
+        return live[self.done[live]]
+
+    def _full(self, games):
+        """Which of the selected games have no playable column left."""
+        rows, cols = self.shapes()
+        columns = np.arange(self.size)
+        return (
+            (self.heights[games] >= rows[games, None])
+            | (columns[None, :] >= cols[games, None])
+        ).all(axis=1)
+
+    def _rotate(self, games):
+        """Apply the rotation step of the config to the selected boards."""
+        rows, cols = self.shapes()
+        odd = self.rotation_state[games] % 2 == 1
+        for group in (games[~odd], games[odd]):
+            if group.size == 0:
+                continue
+            r, c = rows[group[0]], cols[group[0]]
+            rotated = rotate_board(self.boards[group, :r, :c], self.config)
+
+            self.boards[group] = 0
+            self.boards[group, :c, :r] = rotated
+            self.heights[group] = 0
+            if self.config.gravity_after_rotation:
+                self.heights[group, :r] = np.count_nonzero(rotated, axis=1)
+            else:
+                # One above the highest piece of every column
+                occupied = rotated != 0
+                self.heights[group, :r] = np.where(occupied.any(axis=1), c - occupied[:, ::-1].argmax(axis=1), 0)
+            self.rotation_state[group] += 1
+
+    def play_random(self, rng=None, max_steps=None):
+        """Play random moves in every live game until all games are finished."""
+        rng = np.random.default_rng() if rng is None else rng
+        steps = 0
+        while not self.done.all() and (max_steps is None or steps < max_steps):
+            self.step(self.random_moves(rng))
+            steps += 1
+        return self.winner.copy()
@@ -0,0 +1,47 @@
+"""
+Connect 5 with Rotation - Import Time Benchmark
+Tracks cold-start time of a fresh interpreter for the engine-only path
+versus the LLM path
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+# Snippets run in a fresh interpreter; each is what a worker process does at start-up
+IMPORT_PATHS = {
+    'interpreter': "pass",
+    'board': "import board",
+    'engine': "import players; players.get_player('search')",
+    'llm': "import ai_players, openai, anthropic",
+}
+
+
+def time_import(snippet, runs=10):
+    """Median wall-clock seconds to start python and run the snippet."""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        completed = subprocess.run([sys.executable, '-c', snippet], capture_output=True)
+        samples.append(time.perf_counter() - start)
+        if completed.returncode != 0:
+            return None
+    return statistics.median(samples)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    baseline = None
+    print(f"{'path':<12} {'median ms':>10} {'over python':>12}")
+    for name, snippet in IMPORT_PATHS.items():
+        seconds = time_import(snippet, args.runs)
+        if seconds is None:
+            print(f"{name:<12} {'failed':>10}   (missing dependency?)")
+            continue
+        if baseline is None:
+            baseline = seconds
+        print(f"{name:<12} {seconds * 1000:>10.1f} {(seconds - baseline) * 1000:>12.1f}")
@@ -0,0 +1,47 @@
+"""
+Connect 5 with Rotation - MCTS Benchmark
+Measures MCTS playout throughput as the number of worker processes grows
+"""
+import argparse
+import os
+
+from board import create_board
+from mcts_player import MCTSPlayer
+
+
+def benchmark(worker_counts, time_budget=2.0):
+    """
+    Run a fixed-deadline search from the empty board for each worker count.
+    Returns a list of (workers, playouts, playouts_per_second, speedup).
+    """
+    board = create_board()
+    rows = []
+    baseline = None
+    for workers in worker_counts:
+        player = MCTSPlayer(workers=workers, playouts=None, time_budget=time_budget, seed=workers)
+        try:
+            # Warm-up search so process start-up is not measured
+            player.time_budget = 0.1
+            player.search(board, 1, 1)
+            player.time_budget = time_budget
+            result = player.search(board, 1, 1)
+        finally:
+            player.close()
+
+        rate = result.playouts / result.elapsed
+        if baseline is None:
+            baseline = rate
+        rows.append((workers, result.playouts, rate, rate / baseline))
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument('--time-budget', type=float, default=2.0)
+    args = parser.parse_args()
+
+    print(f"CPU count: {os.cpu_count()}")
+    print(f"{'workers':>8} {'playouts':>10} {'playouts/s':>12} {'speedup':>8}")
+    for workers, playouts, rate, speedup in benchmark(args.workers, args.time_budget):
+        print(f"{workers:>8} {playouts:>10} {rate:>12.0f} {speedup:>8.2f}")
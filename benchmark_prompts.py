@@ -0,0 +1,92 @@
+"""
+Connect 5 with Rotation - Prompt Benchmark
+Compares the prompt build time and prompt tokens of the original prompt
+(rebuilt from the whole history every move) with the incremental
+PromptBuilder in the full and compact encodings, by game phase
+"""
+import argparse
+import random
+import time
+from collections import defaultdict
+
+from ai_players import build_gpt_messages
+from board import create_board, get_valid_moves, drop_and_check, rotate_if_due
+from prompts import PromptBuilder, count_tokens, FULL, COMPACT, _tokenizer
+
+# Prompt variants: name -> (builder encodings or None for the original function)
+VARIANTS = {
+    'original': None,
+    'builder-full': {'gpt': FULL},
+    'builder-compact': {'gpt': COMPACT},
+}
+
+
+def timed(function, repeats):
+    """Best-of-`repeats` seconds for one call, and its result."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def measure_game(seed, bucket, repeats):
+    """
+    Play one random game and build every prompt in every variant.
+    Returns {(variant, phase): [(seconds, tokens), ...]}.
+    """
+    rng = random.Random(seed)
+    samples = defaultdict(list)
+    builders = {name: PromptBuilder(encodings) for name, encodings in VARIANTS.items() if encodings}
+    board = create_board()
+    history = []
+    turn = 0
+    rotation_state = 0
+
+    while True:
+        player = 1 if turn % 2 == 0 else 2
+        phase = turn // bucket
+        for name, encodings in VARIANTS.items():
+            if encodings is None:
+                build = lambda: build_gpt_messages(board, player, turn + 1, rotation_state, history)
+            else:
+                build = lambda: builders[name].gpt_messages(board, player, turn + 1, rotation_state)
+            seconds, messages = timed(build, repeats)
+            samples[name, phase].append((seconds, count_tokens(messages[1]['content'])))
+
+        col = rng.choice(get_valid_moves(board, rotation_state))
+        _, result = drop_and_check(board, col, player, rotation_state)
+        history.append({"turn": turn + 1, "player": player, "column": col + 1, "rotation": rotation_state % 4})
+        for builder in builders.values():
+            builder.add_move(player, col + 1)
+        turn += 1
+        if result is not None:
+            break
+        board, rotation_state, winners = rotate_if_due(board, turn, rotation_state)
+        if winners:
+            break
+    return samples
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--games', type=int, default=50)
+    parser.add_argument('--bucket', type=int, default=12, help="turns per game phase")
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    totals = defaultdict(list)
+    for seed in range(args.games):
+        for key, values in measure_game(seed, args.bucket, args.repeats).items():
+            totals[key].extend(values)
+
+    print(f"Tokens counted with {'tiktoken o200k_base' if _tokenizer() else 'a word/symbol estimate'}")
+    print(f"{'turns':>9} " + " ".join(f"{name + ' us':>19} {'tokens':>7}" for name in VARIANTS))
+    for phase in sorted({phase for _, phase in totals}):
+        cells = []
+        for name in VARIANTS:
+            values = totals[name, phase]
+            cells.append(f"{sum(s for s, _ in values) / len(values) * 1e6:>19.1f} "
+                         f"{sum(t for _, t in values) / len(values):>7.0f}")
+        print(f"{phase * args.bucket + 1:>4}-{(phase + 1) * args.bucket:<4} " + " ".join(cells))
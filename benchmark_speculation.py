@@ -0,0 +1,101 @@
+"""
+Connect 5 with Rotation - Speculation Benchmark
+Plays GPT vs Claude games against a simulated LLM with fixed latency and
+compares wall-clock time per game and wasted prompt tokens for several
+speculation widths
+"""
+import argparse
+import contextlib
+import io
+import json
+import random
+import re
+import time
+
+import numpy as np
+
+import ai_players
+from game import play_gpt_vs_claude
+from llm_record import request_key
+from speculation import heuristic_ranking
+
+SYMBOLS = {'.': 0, 'X': 1, 'O': 2}
+TURN_PATTERN = re.compile(r"Current board state \(Turn (\d+), Rotation: (\d)\):\n[^\n]*\n")
+
+
+def parse_full_prompt(prompt):
+    """(board, player, turn_number, rotation_state) from a prompt in the full encoding."""
+    match = TURN_PATTERN.search(prompt)
+    rows = []
+    for line in prompt[match.end():].splitlines():
+        if line[:1].isdigit():
+            break
+        rows.append([SYMBOLS[cell] for cell in line.split()])
+    player = 1 if "Player 1 (X)" in prompt else 2
+    return np.array(rows[::-1], dtype=int), player, int(match.group(1)), int(match.group(2))
+
+
+class SimulatedLLM:
+    """
+    Transport standing in for both APIs. Each answer takes `latency` seconds
+    (+/- `jitter`) and plays the heuristic's favourite move with probability
+    `agreement`, otherwise a random valid move. Answers and delays depend only
+    on the request, so every speculation width plays the same games.
+    """
+
+    def __init__(self, latency=0.2, jitter=0.05, agreement=0.6):
+        self.latency = latency
+        self.jitter = jitter
+        self.agreement = agreement
+        self.requests = 0
+
+    def setup(self, provider):
+        pass
+
+    def send(self, provider, request):
+        self.requests += 1
+        rng = random.Random(request_key(provider, request))
+        board, player, turn_number, rotation_state = parse_full_prompt(request['messages'][-1]['content'])
+        ranking = heuristic_ranking(board, player, turn_number, rotation_state)
+        move = ranking[0] if rng.random() < self.agreement else rng.choice(ranking)
+        time.sleep(max(0.0, self.latency + rng.uniform(-self.jitter, self.jitter)))
+        return json.dumps({"move": move + 1})
+
+
+def run(width, budget, games, llm):
+    """Mean seconds per game and summed speculation stats for one width."""
+    totals = {'hits': 0, 'misses': 0, 'issued': 0, 'wasted_tokens': 0, 'saved_seconds': 0.0}
+    previous = ai_players.set_transport(llm)
+    start = time.perf_counter()
+    try:
+        for seed in range(games):
+            random.seed(seed)
+            with contextlib.redirect_stdout(io.StringIO()):
+                stats = play_gpt_vs_claude(delay=0, speculate=width, speculation_budget=budget)
+            for key in totals:
+                totals[key] += stats[key] if stats else 0
+    finally:
+        ai_players.set_transport(previous)
+    return (time.perf_counter() - start) / games, totals
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--games', type=int, default=3)
+    parser.add_argument('--widths', type=int, nargs='+', default=[0, 1, 2, 3])
+    parser.add_argument('--budget', type=int, default=None, help="speculation token cap per game")
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--agreement', type=float, default=0.6)
+    args = parser.parse_args()
+
+    llm = SimulatedLLM(args.latency, agreement=args.agreement)
+    baseline = None
+    print(f"{'k':>3} {'s/game':>8} {'saved':>7} {'hit rate':>9} {'extra req/game':>15} {'wasted tok/game':>16}")
+    for width in args.widths:
+        seconds, totals = run(width, args.budget, args.games, llm)
+        baseline = seconds if baseline is None else baseline
+        requests = totals['hits'] + totals['misses']
+        print(f"{width:>3} {seconds:>8.2f} {1 - seconds / baseline:>7.0%} "
+              f"{totals['hits'] / requests if requests else 0:>9.0%} "
+              f"{(totals['issued'] - totals['hits']) / args.games:>15.1f} "
+              f"{totals['wasted_tokens'] / args.games:>16.0f}")
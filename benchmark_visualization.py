@@ -0,0 +1,49 @@
+"""
+Connect 5 with Rotation - Visualization Benchmark
+Times the frames of the live board view over random games, every move and
+rotation included, on a chosen matplotlib backend
+"""
+import argparse
+import random
+
+import matplotlib
+
+from config import VARIANTS, get_config
+from game_state import GameState
+
+
+def game_frames(config, rng):
+    """(board, rotation_state) of every frame of a random game: after each move and each rotation."""
+    state = GameState(config)
+    yield state.to_array(), state.rotation_state
+    while not state.is_over:
+        col = rng.choice(state.valid_moves())
+        state.drop(col)
+        yield state.to_array(), state.rotation_state
+        if state.rotate_if_due() is not None:
+            yield state.to_array(), state.rotation_state
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--games', type=int, default=5)
+    parser.add_argument('--backend', default='Agg', help="matplotlib backend (Agg renders offscreen)")
+    parser.add_argument('--variant', choices=sorted(VARIANTS), default='default')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    matplotlib.use(args.backend)
+    from visualization import LiveBoard
+
+    config = get_config(args.variant)
+    rng = random.Random(args.seed)
+    view = LiveBoard(config)
+    for _ in range(args.games):
+        for board, rotation_state in game_frames(config, rng):
+            view.update(board, rotation_state)
+    stats = view.stats()
+    view.close()
+    print(f"Live view on {args.backend}, {args.games} games:")
+    for name, row in stats.items():
+        print(f"  {name:<8} {row['count']:>5}: mean {row['mean_ms']:.2f} ms, median {row['median_ms']:.2f} ms, "
+              f"max {row['max_ms']:.2f} ms")
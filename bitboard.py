@@ -0,0 +1,254 @@
+"""
+Connect 5 with Rotation - Bitboard Module
+Contains the bitboard engine used behind the board module functions
+"""
+from functools import lru_cache
+
+import numpy as np
+
+# Number of pieces in a row needed to win
+WIN_LENGTH = 5
+
+# Layout: bit index = col * (rows + 1) + row, with row 0 at the bottom.
+# The extra (rows + 1)-th bit of every column is a sentinel that always
+# stays empty, so shifted runs never wrap from one column into the next.
+
+
+@lru_cache(maxsize=None)
+def _compress(bits, occupied):
+    """
+    Pack the bits of `bits` selected by `occupied` into the lowest positions
+    (a software PEXT). Used to let the pieces of a column or row fall down.
+    """
+    result = 0
+    out = 0
+    while occupied:
+        low = occupied & -occupied
+        if bits & low:
+            result |= 1 << out
+        out += 1
+        occupied ^= low
+    return result
+
+
+@lru_cache(maxsize=None)
+def _top_mask(rows, cols):
+    """Mask with the top cell of every column set."""
+    stride = rows + 1
+    mask = 0
+    for c in range(cols):
+        mask |= 1 << (c * stride + rows - 1)
+    return mask
+
+
+@lru_cache(maxsize=None)
+def rotation_map(rows, cols, clockwise=True):
+    """
+    Cell mapping of a 90 degree rotation of a rows x cols board: for every
+    column of the rotated (cols x rows) board, the bit indices of the old
+    board that end up in it, bottom cell first. Built once per geometry.
+    """
+    stride = rows + 1
+    if clockwise:
+        # Old row (rows - 1 - new col), read left to right from the bottom
+        return tuple(tuple(c * stride + rows - 1 - new_col for c in range(cols)) for new_col in range(rows))
+    # Old row new_col, read right to left from the bottom
+    return tuple(tuple(c * stride + new_col for c in reversed(range(cols))) for new_col in range(rows))
+
+
+def has_run(mask, rows, length=WIN_LENGTH):
+    """
+    Check if a single player mask contains `length` pieces in a row,
+    horizontally, vertically or diagonally.
+    """
+    stride = rows + 1
+    # vertical, horizontal, diagonal (positive slope), diagonal (negative slope)
+    for shift in (1, stride, stride + 1, stride - 1):
+        run = mask
+        covered = 1
+        # Double the run length while possible, then finish with one more shift
+        while covered * 2 <= length:
+            run &= run >> (shift * covered)
+            covered *= 2
+        if covered < length:
+            run &= run >> (shift * (length - covered))
+        if run:
+            return True
+    return False
+
+
+class Bitboard:
+    """
+    Two-player board stored as one integer mask per player plus the height
+    of every column. Row 0 is the bottom row, as in the NumPy boards.
+    """
+    __slots__ = ('rows', 'cols', 'masks', 'heights')
+
+    def __init__(self, rows, cols, masks=None, heights=None):
+        self.rows = rows
+        self.cols = cols
+        self.masks = list(masks) if masks is not None else [0, 0]
+        self.heights = list(heights) if heights is not None else [0] * cols
+
+    @classmethod
+    def from_array(cls, board):
+        """Build a bitboard from a NumPy board (0 = empty, 1/2 = players)."""
+        rows, cols = board.shape
+        masks = []
+        for piece in (1, 2):
+            padded = np.zeros((cols, rows + 1), dtype=bool)
+            padded[:, :rows] = board.T == piece
+            packed = np.packbits(padded.ravel(), bitorder='little')
+            masks.append(int.from_bytes(packed.tobytes(), 'little'))
+
+        # Height is one above the highest piece (the first empty cell from the
+        # bottom on settled boards); pieces left floating by a rotation without
+        # gravity are landed on, not passed
+        occupied = board != 0
+        heights = np.where(occupied.any(axis=0), rows - occupied[::-1].argmax(axis=0), 0)
+        return cls(rows, cols, masks, heights.tolist())
+
+    def to_array(self, dtype=int):
+        """Convert the bitboard back to a NumPy board."""
+        rows, cols = self.rows, self.cols
+        size = cols * (rows + 1)
+        nbytes = (size + 7) // 8
+        board = np.zeros((rows, cols), dtype=dtype)
+        for piece, mask in enumerate(self.masks, start=1):
+            bits = np.unpackbits(
+                np.frombuffer(mask.to_bytes(nbytes, 'little'), dtype=np.uint8),
+                count=size, bitorder='little'
+            ).reshape(cols, rows + 1)[:, :rows].T
+            board[bits.astype(bool)] = piece
+        return board
+
+    def copy(self):
+        """Return an independent copy of the bitboard."""
+        return Bitboard(self.rows, self.cols, self.masks, self.heights)
+
+    @property
+    def occupied(self):
+        """Mask of all occupied cells."""
+        return self.masks[0] | self.masks[1]
+
+    def can_play(self, col):
+        """Check if a column is in range and its top cell is empty."""
+        if not 0 <= col < self.cols:
+            return False
+        return not (self.occupied >> (col * (self.rows + 1) + self.rows - 1)) & 1
+
+    def valid_moves(self):
+        """Get a list of all columns that are not full."""
+        occupied = self.occupied
+        stride = self.rows + 1
+        top = self.rows - 1
+        return [c for c in range(self.cols) if not (occupied >> (c * stride + top)) & 1]
+
+    def is_full(self):
+        """Check if the top cell of every column is occupied."""
+        top = _top_mask(self.rows, self.cols)
+        return self.occupied & top == top
+
+    def next_open_row(self, col):
+        """Get the row a piece dropped in `col` would land in, or None."""
+        if not 0 <= col < self.cols or self.heights[col] >= self.rows:
+            return None
+        return self.heights[col]
+
+    def drop(self, col, piece):
+        """Drop a piece into a column and return the row it landed in."""
+        row = self.heights[col]
+        self.masks[piece - 1] |= 1 << (col * (self.rows + 1) + row)
+        self.heights[col] = row + 1
+        return row
+
+    def undrop(self, col, piece):
+        """Remove the top piece of a column (reverse of drop)."""
+        row = self.heights[col] - 1
+        self.masks[piece - 1] &= ~(1 << (col * (self.rows + 1) + row))
+        self.heights[col] = row
+
+    def has_five(self, piece, length=WIN_LENGTH):
+        """Check if the given piece has `length` (WIN_LENGTH by default) in a row."""
+        return has_run(self.masks[piece - 1], self.rows, length)
+
+    def winners(self, length=WIN_LENGTH):
+        """Get the set of players that currently have `length` in a row."""
+        return {piece for piece in (1, 2) if self.has_five(piece, length)}
+
+    def settle(self):
+        """Let every piece fall to the bottom of its column (gravity)."""
+        stride = self.rows + 1
+        column = (1 << self.rows) - 1
+        new_masks = [0, 0]
+        for c in range(self.cols):
+            shift = c * stride
+            first = (self.masks[0] >> shift) & column
+            second = (self.masks[1] >> shift) & column
+            occupied = first | second
+            self.heights[c] = bin(occupied).count('1')
+            new_masks[0] |= _compress(first, occupied) << shift
+            new_masks[1] |= _compress(second, occupied) << shift
+        self.masks = new_masks
+
+    def rotate_clockwise(self):
+        """
+        Rotate the board 90 degrees clockwise and apply gravity in one pass.
+        Old row r becomes new column (rows - 1 - r), read left to right from
+        the bottom, which matches rotate_board_clockwise followed by
+        apply_gravity_after_rotation.
+        """
+        rows, cols = self.rows, self.cols
+        stride = rows + 1
+        new_stride = cols + 1
+        first, second = self.masks
+        new_first = new_second = 0
+        new_heights = [0] * rows
+        for r in range(rows):
+            base = (rows - 1 - r) * new_stride
+            height = 0
+            for c in range(cols):
+                bit = 1 << (c * stride + r)
+                if first & bit:
+                    new_first |= 1 << (base + height)
+                    height += 1
+                elif second & bit:
+                    new_second |= 1 << (base + height)
+                    height += 1
+            new_heights[rows - 1 - r] = height
+
+        self.rows, self.cols = cols, rows
+        self.masks = [new_first, new_second]
+        self.heights = new_heights
+
+    def rotate(self, clockwise=True, gravity=True):
+        """
+        Rotate the board 90 degrees (see board.rotate_board) and, with
+        `gravity`, let the pieces fall in the same pass. Without gravity the
+        pieces keep their rotated cells and a column's height is one above
+        its highest piece.
+        """
+        if clockwise and gravity:
+            self.rotate_clockwise()
+            return
+        new_stride = self.cols + 1
+        first, second = self.masks
+        occupied = first | second
+        new_first = new_second = 0
+        new_heights = []
+        for new_col, sources in enumerate(rotation_map(self.rows, self.cols, clockwise)):
+            base = new_col * new_stride
+            height = 0
+            for new_row, bit in enumerate(sources):
+                if (occupied >> bit) & 1:
+                    row = height if gravity else new_row
+                    if (first >> bit) & 1:
+                        new_first |= 1 << (base + row)
+                    else:
+                        new_second |= 1 << (base + row)
+                    height = row + 1
+            new_heights.append(height)
+
+        self.rows, self.cols = self.cols, self.rows
+        self.masks = [new_first, new_second]
+        self.heights = new_heights
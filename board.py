@@ -2,18 +2,26 @@
 Connect 5 with Rotation - Board Module
 Contains all the board related functions and classes
 """
+import functools
+
 import numpy as np
 
-# Game board dimensions
-ROW_COUNT = 8
-COLUMN_COUNT = 9
+from bitboard import Bitboard, WIN_LENGTH
+from config import DEFAULT_CONFIG
+
+# Game board dimensions of the default variant (see config.GameConfig)
+ROW_COUNT = DEFAULT_CONFIG.rows
+COLUMN_COUNT = DEFAULT_CONFIG.cols
 
 # Rotation interval - board rotates every N moves (representing turns for both players)
-ROTATION_INTERVAL = 6
+ROTATION_INTERVAL = DEFAULT_CONFIG.rotation_interval
 
-def create_board():
+# Line directions as (row step, column step): horizontal, vertical and both diagonals
+LINE_DIRECTIONS = ((0, 1), (1, 0), (1, 1), (-1, 1))
+
+def create_board(config=DEFAULT_CONFIG):
     """Create a new empty game board."""
-    return np.zeros((ROW_COUNT, COLUMN_COUNT), dtype=int)
+    return np.zeros((config.rows, config.cols), dtype=int)
 
 def drop_piece(board, row, col, piece):
     """Place a piece at the specified position."""
@@ -42,150 +50,232 @@ def get_next_open_row(board, col, rotation_state=0):
     if not 0 <= col < COLS:
         return None
     
-    # Always search from bottom up (gravity pulls down)
-    for r in range(ROWS):
-        if board[r, col] == 0:
-            return r
-    
-    return None
+    # A piece lands one above the highest piece of the column: the first empty
+    # cell from the bottom on settled boards, on top of pieces left floating
+    # by a rotation without gravity
+    column = board[:, col].tolist()
+    if column[-1] != 0:
+        return None
+    row = ROWS - 1
+    while row and column[row - 1] == 0:
+        row -= 1
+    return row
 
 def get_valid_moves(board, rotation_state=0):
     """
     Get a list of all valid moves in the current board state.
     """
-    # Get current dimensions
-    ROWS, COLS = board.shape
-    
-    # Valid moves are columns that aren't full
-    return [col for col in range(COLS) if is_valid_location(board, col, rotation_state)]
+    # Valid moves are columns that aren't full, i.e. whose top cell is empty
+    return [col for col, piece in enumerate(board[-1].tolist()) if piece == 0]
 
 def rotate_board_clockwise(board):
     """
     Rotate the board 90 degrees clockwise.
     For non-square boards, this requires special handling.
     """
-    # For non-square matrices, we need to handle rotation carefully
-    rows, cols = board.shape
-    # Create a new array with swapped dimensions
-    rotated = np.zeros((cols, rows), dtype=int)
-    
-    # Manually perform the rotation to ensure correctness
-    for r in range(rows):
-        for c in range(cols):
-            # In a 90-degree clockwise rotation:
-            # new_col = rows - 1 - old_row
-            # new_row = old_col
-            rotated[c][rows - 1 - r] = board[r][c]
-    
-    return rotated
+    # In a 90-degree clockwise rotation:
+    # new_col = rows - 1 - old_row
+    # new_row = old_col
+    return np.rot90(board, -1).astype(int)
 
 def apply_gravity_after_rotation(board, rotation_state=0):
     """
     Apply gravity to all pieces after rotation.
     Gravity always pulls downward (to the bottom of the board).
     """
-    # Get current dimensions after rotation
-    CURRENT_ROWS, CURRENT_COLS = board.shape
-    new_board = np.zeros_like(board)
+    return _settle(board)
+
+def _settle(board, out=None):
+    """
+    Compact every column of a (..., rows, cols) board or board view: each
+    piece falls to the number of pieces below it. out may alias board.
+    """
+    occupied = board != 0
+    landing_rows = np.cumsum(occupied, axis=-2) - 1
+    index = np.nonzero(occupied)
+    # Gather before writing so that out may alias board
+    values = board[index]
+    landing_rows = landing_rows[index]
     
-    # Apply gravity column by column (downward)
-    for col in range(CURRENT_COLS):
-        # Get all non-zero pieces in this column
-        pieces = []
-        for row in range(CURRENT_ROWS):
-            if board[row, col] != 0:
-                pieces.append(board[row, col])
-        
-        # Place pieces at the bottom of the column
-        for i, piece in enumerate(pieces):
-            if i < CURRENT_ROWS:  # Safety check
-                new_board[i, col] = piece
+    if out is None:
+        out = np.zeros(board.shape, dtype=board.dtype)
+    else:
+        if out.shape != board.shape:
+            raise ValueError(f"out has shape {out.shape}, expected {board.shape}")
+        out.fill(0)
     
-    return new_board
+    out[index[:-2] + (landing_rows, index[-1])] = values
+    return out
 
-def winning_move(board, piece):
+def rotate_and_settle(board, out=None, clockwise=True):
+    """
+    Rotate the board 90 degrees clockwise and apply gravity in one step.
+    Equivalent to apply_gravity_after_rotation(rotate_board_clockwise(board)).
+    
+    Parameters:
+        board (np.array): A (rows, cols) board or a (N, rows, cols) stack of boards.
+        out (np.array): Optional (..., cols, rows) buffer for the result. For square
+            boards this may be the input board itself (in-place rotation).
+        clockwise (bool): False rotates the other way (np.rot90(board, 1)).
+    """
+    # Rotation is a view, no copy is made here; the compaction reads the view
+    return _settle(np.rot90(board, -1 if clockwise else 1, axes=(-2, -1)), out)
+
+def rotate_board(board, config=DEFAULT_CONFIG):
+    """
+    The rotation step of a variant: rotate in the config's direction, then
+    apply gravity unless the variant leaves pieces where the rotation put them.
+    """
+    if config.gravity_after_rotation:
+        return rotate_and_settle(board, clockwise=config.clockwise)
+    return np.rot90(board, -1 if config.clockwise else 1, axes=(-2, -1)).copy()
+
+def winning_move(board, piece, length=WIN_LENGTH):
     """Check if the given piece has a winning configuration."""
-    # Get current dimensions of the board
+    # 5-in-a-row detection via shifts on the player's bitboard mask
+    return Bitboard.from_array(board).has_five(piece, length)
+
+def winning_move_at(board, row, col, piece, length=WIN_LENGTH):
+    """
+    Check if the piece just placed at (row, col) completes a winning line.
+    Only the four lines through that cell are examined, so this is the check
+    to use after a drop. Use get_winners after a rotation instead.
+    """
     rows, cols = board.shape
     
-    # Check if board is big enough for a win (need at least 5 in either dimension)
-    if rows < 5 and cols < 5:
-        return False
+    for dr, dc in LINE_DIRECTIONS:
+        count = 1
+        # Walk away from the placed piece in both directions along the line
+        for sign in (1, -1):
+            r, c = row + sign * dr, col + sign * dc
+            while 0 <= r < rows and 0 <= c < cols and board[r, c] == piece:
+                count += 1
+                r += sign * dr
+                c += sign * dc
+        if count >= length:
+            return True
     
-    try:
-        # Horizontal
-        for r in range(rows):
-            for c in range(cols - 4):
-                if all(board[r, c + i] == piece for i in range(5)):
-                    return True
-
-        # Vertical
-        for c in range(cols):
-            for r in range(rows - 4):
-                if all(board[r + i, c] == piece for i in range(5)):
-                    return True
-
-        # Diagonal (positive slope)
-        for c in range(cols - 4):
-            for r in range(rows - 4):
-                if all(board[r + i, c + i] == piece for i in range(5)):
-                    return True
-
-        # Diagonal (negative slope)
-        for c in range(cols - 4):
-            for r in range(4, rows):
-                if all(board[r - i, c + i] == piece for i in range(5)):
-                    return True
-    except IndexError:
-        # If we get an index error, return False (no win)
-        return False
-
     return False
 
-def board_to_string(board, rotation_state=0):
+def five_in_a_row(mask, length=WIN_LENGTH):
     """
-    Convert the board to a string representation that's intuitive regardless of rotation.
-    Always shows the board with gravity pulling down, with pieces shown as they appear visually.
+    Vectorized whole-board line check.
+    Takes a boolean mask of shape (..., rows, cols) and returns a boolean array
+    of shape (...) telling which boards contain `length` set cells in a row.
     """
-    symbols = {0: '.', 1: 'X', 2: 'O'}
-    rows = []
+    rows, cols = mask.shape[-2:]
+    span = length - 1
+    found = np.zeros(mask.shape[:-2], dtype=bool)
     
-    # Get current dimensions of the board
-    current_rows, current_cols = board.shape
+    for dr, dc in LINE_DIRECTIONS:
+        # Number of window start positions along each axis
+        height = rows - span * abs(dr)
+        width = cols - span * dc
+        if height <= 0 or width <= 0:
+            continue
+        
+        # AND together the shifted views of every cell of the window
+        start_row = span if dr < 0 else 0
+        windows = np.ones(mask.shape[:-2] + (height, width), dtype=bool)
+        for i in range(length):
+            r = start_row + i * dr
+            c = i * dc
+            windows &= mask[..., r:r + height, c:c + width]
+        found |= windows.any(axis=(-2, -1))
     
-    # Direction labels
-    rotation_labels = [
+    return found
+
+def get_winners(board, length=WIN_LENGTH):
+    """
+    Get the set of players that have a winning line anywhere on the board.
+    A rotation can complete lines for both players at once, so this may
+    return {1, 2}.
+    """
+    found = five_in_a_row(np.stack([board == 1, board == 2]), length)
+    return {piece for piece, won in zip((1, 2), found) if won}
+
+def drop_and_check(board, col, piece, rotation_state=0, config=DEFAULT_CONFIG):
+    """
+    Play one drop with the game rules: place the piece (board is modified in
+    place) and check whether the game ended.
+    Returns (row, result) where result is None if the game goes on, {piece}
+    for a win and an empty set for a draw.
+    """
+    row = get_next_open_row(board, col, rotation_state)
+    drop_piece(board, row, col, piece)
+    
+    if winning_move_at(board, row, col, piece, config.win_length):
+        return row, {piece}
+    if is_board_full(board, rotation_state):
+        return row, set()
+    return row, None
+
+def rotate_if_due(board, turn, rotation_state=0, config=DEFAULT_CONFIG):
+    """
+    Apply the rotation rule after `turn` moves have been played: every
+    config.rotation_interval moves the board rotates (clockwise and with
+    gravity by default).
+    Returns (board, rotation_state, winners) where winners is the set of
+    players with a line after the rotation (possibly both), or None if the
+    board did not rotate.
+    """
+    if not config.rotation_due(turn):
+        return board, rotation_state, None
+    
+    board = rotate_board(board, config)
+    return board, rotation_state + 1, get_winners(board, config.win_length)
+
+# Display bytes of the pieces 0, 1, 2 for board_to_string
+_SYMBOL_BYTES = np.frombuffer(b'.XO', dtype=np.uint8)
+
+
+@functools.lru_cache(maxsize=None)
+def _rotation_labels(clockwise):
+    turn = "clockwise" if clockwise else "counterclockwise"
+    return (
         "Original orientation",
-        "Rotated 90° clockwise",
+        f"Rotated 90° {turn}",
         "Rotated 180°",
-        "Rotated 270° clockwise"
-    ]
-    direction = f"{rotation_labels[rotation_state % 4]} (gravity pulls down)"
-    rows.append(direction)
-    
-    # Always display the board in a natural top-down view (like the visual representation)
+        f"Rotated 270° {turn}",
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _column_numbers(cols):
+    return ' '.join(str(i) for i in range(1, cols + 1))
+
+
+def rotation_label(rotation_state=0, config=DEFAULT_CONFIG):
+    """Caption of a rotation state, as shown above the board."""
+    # Drops always fall; only variants with gravity after rotation settle the rotated pieces
+    gravity = "gravity pulls down" if config.gravity_after_rotation else "pieces float after rotation"
+    return f"{_rotation_labels(config.clockwise)[rotation_state % 4]} ({gravity})"
+
+
+def board_to_string(board, rotation_state=0, config=DEFAULT_CONFIG):
+    """
+    Convert the board to a string representation that's intuitive regardless of rotation.
+    Always shows the board with gravity pulling down, with pieces shown as they appear visually.
+    """
+    direction = rotation_label(rotation_state, config)
+    current_rows, current_cols = board.shape
+
+    # Always display the board in a natural top-down view (like the visual representation):
+    # one byte per cell, each followed by a space, and a newline in place of the last space
     try:
-        # Show the board top-to-bottom
-        for r in range(current_rows-1, -1, -1):  # Flip board vertically for display
-            row_chars = []
-            for c in range(current_cols):
-                row_chars.append(symbols[board[r, c]])
-            rows.append(' '.join(row_chars))
-            
-        # Add column numbers at the bottom
-        valid_moves = ' '.join(str(i) for i in range(1, current_cols + 1))
-        rows.append(valid_moves)
+        grid = np.full((current_rows, 2 * current_cols), ord(' '), dtype=np.uint8)
+        grid[:, ::2] = _SYMBOL_BYTES[board[::-1]]
+        grid[:, -1] = ord('\n')
+        cells = grid.tobytes().decode('ascii')
     except IndexError as e:
-        # Provide helpful error info if there's still an index issue
-        rows.append(f"Error rendering board: {str(e)}")
-        rows.append(f"Board shape: {board.shape}, Rotation: {rotation_state % 4}")
-    
-    return '\n'.join(rows)
+        # Provide helpful error info if the board holds something other than pieces
+        return '\n'.join([direction, f"Error rendering board: {str(e)}",
+                          f"Board shape: {board.shape}, Rotation: {rotation_state % 4}"])
+
+    # Add column numbers at the bottom
+    return f"{direction}\n{cells}{_column_numbers(current_cols)}"
 
 def is_board_full(board, rotation_state=0):
     """Check if the board is full."""
-    # Get current dimensions of the board
-    current_rows, current_cols = board.shape
-    
     # Board is full if the top row is completely filled
-    return all(board[current_rows-1, c] != 0 for c in range(current_cols))
\ No newline at end of file
+    return 0 not in board[-1].tolist()
@@ -0,0 +1,78 @@
+"""
+Connect 5 with Rotation - Game Configuration Module
+Contains GameConfig, the board geometry and rotation rules of a variant,
+and the named variants selectable from the command line
+"""
+from collections import namedtuple
+
+from bitboard import WIN_LENGTH
+
+# Rotation directions: CLOCKWISE is board.rotate_board_clockwise, np.rot90(board, -1)
+# on the row-0-at-the-bottom boards, and COUNTERCLOCKWISE its reverse, np.rot90(board, 1)
+CLOCKWISE = 'cw'
+COUNTERCLOCKWISE = 'ccw'
+
+
+class GameConfig(namedtuple('GameConfig', [
+    'rows', 'cols', 'win_length', 'rotation_interval', 'rotation_direction', 'gravity_after_rotation',
+], defaults=(8, 9, WIN_LENGTH, 6, CLOCKWISE, True))):
+    """
+    Rules of one game variant: the board is rows x cols before any rotation,
+    `win_length` pieces in a row win, and after every rotation_interval-th
+    move (0 = never) the board rotates 90 degrees in `rotation_direction`.
+    With gravity_after_rotation the pieces then fall to the bottom of their
+    new columns; without it they keep their rotated cells and later drops
+    land on top of the highest piece of a column.
+
+    Configs are immutable and hashable, so the tables built for a variant
+    (win lines, Zobrist keys, rotation maps) are memoized per config.
+    """
+    __slots__ = ()
+
+    def __new__(cls, *args, **kwargs):
+        config = super().__new__(cls, *args, **kwargs)
+        if config.rows < 1 or config.cols < 1:
+            raise ValueError(f"Board must have at least one row and column, got {config.rows}x{config.cols}")
+        if not 1 <= config.win_length <= max(config.rows, config.cols):
+            raise ValueError(f"win_length {config.win_length} does not fit a {config.rows}x{config.cols} board")
+        if config.rotation_interval < 0:
+            raise ValueError(f"rotation_interval must be >= 0, got {config.rotation_interval}")
+        if config.rotation_direction not in (CLOCKWISE, COUNTERCLOCKWISE):
+            raise ValueError(f"rotation_direction must be {CLOCKWISE!r} or {COUNTERCLOCKWISE!r}, "
+                             f"got {config.rotation_direction!r}")
+        return config
+
+    @property
+    def clockwise(self):
+        return self.rotation_direction == CLOCKWISE
+
+    def rotation_due(self, turn):
+        """Check if the board rotates once `turn` moves have been played."""
+        return self.rotation_interval > 0 and turn % self.rotation_interval == 0
+
+    def shape(self, rotation_state=0):
+        """(rows, cols) of the board after `rotation_state` rotations."""
+        return (self.cols, self.rows) if rotation_state % 2 else (self.rows, self.cols)
+
+
+DEFAULT_CONFIG = GameConfig()
+
+# Named variants for the command line
+VARIANTS = {
+    'default': DEFAULT_CONFIG,
+    # The 10x10 game of main.cpp: it rotates when move_number % 6 == 5 (0-based),
+    # i.e. after the 6th, 12th, ... move, like rotation_interval=6 here. Its boards
+    # are stored top row first, so its rotate_board() is np.rot90(board, 1) here
+    'main-cpp': GameConfig(rows=10, cols=10, rotation_direction=COUNTERCLOCKWISE),
+    'ccw': GameConfig(rotation_direction=COUNTERCLOCKWISE),
+    'floating': GameConfig(gravity_after_rotation=False),
+    'no-rotation': GameConfig(rotation_interval=0),
+}
+
+
+def get_config(name):
+    """The GameConfig of a named variant."""
+    try:
+        return VARIANTS[name]
+    except KeyError:
+        raise ValueError(f"Unknown variant {name!r}, expected one of {sorted(VARIANTS)}") from None
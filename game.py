@@ -2,142 +2,245 @@
 Connect 5 with Rotation - Main Game Module
 Contains the main game loop for the GPT vs Claude match
 """
-import random
+import argparse
+import sys
 import time
 
-from ai_players import get_move_from_gpt, get_move_from_claude, get_random_valid_move, game_history
-from board import (
-    create_board, drop_piece, get_next_open_row, is_valid_location, 
-    winning_move, board_to_string, rotate_board_clockwise, 
-    apply_gravity_after_rotation, is_board_full, ROTATION_INTERVAL
+from ai_players import (
+    CLAUDE_MODEL, GPT_MODEL, get_move_from_gpt, get_move_from_claude, get_random_valid_move, get_transport,
+    set_transport
 )
+from board import board_to_string
+from config import DEFAULT_CONFIG, VARIANTS, get_config
+from game_records import GameRecordWriter
+from game_state import GameState
+from llm_cache import CACHE_PATH
+from llm_record import log_context, ORIGINAL, ZERO
+from metrics import metrics
+from players import get_player
+from prompts import PromptBuilder, FULL, COMPACT
+from speculation import Speculator, cache_ranking, heuristic_ranking
 from visualization import draw_board
 
-def play_gpt_vs_claude():
+def play_gpt_vs_claude(delay=1.0, encodings=None, speculate=0, speculation_budget=None, config=DEFAULT_CONFIG,
+                       games_log=None, cache=None):
     """
     Main game loop for GPT vs Claude Connect 5 with rotation.
+    The game follows the rules of `config` (config.VARIANTS has named ones).
+    `delay` is the pause in seconds before and after each move.
+    `encodings` picks the prompt encoding per provider, e.g. {'gpt': 'compact'}.
+    With `speculate` > 0 the opponent's replies to that many likely moves are
+    requested while a side is thinking, spending at most `speculation_budget`
+    extra prompt tokens (no cap if None). The side's likely moves are ranked
+    by a one-ply heuristic, or first by the moves cached for the position.
+    The finished game is appended to the game record file `games_log`, if given.
+    With a `cache` path both models are asked through the LLM move cache
+    stored there (see llm_cache.py), so positions seen before are not re-sent.
+    Returns the speculation stats, or None without speculation.
     """
-    # Initialize game state
-    board = create_board()
-    game_over = False
-    turn = 0
-    rotation_state = 0
+    # Set up both providers before the first move so a missing key stops the game early
+    try:
+        get_transport().setup('gpt')
+        get_transport().setup('claude')
+    except RuntimeError as e:
+        sys.exit(str(e))
     
-    # Reset game history at the start of a new game
-    global game_history
-    game_history.clear()
+    # Initialize game state; the move history lives in the state and the prompt builder
+    state = GameState(config)
+    prompts = PromptBuilder(encodings, count=True, config=config)
+    if cache:
+        movers = {1: get_player('gpt-cached', path=cache, config=config),
+                  2: get_player('claude-cached', path=cache, config=config)}
+    else:
+        movers = {1: get_move_from_gpt, 2: get_move_from_claude}
+    speculator = None
+    if speculate:
+        # With the cache, a side's likely moves are the ones stored for the position
+        rank = cache_ranking(movers) if cache else heuristic_ranking
+        speculator = Speculator(speculate, speculation_budget, rank, config=config)
+        set_transport(speculator)
     
     # Welcome message
-    print("\n🎮 Welcome to Connect 5 with Rotation: GPT-4 vs Claude!")
+    interval = config.rotation_interval
+    print(f"\n🎮 Welcome to Connect {config.win_length}{' with Rotation' if interval else ''}: GPT-4 vs Claude!")
     print("Player 1: X (GPT-4)")
     print("Player 2: O (Claude)")
-    print(f"Board will rotate 90° clockwise every {ROTATION_INTERVAL} moves (3 turns each player)")
-    print("After rotation, gravity always pulls pieces downward")
+    if interval:
+        direction = "clockwise" if config.clockwise else "counterclockwise"
+        turns = f" ({interval // 2} turns each player)" if interval % 2 == 0 else ""
+        print(f"Board will rotate 90° {direction} every {interval} moves{turns}")
+        if config.gravity_after_rotation:
+            print("After rotation, gravity always pulls pieces downward")
+        else:
+            print("After rotation, pieces stay where the rotation puts them")
+    else:
+        print("The board does not rotate in this variant")
     print("\nInitial board state:")
-    print(board_to_string(board, rotation_state))
-    draw_board(board, rotation_state)
+    board = state.to_array()
+    print(board_to_string(board, state.rotation_state, config))
+    draw_board(board, state.rotation_state, config)
 
     # Main game loop
+    try:
+        _play_moves(state, prompts, speculator, delay, movers)
+    finally:
+        if speculator is not None:
+            speculator.close()
+            set_transport(speculator.inner)
+    
+    if games_log:
+        with GameRecordWriter(games_log, config) as writer:
+            writer.append_state(state, ('gpt', 'claude'))
+    
+    if cache:
+        stats = movers[1].cache.stats()
+        print(f"\n💾 Move cache: {stats['memory_hits'] + stats['disk_hits']} hits, {stats['misses']} misses "
+              f"({stats['hit_rate']:.0%} hit rate)")
+    
+    if speculator is not None:
+        stats = speculator.stats()
+        print(f"\n⚡ Speculation: {stats['hits']} of {stats['hits'] + stats['misses']} requests prefetched, "
+              f"{stats['saved_seconds']:.1f}s saved, {stats['wasted_tokens']} prompt tokens wasted")
+        return stats
+
+def _play_moves(state, prompts, speculator, delay, movers):
+    """Play moves until the game is over; movers maps each player to its move function."""
+    config = state.config
+    interval = config.rotation_interval
+    game_over = False
     while not game_over:
-        # Rate limiting: 1 second pause between moves
-        time.sleep(1)
+        # Rate limiting: pause between moves
+        time.sleep(delay)
+        
+        board = state.to_array()
+        turn = state.turn
+        rotation_state = state.rotation_state
         
         # Determine current player
-        current_player = 1 if turn % 2 == 0 else 2
+        current_player = state.current_player
         ai_name = "GPT-4" if current_player == 1 else "Claude"
+        model = GPT_MODEL if current_player == 1 else CLAUDE_MODEL
         print(f"\n🎯 Player {current_player} ({ai_name})'s turn... (Turn {turn+1}, Rotation: {rotation_state % 4})")
         
         # Check if we're approaching a rotation point
-        moves_until_rotation = ROTATION_INTERVAL - ((turn + 1) % ROTATION_INTERVAL)
+        moves_until_rotation = interval - ((turn + 1) % interval) if interval else 0
         if moves_until_rotation == 1:
             print("⚠️ Board will rotate after 1 more move!")
-        elif moves_until_rotation <= 3:
+        elif 1 < moves_until_rotation <= 3:
             print(f"ℹ️ Board will rotate after {moves_until_rotation} more moves.")
         
+        if speculator is not None:
+            with metrics.timer('prefetch'):
+                speculator.prefetch(board, current_player, turn+1, rotation_state, prompts)
+        
         # Get a move from the AI (will fall back to random valid move if AI fails)
-        if current_player == 1:
-            col = get_move_from_gpt(board, current_player, turn+1, rotation_state)
+        with metrics.timer('move', model=model):
+            col = movers[current_player](board, current_player, turn+1, rotation_state, prompt=prompts)
+        # A move answered from the cache builds no prompt
+        if prompts.tokens and prompts.tokens[-1][0] == turn+1:
+            print(f"📝 Prompt size: {prompts.tokens[-1][2]} tokens")
         else:
-            col = get_move_from_claude(board, current_player, turn+1, rotation_state)
+            print("📝 Move served from the cache")
         
         # If we somehow got an invalid move (shouldn't happen with fallback to random), try again
-        if col is None or not is_valid_location(board, col, rotation_state):
+        if col is None or not state.can_play(col):
             print(f"❌ Invalid move from {ai_name}. Using random valid move...")
+            metrics.count('fallbacks', model=model, reason='game_loop')
             col = get_random_valid_move(board, rotation_state)
             if col is None:  # If still no valid moves, the board might be full
                 print("No valid moves available. Game is a draw.")
                 game_over = True
                 continue
         
-        # Find the row based on current gravity direction
-        row = get_next_open_row(board, col, rotation_state)
-        drop_piece(board, row, col, current_player)
-        
-        # Record the move in game history
-        game_history.append({
-            "turn": turn + 1,
-            "player": current_player,
-            "column": col + 1,  # Store 1-indexed for display
-            "rotation": rotation_state % 4
-        })
+        # Drop the piece (gravity pulls down) and check for a win or a draw
+        with metrics.timer('drop'):
+            row, result = state.drop(col)
+            board = state.to_array()
+        prompts.add_move(current_player, col + 1)  # 1-indexed, as shown to the models
         
         print(f"✅ {ai_name} drops piece at position {col+1}")
         print("\nCurrent board state:")
-        print(board_to_string(board, rotation_state))
-        draw_board(board, rotation_state)
+        with metrics.timer('board_text'):
+            text = board_to_string(board, rotation_state, config)
+        print(text)
+        with metrics.timer('draw'):
+            draw_board(board, rotation_state, config)
         
         # Check if the game is over
-        if winning_move(board, current_player):
+        if result:
             print(f"\n🎉 {ai_name} (Player {current_player}) wins! 🎉")
             game_over = True
         # Check for a draw
-        elif is_board_full(board, rotation_state):
+        elif result is not None:
             print("\n🤝 The game is a draw!")
             game_over = True
         
-        turn += 1
-        
-        # Rotate the board every ROTATION_INTERVAL moves
-        if turn % ROTATION_INTERVAL == 0 and not game_over:
-            print("\n🔄 Rotating board 90 degrees clockwise...")
-            print("All pieces will fall downward due to gravity after rotation.")
+        # Rotate the board every config.rotation_interval moves
+        if config.rotation_due(state.turn) and not game_over:
+            print(f"\n🔄 Rotating board 90 degrees {'clockwise' if config.clockwise else 'counterclockwise'}...")
+            if config.gravity_after_rotation:
+                print("All pieces will fall downward due to gravity after rotation.")
+            else:
+                print("Pieces keep their rotated positions; new pieces land on top of them.")
             try:
-                # Store the current dimensions
-                current_rows, current_cols = board.shape
-                
-                # First, rotate the board
-                rotated_board = rotate_board_clockwise(board)
-                
-                # Make sure we're working with the expected dimensions after rotation
-                if rotated_board.shape != (current_cols, current_rows):
-                    print(f"❌ Warning: Expected dimensions after rotation to be {(current_cols, current_rows)}, got {rotated_board.shape}")
-                    print("Creating a correctly shaped board...")
-                    # Create a correctly shaped board manually
-                    correct_board = np.zeros((current_cols, current_rows), dtype=int)
-                    for r in range(min(current_rows, rotated_board.shape[0])):
-                        for c in range(min(current_cols, rotated_board.shape[1])):
-                            try:
-                                correct_board[c, r] = rotated_board[c, r]
-                            except IndexError:
-                                pass
-                    rotated_board = correct_board
-                
-                # Then apply gravity to make pieces fall according to new direction
-                board = apply_gravity_after_rotation(rotated_board, rotation_state + 1)
-                
-                # Update rotation state
-                rotation_state += 1
+                # Rotate and let pieces fall according to the new direction in one step
+                with metrics.timer('rotation'):
+                    winners = state.rotate_if_due()
+                    board, rotation_state = state.to_array(), state.rotation_state
                 
                 # Show the board after rotation
                 print("\nBoard after rotation:")
-                print(board_to_string(board, rotation_state))
-                draw_board(board, rotation_state)
+                print(board_to_string(board, rotation_state, config))
+                draw_board(board, rotation_state, config)
+                
+                # Rotation and gravity reshuffle the whole board, so every line was rescanned
+                if len(winners) == 2:
+                    print("\n🤝 The rotation completed a line for both players - the game is a draw!")
+                    game_over = True
+                elif winners:
+                    winner = next(iter(winners))
+                    winner_name = "GPT-4" if winner == 1 else "Claude"
+                    print(f"\n🎉 {winner_name} (Player {winner}) wins after the rotation! 🎉")
+                    game_over = True
+                elif state.is_over:
+                    # Without gravity the rotated pieces can fill every column
+                    print("\n🤝 The rotation filled the board - the game is a draw!")
+                    game_over = True
             except Exception as e:
                 print(f"❌ Error during rotation: {str(e)}")
                 print("Continuing without rotation...")
             
         # Add a short delay after each full turn for better visualization
-        time.sleep(1)
+        time.sleep(delay)
 
 if __name__ == '__main__':
-    play_gpt_vs_claude()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Play GPT vs Claude Connect 5 with rotation")
+    parser.add_argument('--delay', type=float, default=1.0, help="pause in seconds around each move")
+    parser.add_argument('--record', metavar='LOG', help="append every LLM request and response to LOG")
+    parser.add_argument('--replay', metavar='LOG', help="serve LLM responses from LOG instead of the APIs")
+    parser.add_argument('--zero-latency', action='store_true', help="replay without the recorded latencies")
+    parser.add_argument('--seed', type=int, default=None, help="random seed when recording")
+    parser.add_argument('--gpt-prompt', choices=[FULL, COMPACT], default=FULL, help="prompt encoding for GPT")
+    parser.add_argument('--claude-prompt', choices=[FULL, COMPACT], default=FULL, help="prompt encoding for Claude")
+    parser.add_argument('--speculate', type=int, default=0, metavar='K',
+                        help="prefetch the opponent's replies to the K likeliest moves")
+    parser.add_argument('--speculation-budget', type=int, default=None, metavar='TOKENS',
+                        help="cap on extra prompt tokens spent on speculation")
+    parser.add_argument('--variant', choices=sorted(VARIANTS), default='default',
+                        help="board size and rotation rules (see config.VARIANTS)")
+    parser.add_argument('--save-game', metavar='LOG', help="append the game to LOG (see game_records.py)")
+    parser.add_argument('--cache', nargs='?', const=CACHE_PATH, metavar='PATH',
+                        help=f"ask the models through the LLM move cache at PATH (default {CACHE_PATH})")
+    parser.add_argument('--metrics', nargs='+', metavar='PATH',
+                        help="time every phase and write the metrics to each PATH (.prom: Prometheus text, else JSON)")
+    args = parser.parse_args()
+    
+    metrics.enabled = bool(args.metrics)
+    try:
+        with log_context(args.record, args.replay, ZERO if args.zero_latency else ORIGINAL, args.seed):
+            play_gpt_vs_claude(args.delay, {'gpt': args.gpt_prompt, 'claude': args.claude_prompt},
+                               args.speculate, args.speculation_budget, get_config(args.variant), args.save_game,
+                               args.cache)
+    finally:
+        for path in args.metrics or ():
+            metrics.write(path)
\ No newline at end of file
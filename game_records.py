@@ -0,0 +1,293 @@
+"""
+Connect 5 with Rotation - Game Records Module
+Contains a compact binary game log: fixed-size records of int8 move columns
+with length, winner and rotation headers, a streaming appender, a lazy and
+memory-mapped reader and positional replay
+"""
+import argparse
+import json
+import os
+import threading
+from collections import Counter, namedtuple
+
+import numpy as np
+
+from batch_engine import BatchGame
+from config import DEFAULT_CONFIG, GameConfig
+from game_state import GameState
+
+# File layout: a HEADER_SIZE block holding MAGIC, the JSON header length as a
+# little-endian uint32 and the JSON header (config and player names), zero
+# padded; then one record_dtype(config) record per game. The game count is
+# the file size, so the file is only ever appended to (the header is
+# rewritten in place when new player names appear)
+MAGIC = b'C5GAME01'
+HEADER_SIZE = 4096
+
+# Winner codes: 1 and 2 are the players
+DRAW = 0         # also a rotation completing a line for both players
+UNFINISHED = -1  # the game stopped before a result
+
+# Player index of games whose players were not given
+NO_PLAYER = 255
+
+# One recorded game: 0-indexed columns, winner code, rotations played and (first, second) player names
+Game = namedtuple('Game', ['moves', 'winner', 'rotations', 'players'])
+
+
+def record_dtype(config=DEFAULT_CONFIG):
+    """
+    Structured dtype of one game record. A game has at most one move per
+    cell, so `moves` holds rows * cols int8 columns, padded with -1.
+    """
+    return np.dtype([
+        ('moves', 'i1', (config.rows * config.cols,)),
+        ('length', '<u2'),
+        ('winner', 'i1'),
+        ('rotations', '<u2'),
+        ('players', 'u1', (2,)),
+    ])
+
+
+def winner_code(result):
+    """Winner code of a GameState result."""
+    if result is None:
+        return UNFINISHED
+    return next(iter(result)) if len(result) == 1 else DRAW
+
+
+def _read_header(f):
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError(f"{f.name} is not a game record file")
+    length = int.from_bytes(f.read(4), 'little')
+    return json.loads(f.read(length))
+
+
+def _encode_header(header):
+    data = json.dumps(header).encode()
+    block = MAGIC + len(data).to_bytes(4, 'little') + data
+    if len(block) > HEADER_SIZE:
+        raise ValueError("Game record header is full (too many player names)")
+    return block + bytes(HEADER_SIZE - len(block))
+
+
+def replay(moves, config=DEFAULT_CONFIG, ply=None):
+    """GameState after the first `ply` moves (all by default) of a list of 0-indexed columns."""
+    state = GameState(config)
+    for col in moves[:ply]:
+        state.make(col)
+    return state
+
+
+class GameRecordWriter:
+    """
+    Streaming appender for a game record file. Games are buffered and
+    written `buffer_games` at a time (and on flush/close), so appending is
+    cheap enough for the game loop and tournament runners. An existing file
+    must hold games of the same config; a record cut short by a crash is
+    dropped when the file is reopened. Safe to share between threads.
+    """
+
+    def __init__(self, path, config=DEFAULT_CONFIG, buffer_games=1024):
+        self.path = path
+        self.config = config
+        self.dtype = record_dtype(config)
+        self._lock = threading.Lock()
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            self._file = open(path, 'r+b')
+            header = _read_header(self._file)
+            if GameConfig(*header['config']) != config:
+                raise ValueError(f"{path} holds games of {GameConfig(*header['config'])}, not {config}")
+            self.players = header['players']
+            games = (os.path.getsize(path) - HEADER_SIZE) // self.dtype.itemsize
+            self._file.truncate(HEADER_SIZE + games * self.dtype.itemsize)
+        else:
+            self._file = open(path, 'w+b')
+            self.players = []
+            self._file.write(_encode_header(self._header()))
+        self._file.seek(0, os.SEEK_END)
+
+        self._buffer = np.zeros(buffer_games, self.dtype)
+        self._pending = 0
+        self._header_dirty = False
+
+    def _header(self):
+        return {'version': 1, 'config': list(self.config), 'players': self.players}
+
+    def _player_index(self, name):
+        if name is None:
+            return NO_PLAYER
+        if name not in self.players:
+            if len(self.players) == NO_PLAYER:
+                raise ValueError("A game record file holds at most 255 player names")
+            self.players.append(name)
+            self._header_dirty = True
+        return self.players.index(name)
+
+    def append(self, moves, winner, players=None, rotations=None):
+        """
+        Append one game: 0-indexed columns, winner code (1, 2, DRAW or
+        UNFINISHED), optional (first, second) player names and the number of
+        rotations played (replayed from the moves if not given).
+        """
+        if rotations is None:
+            rotations = replay(moves, self.config).rotation_state
+        first, second = players or (None, None)
+        with self._lock:
+            record = self._buffer[self._pending]
+            record['moves'] = -1
+            record['moves'][:len(moves)] = moves
+            record['length'] = len(moves)
+            record['winner'] = winner
+            record['rotations'] = rotations
+            record['players'] = (self._player_index(first), self._player_index(second))
+            self._pending += 1
+            if self._pending == len(self._buffer):
+                self._flush()
+
+    def append_state(self, state, players=None):
+        """Append the game played in a GameState (its move stack must be complete)."""
+        self.append([move[0] for move in state.moves], winner_code(state.result), players, state.rotation_state)
+
+    def _flush(self):
+        # The header goes first: records naming new players must never reach
+        # the file before the names do, or a crash in between corrupts it
+        if self._header_dirty:
+            self._file.seek(0)
+            self._file.write(_encode_header(self._header()))
+            self._file.flush()
+            self._file.seek(0, os.SEEK_END)
+            self._header_dirty = False
+        if self._pending:
+            self._file.write(self._buffer[:self._pending].tobytes())
+            self._pending = 0
+        self._file.flush()
+
+    def flush(self):
+        """Write the buffered games."""
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class GameRecords:
+    """
+    Read-only view of a game record file. `records` is the memory-mapped
+    structured array of all games (record_dtype fields), so columns such as
+    records['winner'] or records['length'] are read without decoding any
+    game; indexing and iteration decode Game tuples lazily.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            header = _read_header(f)
+        self.path = path
+        self.config = GameConfig(*header['config'])
+        self.players = header['players']
+        self.dtype = record_dtype(self.config)
+        games = (os.path.getsize(path) - HEADER_SIZE) // self.dtype.itemsize
+        if games:
+            self.records = np.memmap(path, self.dtype, 'r', HEADER_SIZE, (games,))
+        else:
+            # np.memmap cannot map an empty range
+            self.records = np.zeros(0, self.dtype)
+
+    def __len__(self):
+        return len(self.records)
+
+    def _name(self, index):
+        return None if index == NO_PLAYER else self.players[index]
+
+    def _game(self, record):
+        return Game(
+            record['moves'][:record['length']].tolist(),
+            int(record['winner']),
+            int(record['rotations']),
+            (self._name(record['players'][0]), self._name(record['players'][1])),
+        )
+
+    def __getitem__(self, index):
+        return self._game(self.records[index])
+
+    def __iter__(self):
+        return self.iter_games()
+
+    def iter_games(self, chunk=4096):
+        """Yield every Game, copying `chunk` records at a time out of the map."""
+        for start in range(0, len(self.records), chunk):
+            for record in np.array(self.records[start:start + chunk]):
+                yield self._game(record)
+
+    def state_at(self, index, ply):
+        """GameState of game `index` after its first `ply` moves."""
+        record = self.records[index]
+        return replay(record['moves'][:min(ply, record['length'])].tolist(), self.config)
+
+    def board_at(self, index, ply):
+        """NumPy board of game `index` after its first `ply` moves."""
+        return self.state_at(index, ply).to_array()
+
+    def replay_batch(self, ply, indices=None):
+        """
+        BatchGame holding the selected games (all by default) after their
+        first `ply` moves, replayed in lockstep; shorter games stop at their
+        end. Use get_board(i) for the board of the i-th selected game.
+        """
+        records = self.records if indices is None else self.records[indices]
+        moves = np.asarray(records['moves'][:, :ply], dtype=np.intp)
+        lengths = np.asarray(records['length'])
+        batch = BatchGame(len(records), self.config)
+        for t in range(min(ply, int(lengths.max(initial=0)))):
+            batch.done[lengths <= t] = True
+            if batch.done.all():
+                break
+            batch.step(moves[:, t])
+        return batch
+
+
+def summarize(records):
+    """Counts of a game record file: games, results, mean length, rotations and players."""
+    data = records.records
+    winners = Counter(np.asarray(data['winner']).tolist())
+    return {
+        'games': len(data),
+        'p1_wins': winners.get(1, 0),
+        'p2_wins': winners.get(2, 0),
+        'draws': winners.get(DRAW, 0),
+        'unfinished': winners.get(UNFINISHED, 0),
+        'mean_length': float(np.mean(data['length'])) if len(data) else 0.0,
+        'mean_rotations': float(np.mean(data['rotations'])) if len(data) else 0.0,
+        'players': records.players,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('path')
+    parser.add_argument('--show', type=int, metavar='INDEX', help="print the board of one game")
+    parser.add_argument('--ply', type=int, default=None, help="with --show, the board after this many moves")
+    args = parser.parse_args()
+
+    records = GameRecords(args.path)
+    if args.show is None:
+        for name, value in summarize(records).items():
+            print(f"{name:>15}: {value}")
+    else:
+        from board import board_to_string
+        game = records[args.show]
+        ply = len(game.moves) if args.ply is None else args.ply
+        state = records.state_at(args.show, ply)
+        print(f"Game {args.show}: {game.players[0]} vs {game.players[1]}, winner {game.winner}, "
+              f"{len(game.moves)} moves, {game.rotations} rotations; after move {min(ply, len(game.moves))}:")
+        print(board_to_string(state.to_array(), state.rotation_state, records.config))
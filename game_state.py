@@ -0,0 +1,146 @@
+"""
+Connect 5 with Rotation - Game State Module
+Contains the GameState object: bitboard, column heights, turn counters and a
+move stack with O(1) make/unmake, including the rotation + gravity step
+"""
+from bitboard import Bitboard
+from config import DEFAULT_CONFIG
+
+
+class GameState:
+    """
+    Complete state of one game. The board is a Bitboard, so column heights
+    are maintained on every drop instead of rescanned. Every move is pushed
+    on a stack; a move that triggers the rotation also stores the masks and
+    heights from before the rotation, so unmake() restores them directly
+    instead of un-rotating.
+
+    `result` follows drop_and_check: None while the game goes on, a set with
+    the winner(s) when it is over, an empty set for a draw. The rules
+    (geometry, win length, rotation) come from `config`.
+    """
+    __slots__ = ('bitboard', 'config', 'turn', 'rotation_state', 'result', 'moves')
+
+    def __init__(self, config=DEFAULT_CONFIG):
+        self.bitboard = Bitboard(config.rows, config.cols)
+        self.config = config
+        self.turn = 0
+        self.rotation_state = 0
+        self.result = None
+        # (col, player, rotation_state, result before, pre-rotation snapshot or None)
+        self.moves = []
+
+    @classmethod
+    def from_board(cls, board, turn=0, rotation_state=0, config=DEFAULT_CONFIG):
+        """State for a NumPy board reached after `turn` moves; it has no move stack."""
+        state = cls(config)
+        state.bitboard = Bitboard.from_array(board)
+        state.turn = turn
+        state.rotation_state = rotation_state
+        return state
+
+    def copy(self):
+        """Independent copy, including the move stack."""
+        state = GameState.__new__(GameState)
+        state.bitboard = self.bitboard.copy()
+        state.config = self.config
+        state.turn = self.turn
+        state.rotation_state = self.rotation_state
+        state.result = self.result
+        state.moves = list(self.moves)
+        return state
+
+    @property
+    def shape(self):
+        return self.bitboard.rows, self.bitboard.cols
+
+    @property
+    def heights(self):
+        return self.bitboard.heights
+
+    @property
+    def current_player(self):
+        """The player to move: 1 on even turns, 2 on odd turns."""
+        return 1 if self.turn % 2 == 0 else 2
+
+    @property
+    def is_over(self):
+        return self.result is not None
+
+    def to_array(self, dtype=int):
+        """The board as a NumPy array, for the LLM players and the renderers."""
+        return self.bitboard.to_array(dtype)
+
+    def valid_moves(self):
+        """Columns that are not full (none once the game is over)."""
+        return [] if self.result is not None else self.bitboard.valid_moves()
+
+    def can_play(self, col):
+        return self.result is None and self.bitboard.can_play(col)
+
+    def drop(self, col):
+        """
+        First half of a move: drop the current player's piece and check for a
+        win or a draw. Returns (row, result) like drop_and_check. The move is
+        only complete after rotate_if_due().
+        """
+        bitboard = self.bitboard
+        player = self.current_player
+        self.moves.append((col, player, self.rotation_state, self.result, None))
+        row = bitboard.drop(col, player)
+        if bitboard.has_five(player, self.config.win_length):
+            self.result = {player}
+        elif bitboard.is_full():
+            self.result = set()
+        self.turn += 1
+        return row, self.result
+
+    def rotate_if_due(self):
+        """
+        Second half of a move: apply the rotation rule like board.rotate_if_due.
+        Returns the set of players with a line after the rotation, or None if
+        the board did not rotate. A rotation without gravity can leave every
+        column full, which is a draw.
+        """
+        config = self.config
+        if self.result is not None or not config.rotation_due(self.turn):
+            return None
+        bitboard = self.bitboard
+        col, player, rotation_state, result, _ = self.moves[-1]
+        snapshot = (bitboard.rows, bitboard.cols, list(bitboard.masks), list(bitboard.heights))
+        self.moves[-1] = (col, player, rotation_state, result, snapshot)
+
+        bitboard.rotate(config.clockwise, config.gravity_after_rotation)
+        self.rotation_state += 1
+        winners = bitboard.winners(config.win_length)
+        if winners:
+            self.result = winners
+        elif bitboard.is_full():
+            self.result = set()
+        return winners
+
+    def make(self, col):
+        """Play a full move (drop, then rotation when due) and return the result."""
+        self.drop(col)
+        self.rotate_if_due()
+        return self.result
+
+    def unmake(self):
+        """Take back the last move, including its rotation."""
+        col, player, rotation_state, result, snapshot = self.moves.pop()
+        bitboard = self.bitboard
+        if snapshot is not None:
+            rows, cols, masks, heights = snapshot
+            bitboard.rows, bitboard.cols = rows, cols
+            bitboard.masks, bitboard.heights = list(masks), list(heights)
+        bitboard.undrop(col, player)
+        self.turn -= 1
+        self.rotation_state = rotation_state
+        self.result = result
+
+    def history(self):
+        """The moves played so far as move dicts (1-indexed columns), as used by the prompts."""
+        return [
+            {"turn": turn, "player": player, "column": col + 1, "rotation": rotation_state % 4}
+            for turn, (col, player, rotation_state, _, _) in enumerate(self.moves, start=1)
+        ]
@@ -0,0 +1,283 @@
+"""
+Connect 5 with Rotation - LLM Move Cache Module
+Contains a two-tier (memory LRU + on-disk) cache of LLM moves keyed by position
+"""
+import functools
+import hashlib
+import json
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import ai_players
+from board import is_valid_location
+from config import DEFAULT_CONFIG
+from symmetry import canonical_board
+
+# Cache policies
+REUSE = 'reuse'    # call the model once per position and always replay that move
+SAMPLE = 'sample'  # collect N samples per position, then draw from their distribution
+AUTO = 'auto'      # REUSE at temperature 0, SAMPLE otherwise
+
+# Default on-disk cache, used by the cached players of the registry and game.py --cache
+CACHE_PATH = 'llm_cache.sqlite'
+
+
+def position_key(board, player, turn_number, rotation_state, model, prompt_version, config=DEFAULT_CONFIG):
+    """
+    Canonical cache key of a position: board contents and shape, side to move,
+    turn phase in the rotation cycle and rotation state, plus the model name,
+    prompt version and the rules of the variant. Returned as a hex digest.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(board.astype('int8').tobytes())
+    interval = config.rotation_interval
+    phase = (turn_number - 1) % interval if interval else 0
+    digest.update(json.dumps([board.shape, player, phase, rotation_state % 4, model, prompt_version,
+                              list(config)]).encode())
+    return digest.hexdigest()
+
+
+class MemoryTier:
+    """In-memory LRU tier with an optional TTL."""
+
+    def __init__(self, max_entries=10_000, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.evictions = 0
+
+    def get(self, key, touch=True):
+        """Get the move samples for a key, or None. With touch, the key becomes the most recently used."""
+        item = self.entries.get(key)
+        if item is None:
+            return None
+        created, moves = item
+        if self.ttl is not None and time.time() - created > self.ttl:
+            del self.entries[key]
+            return None
+        if touch:
+            self.entries.move_to_end(key)
+        return moves
+
+    def put(self, key, moves, created=None):
+        """Store the move samples for a key, evicting the least recently used."""
+        self.entries[key] = (created if created is not None else time.time(), list(moves))
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+
+class DiskTier:
+    """
+    SQLite tier that survives between runs. Entries past the TTL are ignored
+    and purged; above max_entries the least recently used rows are removed.
+    """
+
+    def __init__(self, path, max_entries=1_000_000, ttl=None):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS moves ("
+            "key TEXT PRIMARY KEY, moves TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS moves_accessed ON moves (accessed)")
+        self._db.commit()
+
+    def get(self, key, touch=True):
+        """Get (created, moves) for a key, or None. With touch, its access time is updated."""
+        with self._lock:
+            row = self._db.execute("SELECT moves, created FROM moves WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            moves, created = row
+            if self.ttl is not None and time.time() - created > self.ttl:
+                self._db.execute("DELETE FROM moves WHERE key = ?", (key,))
+                self._db.commit()
+                return None
+            if touch:
+                self._db.execute("UPDATE moves SET accessed = ? WHERE key = ?", (time.time(), key))
+                self._db.commit()
+            return created, json.loads(moves)
+
+    def put(self, key, moves, created=None):
+        """Store the move samples for a key and enforce the size limit."""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO moves (key, moves, created, accessed) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET moves = excluded.moves, accessed = excluded.accessed",
+                (key, json.dumps(list(moves)), created if created is not None else now, now),
+            )
+            count = self._db.execute("SELECT COUNT(*) FROM moves").fetchone()[0]
+            if count > self.max_entries:
+                excess = count - self.max_entries
+                self._db.execute(
+                    "DELETE FROM moves WHERE key IN (SELECT key FROM moves ORDER BY accessed LIMIT ?)", (excess,)
+                )
+                self.evictions += excess
+            self._db.commit()
+
+    def purge_expired(self):
+        """Delete every entry past the TTL; returns the number removed."""
+        if self.ttl is None:
+            return 0
+        with self._lock:
+            cursor = self._db.execute("DELETE FROM moves WHERE created < ?", (time.time() - self.ttl,))
+            self._db.commit()
+            return cursor.rowcount
+
+    def close(self):
+        """Close the database."""
+        self._db.close()
+
+
+class MoveCache:
+    """Memory tier in front of an optional disk tier, with hit-rate counters."""
+
+    def __init__(self, memory_entries=10_000, disk_path=None, disk_entries=1_000_000, ttl=None):
+        self.memory = MemoryTier(memory_entries, ttl)
+        self.disk = DiskTier(disk_path, disk_entries, ttl) if disk_path else None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def get(self, key):
+        """Get the stored move samples for a key, or None on a miss."""
+        moves = self.memory.get(key)
+        if moves is not None:
+            self.memory_hits += 1
+            return moves
+        if self.disk is not None:
+            item = self.disk.get(key)
+            if item is not None:
+                created, moves = item
+                self.disk_hits += 1
+                self.memory.put(key, moves, created)
+                return moves
+        self.misses += 1
+        return None
+
+    def peek(self, key):
+        """Get the stored move samples for a key like get(), without counting a lookup or refreshing recency."""
+        moves = self.memory.get(key, touch=False)
+        if moves is None and self.disk is not None:
+            item = self.disk.get(key, touch=False)
+            moves = item[1] if item is not None else None
+        return moves
+
+    def put(self, key, moves):
+        """Store move samples in both tiers."""
+        self.stores += 1
+        self.memory.put(key, moves)
+        if self.disk is not None:
+            self.disk.put(key, moves)
+
+    def stats(self):
+        """Hit/miss counters and hit rate."""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'stores': self.stores,
+            'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            'memory_entries': len(self.memory.entries),
+            'memory_evictions': self.memory.evictions,
+            'disk_evictions': self.disk.evictions if self.disk is not None else 0,
+        }
+
+
+@functools.lru_cache(maxsize=None)
+def open_cache(disk_path=CACHE_PATH):
+    """MoveCache with its disk tier at `disk_path` (None: memory only), opened once per process."""
+    return MoveCache(disk_path=disk_path)
+
+
+class CachedPlayer:
+    """
+    Wraps an LLM move function (get_move_from_gpt/get_move_from_claude
+    signature) with a MoveCache.
+
+    policy REUSE calls the model once per position and replays its move.
+    policy SAMPLE calls the model until `samples` moves are stored for the
+    position and then draws from those moves, which keeps the move
+    distribution of a non-zero temperature. AUTO picks REUSE at temperature 0
+    and SAMPLE otherwise. Failed calls (random fallbacks) are never cached.
+    `config` is the variant being played, which is part of the cache key
+    (bind it into move_fn as well, e.g. with functools.partial).
+
+    `symmetry` is a symmetry policy (symmetry.EXACT or ALWAYS) to share one
+    entry between a position and its mirror image, whatever the rotation
+    state; stored moves are then kept in the canonical frame and mirrored
+    back. None (the default) keys every position as it is.
+    """
+
+    def __init__(self, move_fn, model, cache, prompt_version=ai_players.PROMPT_VERSION,
+                 temperature=ai_players.TEMPERATURE, policy=AUTO, samples=5, seed=None, config=DEFAULT_CONFIG,
+                 symmetry=None):
+        self.move_fn = move_fn
+        self.config = config
+        self.symmetry = symmetry
+        self.model = model
+        self.cache = cache
+        self.prompt_version = prompt_version
+        self.policy = policy if policy != AUTO else (REUSE if temperature == 0 else SAMPLE)
+        self.samples = samples if self.policy == SAMPLE else 1
+        self.rng = random.Random(seed)
+
+    def _lookup(self, board, player, turn_number, rotation_state, peek=False):
+        """(key, symmetry form or None, stored moves still legal on `board`, in its frame)."""
+        form = None
+        if self.symmetry is None:
+            key = position_key(board, player, turn_number, rotation_state, self.model, self.prompt_version,
+                               self.config)
+        else:
+            key_board, form = canonical_board(board, turn_number - 1, self.config, self.symmetry)
+            key = position_key(key_board, player, turn_number, 0, self.model, self.prompt_version, self.config)
+        moves = (self.cache.peek(key) if peek else self.cache.get(key)) or []
+        if form is not None:
+            moves = form.map_moves(moves)
+        # Only moves that are still legal can be replayed
+        return key, form, [move for move in moves if is_valid_location(board, move, rotation_state)]
+
+    def stored_moves(self, board, player, turn_number, rotation_state=0):
+        """Moves stored for a position, mapped to the board; a peek that leaves the cache counters alone."""
+        return self._lookup(board, player, turn_number, rotation_state, peek=True)[2]
+
+    def __call__(self, board, player, turn_number, rotation_state=0, **kwargs):
+        key, form, moves = self._lookup(board, player, turn_number, rotation_state)
+        if len(moves) >= self.samples:
+            return moves[0] if self.policy == REUSE else self.rng.choice(moves)
+
+        move = self.move_fn(board, player, turn_number, rotation_state, fallback=_no_move, **kwargs)
+        if move is None:
+            return ai_players.get_random_valid_move(board, rotation_state)
+        moves = moves + [move]
+        self.cache.put(key, form.map_moves(moves) if form is not None else moves)
+        return move
+
+
+def _no_move(board, rotation_state):
+    """Fallback that reports a failed LLM call instead of picking a random move."""
+    return None
+
+
+def cached_gpt(cache, config=DEFAULT_CONFIG, **options):
+    """GPT player for the variant `config` behind a move cache."""
+    move_fn = functools.partial(ai_players.get_move_from_gpt, config=config)
+    return CachedPlayer(move_fn, ai_players.GPT_MODEL, cache, config=config, **options)
+
+
+def cached_claude(cache, config=DEFAULT_CONFIG, **options):
+    """Claude player for the variant `config` behind a move cache."""
+    move_fn = functools.partial(ai_players.get_move_from_claude, config=config)
+    return CachedPlayer(move_fn, ai_players.CLAUDE_MODEL, cache, config=config, **options)
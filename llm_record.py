@@ -0,0 +1,187 @@
+"""
+Connect 5 with Rotation - LLM Record/Replay Module
+Records every LLM request, raw response and latency to an append-only JSONL
+log and serves them back offline, so games can be benchmarked and replayed
+without network access
+"""
+import contextlib
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import defaultdict, deque
+
+import ai_players
+
+# Replay latency modes
+ORIGINAL = 'original'  # sleep for the recorded latency of each response
+ZERO = 'zero'          # answer immediately
+
+
+def request_key(provider, request):
+    """Stable hash of one request, used to match replayed responses."""
+    data = json.dumps([provider, request], sort_keys=True, separators=(',', ':'))
+    return hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+
+
+class ReplayedError(Exception):
+    """An error recorded from the live API, raised again on replay."""
+
+
+class RecordingTransport:
+    """
+    Forwards requests to another transport (the live APIs by default) and
+    appends one JSON line per request to the log: provider, request key,
+    request, response text or error message and latency in seconds. Each run
+    starts with a header line holding the random seed of the run.
+    """
+
+    def __init__(self, path, seed, inner=None):
+        self.inner = inner or ai_players.LiveTransport()
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', encoding='utf-8')
+        self._write({
+            "type": "header",
+            "seed": seed,
+            "prompt_version": ai_players.PROMPT_VERSION,
+            "created": time.time(),
+        })
+
+    def _write(self, record):
+        # One line per record, flushed at once so a crashed run keeps its log
+        with self._lock:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    def setup(self, provider):
+        self.inner.setup(provider)
+
+    def send(self, provider, request):
+        start = time.perf_counter()
+        response, error = None, None
+        try:
+            response = self.inner.send(provider, request)
+            return response
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            self.requests += 1
+            self._write({
+                "type": "request",
+                "provider": provider,
+                "key": request_key(provider, request),
+                "request": request,
+                "response": response,
+                "error": error,
+                "latency": time.perf_counter() - start,
+            })
+
+    def close(self):
+        self._file.close()
+
+
+def read_log(path, session=-1):
+    """
+    Read one run from a log: returns (header, records). Runs are numbered in
+    the order they were appended; the default is the last one.
+    """
+    sessions = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record["type"] == "header":
+                sessions.append((record, []))
+            elif sessions:
+                sessions[-1][1].append(record)
+    if not sessions:
+        raise ValueError(f"{path} has no recorded runs")
+    return sessions[session]
+
+
+class ReplayTransport:
+    """
+    Serves recorded responses instead of calling the APIs. Identical requests
+    are answered in recorded order. A request that was never recorded raises
+    ai_players.ReplayMiss, which the players do not turn into a fallback
+    move, and is counted in `misses`.
+    """
+
+    def __init__(self, path, latency=ORIGINAL, session=-1):
+        if latency not in (ORIGINAL, ZERO):
+            raise ValueError(f"latency must be {ORIGINAL!r} or {ZERO!r}, got {latency!r}")
+        self.header, records = read_log(path, session)
+        self.latency = latency
+        self.responses = defaultdict(deque)
+        for record in records:
+            self.responses[record["key"]].append(record)
+        self.requests = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def seed(self):
+        return self.header["seed"]
+
+    def setup(self, provider):
+        pass
+
+    def send(self, provider, request):
+        key = request_key(provider, request)
+        with self._lock:
+            self.requests += 1
+            queue = self.responses.get(key)
+            if not queue:
+                self.misses += 1
+                raise ai_players.ReplayMiss(f"no recorded {provider} response for request {key}")
+            record = queue.popleft()
+        if self.latency == ORIGINAL:
+            time.sleep(record["latency"])
+        if record["error"] is not None:
+            raise ReplayedError(record["error"])
+        return record["response"]
+
+
+@contextlib.contextmanager
+def recording(path, seed=None):
+    """
+    Record the LLM calls made inside the block to `path`. Seeds the global
+    random generator (used by the random fallback moves) and stores the seed,
+    so a replay makes the same fallback moves.
+    """
+    seed = random.randrange(1 << 32) if seed is None else seed
+    random.seed(seed)
+    recorder = RecordingTransport(path, seed, ai_players.get_transport())
+    previous = ai_players.set_transport(recorder)
+    try:
+        yield recorder
+    finally:
+        ai_players.set_transport(previous)
+        recorder.close()
+
+
+@contextlib.contextmanager
+def replaying(path, latency=ORIGINAL, session=-1):
+    """Serve the LLM calls made inside the block from a recorded run."""
+    replayer = ReplayTransport(path, latency, session)
+    random.seed(replayer.seed)
+    previous = ai_players.set_transport(replayer)
+    try:
+        yield replayer
+    finally:
+        ai_players.set_transport(previous)
+
+
+def log_context(record=None, replay=None, latency=ORIGINAL, seed=None):
+    """Context for command line --record/--replay options; does nothing if neither is given."""
+    if record and replay:
+        raise ValueError("Cannot record and replay at the same time")
+    if record:
+        return recording(record, seed)
+    if replay:
+        return replaying(replay, latency)
+    return contextlib.nullcontext()
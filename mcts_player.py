@@ -0,0 +1,268 @@
+"""
+Connect 5 with Rotation - MCTS Player Module
+Contains a Monte Carlo Tree Search player with root and tree parallelism
+"""
+import math
+import os
+import random
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from bitboard import Bitboard
+from config import DEFAULT_CONFIG
+
+# UCT exploration constant
+EXPLORATION = 1.4
+
+# Virtual loss added to a node while a thread is working below it
+VIRTUAL_LOSS = 1
+
+# Default budgets per move
+DEFAULT_PLAYOUTS = 2000
+DEFAULT_TIME_BUDGET = None
+
+MCTSResult = namedtuple('MCTSResult', ['move', 'visits', 'values', 'playouts', 'elapsed', 'workers'])
+
+
+class _Node:
+    """Search tree node; value_sum is from the view of the player who moved into it."""
+    __slots__ = ('move', 'parent', 'children', 'untried', 'visits', 'value_sum', 'virtual', 'result')
+
+    def __init__(self, move=None, parent=None):
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.untried = None
+        self.visits = 0
+        self.value_sum = 0.0
+        self.virtual = 0
+        self.result = None
+
+    def select_child(self, exploration):
+        """Pick the child with the best UCT score, counting virtual losses as lost visits."""
+        log_visits = math.log(self.visits + self.virtual + 1)
+        best, best_score = None, -1.0
+        for child in self.children:
+            visits = child.visits + child.virtual
+            if visits == 0:
+                return child
+            score = child.value_sum / visits + exploration * math.sqrt(log_visits / visits)
+            if score > best_score:
+                best, best_score = child, score
+        return best
+
+
+def _apply_move(bitboard, col, player, turn, config):
+    """
+    Play one move with the rules of `config`. Returns (result, turn) where result is
+    None while the game goes on, 0 for a draw or the set of winning players.
+    """
+    bitboard.drop(col, player)
+    if bitboard.has_five(player, config.win_length):
+        return {player}, turn + 1
+    if bitboard.is_full():
+        return 0, turn + 1
+    turn += 1
+    if config.rotation_due(turn):
+        bitboard.rotate(config.clockwise, config.gravity_after_rotation)
+        winners = bitboard.winners(config.win_length)
+        if winners:
+            return winners, turn
+        if bitboard.is_full():
+            return 0, turn
+    return None, turn
+
+
+def _score(result, player):
+    """Playout reward for `player`: 1 for a win, 0.5 for a draw or double win, 0 for a loss."""
+    if not result or len(result) == 2:
+        return 0.5
+    return 1.0 if player in result else 0.0
+
+
+def _rollout(bitboard, player, turn, config, rng):
+    """Play random moves until the game ends and return the result."""
+    while True:
+        moves = bitboard.valid_moves()
+        if not moves:
+            return 0
+        result, turn = _apply_move(bitboard, rng.choice(moves), player, turn, config)
+        if result is not None:
+            return result
+        player = 3 - player
+
+
+def _run_tree(root_board, player, turn, playouts, deadline, threads, seed, exploration, config):
+    """
+    Grow one search tree. With threads > 1 the tree is shared between
+    threads (tree parallelism) and virtual loss keeps them on different paths.
+    Returns ({move: visits}, {move: value_sum}, playouts done).
+    """
+    root = _Node()
+    root.untried = root_board.valid_moves()
+    lock = threading.Lock()
+    counter = [0]
+
+    def worker(worker_seed):
+        rng = random.Random(worker_seed)
+        while True:
+            with lock:
+                # A tree always gets its first playout, so a short deadline still yields a move
+                if counter[0] >= playouts or (deadline is not None and counter[0] and time.time() >= deadline):
+                    return
+                counter[0] += 1
+
+                # Selection
+                node, board, mover, current_turn, result = root, root_board.copy(), player, turn, None
+                path = [root]
+                root.virtual += VIRTUAL_LOSS
+                while not node.untried and node.children and node.result is None:
+                    node = node.select_child(exploration)
+                    node.virtual += VIRTUAL_LOSS
+                    path.append(node)
+                    result, current_turn = _apply_move(board, node.move, mover, current_turn, config)
+                    mover = 3 - mover
+                result = node.result
+
+                # Expansion
+                if result is None and node.untried is None:
+                    node.untried = board.valid_moves()
+                    if not node.untried:
+                        node.result = result = 0
+                if result is None and node.untried:
+                    col = node.untried.pop(rng.randrange(len(node.untried)))
+                    child = _Node(col, node)
+                    node.children.append(child)
+                    child.result, current_turn = _apply_move(board, col, mover, current_turn, config)
+                    mover = 3 - mover
+                    child.virtual += VIRTUAL_LOSS
+                    path.append(child)
+                    result = child.result
+
+            # Simulation runs outside the lock
+            if result is None:
+                result = _rollout(board, mover, current_turn, config, rng)
+
+            # Backpropagation: each node scores the result for the player who moved into it
+            with lock:
+                just_moved = 3 - mover
+                for node in reversed(path):
+                    node.virtual -= VIRTUAL_LOSS
+                    node.visits += 1
+                    node.value_sum += _score(result, just_moved)
+                    just_moved = 3 - just_moved
+
+    if threads > 1:
+        pool = [threading.Thread(target=worker, args=(seed * 1000 + i,)) for i in range(threads)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+    else:
+        worker(seed)
+
+    visits = {child.move: child.visits for child in root.children}
+    values = {child.move: child.value_sum for child in root.children}
+    return visits, values, counter[0]
+
+
+def _search_worker(board, player, turn, playouts, time_budget, threads, seed, exploration, config):
+    """Process pool entry point: grow one independent tree from a NumPy board."""
+    deadline = time.time() + time_budget if time_budget is not None else None
+    return _run_tree(Bitboard.from_array(board), player, turn, playouts, deadline,
+                     threads, seed, exploration, config)
+
+
+class MCTSPlayer:
+    """
+    MCTS player with root parallelism across processes: every worker grows an
+    independent tree and the root statistics are summed at the end. Each
+    worker can also run `threads` threads on a shared tree with virtual
+    loss (tree parallelism); threads share the GIL, so processes are what
+    scale playout throughput on a multi-core machine.
+
+    The game rules come from `config`. The statistics of the last search
+    are kept in `last_result`.
+    """
+
+    def __init__(self, workers=1, threads=1, playouts=DEFAULT_PLAYOUTS, time_budget=DEFAULT_TIME_BUDGET,
+                 exploration=EXPLORATION, config=DEFAULT_CONFIG, seed=None):
+        if playouts is None and time_budget is None:
+            raise ValueError("MCTSPlayer needs a playout budget or a time budget")
+        if playouts is not None and playouts <= 0:
+            raise ValueError(f"playouts must be positive, got {playouts}")
+        if time_budget is not None and time_budget <= 0:
+            raise ValueError(f"time_budget must be positive, got {time_budget}")
+        self.workers = workers or os.cpu_count() or 1
+        self.threads = threads
+        self.playouts = playouts
+        self.time_budget = time_budget
+        self.exploration = exploration
+        self.config = config
+        self.rng = random.Random(seed)
+        self.last_result = None
+        self._executor = None
+
+    def __call__(self, board, player, turn_number, rotation_state=0):
+        """Same call signature as get_move_from_gpt; returns a 0-indexed column."""
+        return self.search(board, player, turn_number).move
+
+    def search(self, board, player, turn_number):
+        """Run the search and return an MCTSResult with merged root statistics."""
+        start = time.perf_counter()
+        if not Bitboard.from_array(board).valid_moves():
+            self.last_result = MCTSResult(None, {}, {}, 0, 0.0, self.workers)
+            return self.last_result
+
+        # The playout budget is split between the workers; a deadline applies to each
+        if self.playouts is None:
+            shares = [float('inf')] * self.workers
+        else:
+            base, extra = divmod(self.playouts, self.workers)
+            shares = [base + (i < extra) for i in range(self.workers)]
+        args = [
+            (board, player, turn_number - 1, share, self.time_budget, self.threads,
+             self.rng.randrange(1 << 30), self.exploration, self.config)
+            for share in shares
+        ]
+
+        if self.workers == 1:
+            results = [_search_worker(*args[0])]
+        else:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            results = list(self._executor.map(_search_worker, *zip(*args)))
+
+        visits, values, total = {}, {}, 0
+        for tree_visits, tree_values, done in results:
+            total += done
+            for move, count in tree_visits.items():
+                visits[move] = visits.get(move, 0) + count
+                values[move] = values.get(move, 0.0) + tree_values[move]
+
+        # Without a finished playout the first valid move is played
+        move = max(visits, key=visits.get) if visits else Bitboard.from_array(board).valid_moves()[0]
+        self.last_result = MCTSResult(move, visits, values, total, time.perf_counter() - start, self.workers)
+        return self.last_result
+
+    def close(self):
+        """Shut down the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+def get_move_from_mcts(board, player, turn_number, rotation_state=0, playouts=DEFAULT_PLAYOUTS,
+                       time_budget=DEFAULT_TIME_BUDGET, workers=1, threads=1, config=DEFAULT_CONFIG):
+    """
+    Get a move from a one-off MCTS search.
+    Same call signature as get_move_from_gpt; returns a 0-indexed column or
+    None if there is no valid move.
+    """
+    mcts = MCTSPlayer(workers=workers, threads=threads, playouts=playouts, time_budget=time_budget, config=config)
+    try:
+        return mcts(board, player, turn_number, rotation_state)
+    finally:
+        mcts.close()
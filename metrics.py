@@ -0,0 +1,178 @@
+"""
+Connect 5 with Rotation - Metrics Module
+Contains lightweight per-phase timers and event counters for the game loop
+and the LLM players, exportable as JSON or Prometheus text snapshots
+"""
+import contextlib
+import json
+import threading
+import time
+
+# Upper bounds in seconds of the Prometheus histogram buckets (+Inf is implied)
+BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Prefix of every exported Prometheus metric
+PREFIX = 'connect5'
+
+# Returned by timer() while disabled; entering and leaving it does nothing
+_NULL_TIMER = contextlib.nullcontext()
+
+
+class _Timer:
+    __slots__ = ('metrics', 'key', 'start')
+
+    def __init__(self, metrics, key):
+        self.metrics = metrics
+        self.key = key
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics._observe(self.key, time.perf_counter() - self.start)
+
+
+def _key(name, labels):
+    return (name, tuple(sorted(labels.items())))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _label_text(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class Metrics:
+    """
+    Timings per phase and event counts, both keyed by name and labels (such
+    as model=...). Disabled by default: timer() then returns a shared no-op
+    context manager and count() returns at once, so hooks left in hot code
+    cost one attribute check. Safe to use from several threads.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Drop all recorded timings and counts."""
+        with self._lock:
+            # (name, labels) -> [count, total seconds, max seconds, per-bucket counts]
+            self.timings = {}
+            # (name, labels) -> count
+            self.counters = {}
+
+    def timer(self, phase, **labels):
+        """Context manager timing one run of a phase."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, _key(phase, labels))
+
+    def observe(self, phase, seconds, **labels):
+        """Record a duration measured elsewhere."""
+        if self.enabled:
+            self._observe(_key(phase, labels), seconds)
+
+    def _observe(self, key, seconds):
+        with self._lock:
+            timing = self.timings.get(key)
+            if timing is None:
+                timing = self.timings[key] = [0, 0.0, 0.0, [0] * len(BUCKETS)]
+            timing[0] += 1
+            timing[1] += seconds
+            timing[2] = max(timing[2], seconds)
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    timing[3][i] += 1
+                    break
+
+    def count(self, event, n=1, **labels):
+        """Count an event."""
+        if self.enabled:
+            key = _key(event, labels)
+            with self._lock:
+                self.counters[key] = self.counters.get(key, 0) + n
+
+    def snapshot(self):
+        """
+        Aggregates as a JSON-serializable dict: 'phases' and 'counters' as
+        lists of records with their labels, and per-model move, fallback and
+        invalid-move counts and rates under 'models'.
+        """
+        with self._lock:
+            timings = {key: (count, total, peak) for key, (count, total, peak, _) in self.timings.items()}
+            counters = dict(self.counters)
+
+        phases = [
+            dict(labels, phase=name, count=count, total_seconds=total,
+                 mean_ms=total / count * 1000 if count else 0.0, max_ms=peak * 1000)
+            for (name, labels), (count, total, peak) in sorted(timings.items())
+        ]
+        events = [dict(labels, event=name, count=count) for (name, labels), count in sorted(counters.items())]
+
+        models = {}
+        for (name, labels), count in counters.items():
+            model = dict(labels).get('model')
+            if model is not None:
+                counts = models.setdefault(model, {})
+                counts[name] = counts.get(name, 0) + count
+        for counts in models.values():
+            moves = counts.get('moves', 0)
+            counts['fallback_rate'] = counts.get('fallbacks', 0) / moves if moves else 0.0
+            counts['invalid_move_rate'] = counts.get('invalid_moves', 0) / moves if moves else 0.0
+
+        return {'created': time.time(), 'phases': phases, 'counters': events, 'models': models}
+
+    def to_json(self, indent=2):
+        """The snapshot as JSON text."""
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def to_prometheus(self):
+        """
+        A snapshot in the Prometheus text exposition format: one histogram
+        family of phase durations and one counter family per event.
+        """
+        with self._lock:
+            timings = {key: (count, total, list(buckets)) for key, (count, total, _, buckets) in self.timings.items()}
+            counters = dict(self.counters)
+
+        lines = [
+            f"# HELP {PREFIX}_phase_seconds Time spent in each phase of the game loop and the LLM players.",
+            f"# TYPE {PREFIX}_phase_seconds histogram",
+        ]
+        for (name, labels), (count, total, buckets) in sorted(timings.items()):
+            series = (('phase', name),) + labels
+            cumulative = 0
+            for bound, hits in zip(BUCKETS, buckets):
+                cumulative += hits
+                lines.append(f"{PREFIX}_phase_seconds_bucket{_label_text(series, [('le', bound)])} {cumulative}")
+            lines.append(f"{PREFIX}_phase_seconds_bucket{_label_text(series, [('le', '+Inf')])} {count}")
+            lines.append(f"{PREFIX}_phase_seconds_sum{_label_text(series)} {total}")
+            lines.append(f"{PREFIX}_phase_seconds_count{_label_text(series)} {count}")
+
+        families = {}
+        for (name, labels), count in sorted(counters.items()):
+            families.setdefault(name, []).append((labels, count))
+        for name, series in families.items():
+            lines.append(f"# TYPE {PREFIX}_{name}_total counter")
+            for labels, count in series:
+                lines.append(f"{PREFIX}_{name}_total{_label_text(labels)} {count}")
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """Write a snapshot to a file: Prometheus text for *.prom files, JSON otherwise."""
+        text = self.to_prometheus() if path.endswith('.prom') else self.to_json()
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+
+# Process-wide metrics used by the game loop and the LLM players; set
+# `metrics.enabled = True` to start recording
+metrics = Metrics()
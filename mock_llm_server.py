@@ -0,0 +1,114 @@
+"""
+Connect 5 with Rotation - Mock LLM Server
+A local stand-in for the OpenAI and Anthropic HTTP APIs for load tests
+without network access. It answers every request with a random valid move
+after a configurable delay and can inject 429 responses.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+
+# Pattern of the valid moves list in both prompts
+VALID_MOVES_PATTERN = re.compile(r'Valid moves: \[([\d, ]*)\]')
+
+
+class MockLLMServer:
+    """Minimal HTTP/1.1 keep-alive server for /v1/chat/completions and /v1/messages."""
+
+    def __init__(self, host='127.0.0.1', port=8089, latency=0.2, jitter=0.1, error_rate=0.0, seed=None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self._server = None
+
+    async def start(self):
+        """Start listening; returns once the socket is bound."""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        """Stop the server."""
+        self._server.close()
+        await self._server.wait_closed()
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def _pick_move(self, prompt):
+        """Pick a random move from the prompt's valid moves list."""
+        match = VALID_MOVES_PATTERN.search(prompt)
+        moves = [int(m) for m in match.group(1).split(',') if m.strip()] if match else [1]
+        return self.rng.choice(moves or [1])
+
+    def _respond(self, path, payload):
+        """Build the (status, body) reply for one request."""
+        if self.rng.random() < self.error_rate:
+            return 429, {"error": {"type": "rate_limit_error", "message": "mock rate limit"}}
+
+        if path == '/v1/chat/completions':
+            prompt = payload["messages"][-1]["content"]
+            content = json.dumps({"move": self._pick_move(prompt)})
+            return 200, {"choices": [{"index": 0, "message": {"role": "assistant", "content": content}}]}
+        if path == '/v1/messages':
+            prompt = payload["messages"][-1]["content"]
+            text = json.dumps({"move": self._pick_move(prompt)})
+            return 200, {"content": [{"type": "text", "text": text}]}
+        return 404, {"error": {"message": f"unknown path {path}"}}
+
+    async def _handle(self, reader, writer):
+        """Serve requests on one connection until the client closes it."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                _, path, _ = request_line.decode().split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode().partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+                self.requests += 1
+                await asyncio.sleep(max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter)))
+                status, reply = self._respond(path, json.loads(body or b'{}'))
+
+                data = json.dumps(reply).encode()
+                extra = "Retry-After: 0.1\r\n" if status == 429 else ""
+                writer.write(
+                    f"HTTP/1.1 {status} MOCK\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n{extra}Connection: keep-alive\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def _serve(args):
+    server = await MockLLMServer(args.host, args.port, args.latency, args.jitter, args.error_rate).start()
+    print(f"Mock LLM server listening on {server.base_url}")
+    async with server._server:
+        await server._server.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Mock OpenAI/Anthropic server for load tests")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--jitter', type=float, default=0.1)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    asyncio.run(_serve(parser.parse_args()))
@@ -0,0 +1,271 @@
+"""
+Connect 5 with Rotation - Opening Book Module
+Builds an opening book offline, from search or from logged games, into a
+sorted binary file, and serves it to players through a memory map with a
+fallback to the normal player on a miss
+"""
+import argparse
+import functools
+import hashlib
+import json
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from config import GameConfig, VARIANTS, get_config
+from game_records import UNFINISHED, GameRecords
+from game_state import GameState
+from symmetry import EXACT, POLICIES, canonical, canonical_bitboard
+
+# Default book file, used by the 'book' player
+BOOK_PATH = 'opening_book.bin'
+
+# File layout: MAGIC, the header length as a little-endian uint32, a JSON
+# header, zero padding to a multiple of 8 bytes, then `entries` sorted
+# little-endian uint64 position keys followed by their int8 moves (0-indexed
+# columns of the canonical board)
+MAGIC = b'C5BOOK01'
+KEY_DTYPE = np.dtype('<u8')
+MOVE_DTYPE = np.dtype('i1')
+
+
+def book_key(form):
+    """64-bit book key of a symmetry.Canonical position."""
+    return int.from_bytes(hashlib.blake2b(repr(form.key).encode(), digest_size=8).digest(), 'little')
+
+
+def write_book(path, entries, config, ply, policy=EXACT, source=''):
+    """
+    Write {key: canonical move} to a book file. The file is replaced
+    atomically, so processes reading the old book keep a consistent map.
+    """
+    keys = np.array(sorted(entries), dtype=KEY_DTYPE)
+    moves = np.array([entries[key] for key in keys.tolist()], dtype=MOVE_DTYPE)
+    header = json.dumps({
+        'config': list(config),
+        'ply': ply,
+        'policy': policy,
+        'entries': len(keys),
+        'source': source,
+        'created': time.time(),
+    }).encode()
+    prefix = MAGIC + len(header).to_bytes(4, 'little') + header
+    prefix += bytes(-len(prefix) % 8)
+
+    temporary = f"{path}.tmp"
+    with open(temporary, 'wb') as f:
+        f.write(prefix)
+        f.write(keys.tobytes())
+        f.write(moves.tobytes())
+    os.replace(temporary, path)
+
+
+class OpeningBook:
+    """
+    Read-only opening book on a memory map. Opening it only parses the
+    header; lookups binary-search the mapped keys, so every process using
+    the same file shares its pages through the OS page cache.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not an opening book")
+            length = int.from_bytes(f.read(4), 'little')
+            header = json.loads(f.read(length))
+        offset = len(MAGIC) + 4 + length
+        offset += -offset % 8
+
+        self.path = path
+        self.config = GameConfig(*header['config'])
+        self.ply = header['ply']
+        self.policy = header['policy']
+        self.source = header['source']
+        entries = header['entries']
+        if entries:
+            self.keys = np.memmap(path, KEY_DTYPE, 'r', offset, (entries,))
+            self.moves = np.memmap(path, MOVE_DTYPE, 'r', offset + entries * KEY_DTYPE.itemsize, (entries,))
+        else:
+            # np.memmap cannot map an empty range
+            self.keys = np.empty(0, KEY_DTYPE)
+            self.moves = np.empty(0, MOVE_DTYPE)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, key):
+        """Canonical move stored under a book key, or None."""
+        index = int(np.searchsorted(self.keys, np.uint64(key)))
+        if index < len(self.keys) and int(self.keys[index]) == key:
+            return int(self.moves[index])
+        return None
+
+    def probe(self, board, turn):
+        """Book move (0-indexed column) for a NumPy board after `turn` moves, or None."""
+        if turn >= self.ply:
+            return None
+        form = canonical(board, turn, self.config, self.policy)
+        move = self.lookup(book_key(form))
+        return None if move is None else form.to_board(move)
+
+
+@functools.lru_cache(maxsize=None)
+def open_book(path=BOOK_PATH):
+    """OpeningBook for a path, mapped once per process."""
+    return OpeningBook(path)
+
+
+class BookPlayer:
+    """
+    Move function (get_move_from_gpt signature) that plays book moves while
+    the position is in the book and asks `fallback` otherwise. Lookups that
+    hit and miss are counted in `hits` and `misses`; positions past the
+    book depth are not counted.
+    """
+
+    def __init__(self, book, fallback):
+        self.book = book
+        self.fallback = fallback
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, board, player, turn_number, rotation_state=0, **kwargs):
+        turn = turn_number - 1
+        if turn < self.book.ply:
+            move = self.book.probe(board, turn)
+            # A key collision could name a full column, so book moves are checked too
+            if move is not None and 0 <= move < board.shape[1] and board[-1][move] == 0:
+                self.hits += 1
+                return move
+            self.misses += 1
+        return self.fallback(board, player, turn_number, rotation_state, **kwargs)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+def book_positions(ply, config, policy=EXACT):
+    """
+    {key: (board, turn, rotation_state, form)} of one representative of every
+    canonical position with fewer than `ply` moves played and the game not over.
+    """
+    positions = {}
+    state = GameState(config)
+
+    def walk():
+        if state.is_over or state.turn >= ply:
+            return
+        form = canonical_bitboard(state.bitboard, state.turn, config, policy)
+        key = book_key(form)
+        if key in positions:
+            return
+        positions[key] = (state.to_array(), state.turn, state.rotation_state, form)
+        for col in state.valid_moves():
+            state.make(col)
+            walk()
+            state.unmake()
+
+    walk()
+    return positions
+
+
+@functools.lru_cache(maxsize=None)
+def _searcher(config):
+    from search_player import AlphaBetaSearch
+    return AlphaBetaSearch(config)
+
+
+def _search_job(job):
+    """Process pool entry point: best move of one book position."""
+    config, board, turn, rotation_state, time_budget = job
+    player = 1 if turn % 2 == 0 else 2
+    return _searcher(config).search(board, player, turn + 1, time_budget, rotation_state=rotation_state).move
+
+
+def build_from_search(ply, config, time_budget=1.0, policy=EXACT, workers=None):
+    """{key: canonical move} with the alpha-beta move of every position to `ply`."""
+    positions = book_positions(ply, config, policy)
+    jobs = [(config, board, turn, rotation_state, time_budget)
+            for board, turn, rotation_state, _ in positions.values()]
+    if workers == 1:
+        moves = [_search_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            moves = list(executor.map(_search_job, jobs))
+    return {key: form.to_canonical(move)
+            for (key, (_, _, _, form)), move in zip(positions.items(), moves) if move is not None}
+
+
+def read_games(paths, config):
+    """
+    (moves, winner) of every finished game in game record files (see
+    game_records.py) of `config`. Unfinished games have no result to score
+    their moves by, so they are skipped.
+    """
+    for path in paths:
+        records = GameRecords(path)
+        if records.config != config:
+            raise ValueError(f"{path} holds games of {records.config}, not {config}")
+        for game in records:
+            if game.winner != UNFINISHED:
+                yield game.moves, game.winner
+
+
+def build_from_games(games, ply, config, policy=EXACT, min_games=1):
+    """
+    {key: canonical move} from (0-indexed moves, winner) games: for every position in the first
+    `ply` moves, the move with the best score for the side that played it
+    (1 per win, 1/2 per draw) among moves played in at least `min_games`
+    games; ties go to the more played move.
+    """
+    # key -> canonical move -> [games, score]
+    results = defaultdict(lambda: defaultdict(lambda: [0, 0.0]))
+    for moves, winner in games:
+        state = GameState(config)
+        for col in moves[:ply]:
+            if state.is_over or not state.can_play(col):
+                break
+            form = canonical_bitboard(state.bitboard, state.turn, config, policy)
+            record = results[book_key(form)][form.to_canonical(col)]
+            record[0] += 1
+            record[1] += 1.0 if winner == state.current_player else 0.5 if winner == 0 else 0.0
+            state.make(col)
+
+    entries = {}
+    for key, moves in results.items():
+        played = [(score / games, games, move) for move, (games, score) in moves.items() if games >= min_games]
+        if played:
+            entries[key] = max(played)[2]
+    return entries
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--ply', type=int, default=4, help="book positions have fewer moves played than this")
+    parser.add_argument('--games', nargs='+', metavar='LOG', help="build from game record files instead of search")
+    parser.add_argument('--min-games', type=int, default=1, help="games a logged move needs to enter the book")
+    parser.add_argument('--time-budget', type=float, default=1.0, help="seconds of search per position")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--policy', choices=POLICIES, default=EXACT, help="symmetry folding (see symmetry.py)")
+    parser.add_argument('--variant', choices=sorted(VARIANTS), default='default')
+    parser.add_argument('--output', default=BOOK_PATH)
+    args = parser.parse_args()
+
+    config = get_config(args.variant)
+    start = time.perf_counter()
+    if args.games:
+        entries = build_from_games(read_games(args.games, config), args.ply, config, args.policy, args.min_games)
+        source = f"games: {', '.join(args.games)}"
+    else:
+        entries = build_from_search(args.ply, config, args.time_budget, args.policy, args.workers)
+        source = f"search: {args.time_budget}s per position"
+    write_book(args.output, entries, config, args.ply, args.policy, source)
+    print(f"Wrote {len(entries)} positions to {args.output} in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,223 @@
+"""
+Connect 5 with Rotation - Perft Module
+Counts every move path to a fixed depth from a position, with the wins and
+draws met on the way and the rotations played, to validate the move
+generator and rotation rules deep into a game and to time them
+"""
+import argparse
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from board import get_valid_moves, drop_and_check, rotate_if_due, is_board_full
+from config import DEFAULT_CONFIG, VARIANTS, get_config
+from game_state import GameState
+from zobrist import ZobristHasher
+
+# nodes: paths of exactly `depth` moves. p1_wins/p2_wins/draws: paths of at most
+# `depth` moves that end the game (a double win after a rotation is a draw).
+# rotations: rotations played along all paths
+PerftCounts = namedtuple('PerftCounts', ['nodes', 'p1_wins', 'p2_wins', 'draws', 'rotations'])
+
+NO_COUNTS = PerftCounts(0, 0, 0, 0, 0)
+
+# Default cap on memo entries, to bound memory on deep runs
+MEMO_ENTRIES = 1 << 22
+
+
+def total(counts):
+    """Sum of PerftCounts."""
+    return PerftCounts(*(sum(column) for column in zip(*counts))) if counts else NO_COUNTS
+
+
+def _leaf(depth, result, rotated):
+    """Counts of a path that stops after the move just played."""
+    return PerftCounts(
+        int(depth == 1),
+        int(result == {1}),
+        int(result == {2}),
+        int(result is not None and len(result) != 1),
+        int(rotated),
+    )
+
+
+class Perft:
+    """
+    Perft counter on GameState make/unmake, which follows the board.py rules
+    (perft_reference recounts with the NumPy functions themselves).
+
+    With `bulk` the moves of the last ply are counted without being played,
+    so wins and draws on that ply are not counted. With `memo` the counts of
+    every subtree are stored under its Zobrist hash and remaining depth, up to
+    `memo_entries` entries; a transposition reached again is not re-searched.
+    """
+
+    def __init__(self, config=DEFAULT_CONFIG, bulk=False, memo=False, memo_entries=MEMO_ENTRIES):
+        self.config = config
+        self.bulk = bulk
+        self.memo = {} if memo else None
+        self.memo_entries = memo_entries
+        self.hasher = ZobristHasher(config.rotation_interval) if memo else None
+        self.memo_hits = 0
+
+    def _hash(self, state):
+        return self.hasher.hash_bitboard(state.bitboard, state.turn, state.rotation_state) if self.memo is not None else 0
+
+    def count(self, state, depth):
+        """PerftCounts of all paths of up to `depth` moves from the state."""
+        if depth <= 0 or state.is_over:
+            return NO_COUNTS
+        return self._count(state, depth, self._hash(state))
+
+    def divide(self, state, depth):
+        """PerftCounts per root move, {col: counts}."""
+        if depth <= 0:
+            return {}
+        h = self._hash(state)
+        return {col: self.move_counts(state, col, depth, h) for col in state.valid_moves()}
+
+    def _count(self, state, depth, h):
+        memo = self.memo
+        if memo is not None:
+            key = (h, depth)
+            counts = memo.get(key)
+            if counts is not None:
+                self.memo_hits += 1
+                return counts
+
+        moves = state.valid_moves()
+        if depth == 1 and self.bulk:
+            counts = PerftCounts(len(moves), 0, 0, 0, 0)
+        else:
+            counts = total([self.move_counts(state, col, depth, h) for col in moves])
+
+        if memo is not None and len(memo) < self.memo_entries:
+            memo[key] = counts
+        return counts
+
+    def move_counts(self, state, col, depth, h=None):
+        """
+        PerftCounts of the paths starting with `col`, the move's own result
+        included. `h` is the hash of the state (only used with the memo).
+        """
+        if self.memo is not None and h is None:
+            h = self._hash(state)
+        shape, turn, player = state.shape, state.turn, state.current_player
+        row, _ = state.drop(col)
+        winners = state.rotate_if_due()
+        rotated = winners is not None
+        if depth == 1 or state.is_over:
+            counts = _leaf(depth, state.result, rotated)
+        else:
+            if self.memo is not None:
+                if rotated:
+                    # Every cell moved, so the hash is recomputed for the new geometry
+                    h = self._hash(state)
+                else:
+                    h = self.hasher.update_drop(h, shape, row, col, player, turn)
+            counts = self._count(state, depth - 1, h)
+            if rotated:
+                counts = counts._replace(rotations=counts.rotations + 1)
+        state.unmake()
+        return counts
+
+
+def _divide_job(state, col, depth, bulk, memo):
+    """Process pool entry point: count the subtree of one root move."""
+    perft = Perft(state.config, bulk, memo)
+    return perft.move_counts(state, col, depth), perft.memo_hits
+
+
+def perft(state, depth, bulk=False, memo=False, workers=1):
+    """
+    Divide counts {col: PerftCounts} of a GameState to `depth`, with the
+    root moves spread over `workers` processes (every worker has its own
+    memo). Returns (divide, memo_hits).
+    """
+    moves = state.valid_moves() if depth > 0 else []
+    if workers == 1 or depth == 1 or len(moves) < 2:
+        counter = Perft(state.config, bulk, memo)
+        return counter.divide(state, depth), counter.memo_hits
+
+    # The move stack is not needed below the root, so it is not sent to the workers
+    root = state.copy()
+    root.moves = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {col: executor.submit(_divide_job, root, col, depth, bulk, memo) for col in moves}
+        results = {col: future.result() for col, future in futures.items()}
+    return {col: counts for col, (counts, _) in results.items()}, sum(hits for _, hits in results.values())
+
+
+def perft_reference(board, depth, turn=0, rotation_state=0, config=DEFAULT_CONFIG):
+    """
+    The same counts as Perft.count (without bulk counting), computed with
+    the NumPy rules of board.py on board copies. Slow; for cross-checking.
+    """
+    if depth <= 0:
+        return NO_COUNTS
+    player = 1 if turn % 2 == 0 else 2
+    counts = []
+    for col in get_valid_moves(board, rotation_state):
+        after = board.copy()
+        _, result = drop_and_check(after, col, player, rotation_state, config)
+        rotated = False
+        after_rotation = rotation_state
+        if result is None:
+            after, after_rotation, winners = rotate_if_due(after, turn + 1, rotation_state, config)
+            rotated = winners is not None
+            if winners:
+                result = winners
+            elif rotated and is_board_full(after):
+                # A rotation without gravity can fill the top of every column
+                result = set()
+        if depth == 1 or result is not None:
+            counts.append(_leaf(depth, result, rotated))
+        else:
+            below = perft_reference(after, depth - 1, turn + 1, after_rotation, config)
+            counts.append(below._replace(rotations=below.rotations + rotated))
+    return total(counts)
+
+
+def state_from_moves(moves, config=DEFAULT_CONFIG):
+    """GameState after playing 1-indexed columns from the empty board."""
+    state = GameState(config)
+    for column in moves:
+        if not state.can_play(column - 1):
+            raise ValueError(f"Column {column} cannot be played after {state.turn} moves")
+        state.make(column - 1)
+    return state
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('depth', type=int)
+    parser.add_argument('--moves', type=int, nargs='*', default=[], metavar='COL',
+                        help="1-indexed columns played from the empty board to reach the start position")
+    parser.add_argument('--variant', choices=sorted(VARIANTS), default='default')
+    parser.add_argument('--bulk', action='store_true', help="count the last ply without playing it")
+    parser.add_argument('--memo', action='store_true', help="share the counts of transpositions")
+    parser.add_argument('--workers', type=int, default=1, help="processes to spread the root moves over")
+    parser.add_argument('--divide', action='store_true', help="print the counts of every root move")
+    parser.add_argument('--check', action='store_true', help="recount every depth with the NumPy rules")
+    args = parser.parse_args()
+
+    state = state_from_moves(args.moves, get_config(args.variant))
+    print(f"{'depth':>5} {'nodes':>12} {'p1 wins':>10} {'p2 wins':>10} {'draws':>8} {'rotations':>10} "
+          f"{'seconds':>9} {'nodes/s':>11}")
+    for depth in range(1, args.depth + 1):
+        start = time.perf_counter()
+        divide, hits = perft(state, depth, args.bulk, args.memo, args.workers)
+        elapsed = time.perf_counter() - start
+        counts = total(list(divide.values()))
+        print(f"{depth:>5} {counts.nodes:>12} {counts.p1_wins:>10} {counts.p2_wins:>10} {counts.draws:>8} "
+              f"{counts.rotations:>10} {elapsed:>9.3f} {counts.nodes / elapsed if elapsed else 0:>11.0f}"
+              + (f"  memo hits {hits}" if args.memo else ""))
+        if args.check:
+            expected = perft_reference(state.to_array(), depth, state.turn, state.rotation_state, state.config)
+            if args.bulk:
+                counts, expected = counts.nodes, expected.nodes
+            print(f"{'':>5} board.py rules: {'ok' if counts == expected else f'MISMATCH, expected {expected}'}")
+    if args.divide:
+        for col, counts in sorted(divide.items()):
+            print(f"{col + 1:>3}: {counts.nodes} nodes, {counts.p1_wins}/{counts.p2_wins} wins, "
+                  f"{counts.draws} draws, {counts.rotations} rotations")
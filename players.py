@@ -0,0 +1,100 @@
+"""
+Connect 5 with Rotation - Player Registry Module
+Maps player names to lazily imported move functions
+"""
+import functools
+import random
+
+from board import get_valid_moves
+from config import DEFAULT_CONFIG
+
+
+def _random_factory(config=DEFAULT_CONFIG):
+    """Uniformly random valid moves."""
+    def get_random_move(board, player, turn_number, rotation_state=0):
+        moves = get_valid_moves(board, rotation_state)
+        return random.choice(moves) if moves else None
+    return get_random_move
+
+
+def _search_factory(time_budget=0.2, config=DEFAULT_CONFIG):
+    """Alpha-beta search with its own transposition table for the whole game."""
+    from search_player import AlphaBetaSearch
+    searcher = AlphaBetaSearch(config)
+
+    def get_search_move(board, player, turn_number, rotation_state=0):
+        return searcher.search(board, player, turn_number, time_budget, rotation_state=rotation_state).move
+    return get_search_move
+
+
+def _mcts_factory(playouts=500, config=DEFAULT_CONFIG):
+    """Single-process MCTS; the tournament already runs games in parallel."""
+    from mcts_player import MCTSPlayer
+    return MCTSPlayer(playouts=playouts, config=config, seed=random.randrange(1 << 30))
+
+
+def _gpt_factory(config=DEFAULT_CONFIG):
+    """GPT-4o through the OpenAI API."""
+    from ai_players import get_move_from_gpt
+    return get_move_from_gpt if config == DEFAULT_CONFIG else functools.partial(get_move_from_gpt, config=config)
+
+
+def _claude_factory(config=DEFAULT_CONFIG):
+    """Claude through the Anthropic API."""
+    from ai_players import get_move_from_claude
+    return get_move_from_claude if config == DEFAULT_CONFIG else functools.partial(get_move_from_claude, config=config)
+
+
+def _cached_gpt_factory(path=None, config=DEFAULT_CONFIG, **options):
+    """GPT-4o behind the LLM move cache (llm_cache.py) stored at `path`; options go to CachedPlayer."""
+    from llm_cache import CACHE_PATH, cached_gpt, open_cache
+    return cached_gpt(open_cache(path or CACHE_PATH), config=config, **options)
+
+
+def _cached_claude_factory(path=None, config=DEFAULT_CONFIG, **options):
+    """Claude behind the LLM move cache (llm_cache.py) stored at `path`; options go to CachedPlayer."""
+    from llm_cache import CACHE_PATH, cached_claude, open_cache
+    return cached_claude(open_cache(path or CACHE_PATH), config=config, **options)
+
+
+def _book_factory(path=None, fallback='search', config=DEFAULT_CONFIG):
+    """Opening book moves (opening_book.py), then the `fallback` player."""
+    from opening_book import BOOK_PATH, BookPlayer, open_book
+    book = open_book(path or BOOK_PATH)
+    if book.config != config:
+        raise ValueError(f"Opening book {book.path} was built for {book.config}, not {config}")
+    return BookPlayer(book, get_player(fallback, config=config))
+
+
+# Player name -> factory returning a move function with the get_move_from_gpt signature.
+# Factories take their options as keyword arguments, including the game `config`
+PLAYERS = {
+    'random': _random_factory,
+    'search': _search_factory,
+    'mcts': _mcts_factory,
+    'gpt': _gpt_factory,
+    'claude': _claude_factory,
+    'gpt-cached': _cached_gpt_factory,
+    'claude-cached': _cached_claude_factory,
+    'book': _book_factory,
+}
+
+
+def register_player(name, factory):
+    """
+    Register a player factory under a name usable in tournaments and workers.
+    The factory must accept a `config` keyword (the GameConfig of the game).
+    """
+    PLAYERS[name] = factory
+
+
+def get_player(name, **options):
+    """
+    Create a move function for a registered player. Only the modules that
+    player needs are imported, so engine-only workers never load the LLM SDKs.
+    """
+    try:
+        factory = PLAYERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown player {name!r}, expected one of {sorted(PLAYERS)}") from None
+    return factory(**options)
@@ -0,0 +1,232 @@
+"""
+Connect 5 with Rotation - Prompts Module
+Contains the per-game prompt builder for the LLM players, with the original
+verbose encoding and a token-compact one
+"""
+import functools
+import re
+
+from board import board_to_string, is_valid_location
+from config import DEFAULT_CONFIG
+
+# Prompt encodings
+FULL = 'full'        # the original prompt: spaced board grid and turn-player-column history
+COMPACT = 'compact'  # dense board rows and a bare column list
+
+# Encoding used for each provider unless the builder is told otherwise
+PROMPT_ENCODINGS = {'gpt': FULL, 'claude': FULL}
+
+_NUMBER_WORDS = {3: 'three', 4: 'four', 5: 'five', 6: 'six', 7: 'seven', 8: 'eight'}
+
+
+@functools.lru_cache(maxsize=None)
+def rules_text(config=DEFAULT_CONFIG):
+    """The rules paragraph of the full prompt for a variant."""
+    length = config.win_length
+    if config.rotation_interval:
+        interval = config.rotation_interval
+        turns = f" ({interval // 2} turns each player)" if interval % 2 == 0 else ""
+        direction = 'clockwise' if config.clockwise else 'counterclockwise'
+        settle = ("pieces fall to realign with gravity" if config.gravity_after_rotation
+                  else "pieces stay where the rotation puts them")
+        rotation = f"Every {interval} moves{turns}, the board rotates 90 degrees {direction}, and {settle}. "
+        title = f"Connect {length} with rotation"
+    else:
+        rotation = ""
+        title = f"Connect {length}"
+    return (
+        f"Rules: This is {title}. Players take turns dropping pieces. "
+        "A piece always falls downward (gravity pulls down). "
+        f"{rotation}"
+        f"The goal is to connect {_NUMBER_WORDS.get(length, length)} of your pieces in a row "
+        "horizontally, vertically, or diagonally."
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def compact_rules_text(config=DEFAULT_CONFIG):
+    """The rules line of the compact prompt for a variant."""
+    length = config.win_length
+    if config.rotation_interval:
+        direction = 'clockwise' if config.clockwise else 'counterclockwise'
+        settle = "pieces fall again" if config.gravity_after_rotation else "pieces stay put"
+        rotation = f"Every {config.rotation_interval} moves the board rotates 90° {direction} and {settle}. "
+        title = f"Connect {length} with rotation"
+    else:
+        rotation = ""
+        title = f"Connect {length}"
+    return (
+        f"{title}. Pieces fall down. "
+        f"{rotation}"
+        f"{str(_NUMBER_WORDS.get(length, length)).capitalize()} in a row in any direction wins. "
+        "Board rows top to bottom, columns 1..N left to right; .=empty X=player 1 O=player 2."
+    )
+
+
+RULES = rules_text()
+COMPACT_RULES = compact_rules_text()
+
+# System prompts, formatted with the win length of the variant
+SYSTEM_TEMPLATES = {
+    'gpt': (
+        "You are an expert Connect {length} AI. Analyze the current board state and choose the best move. "
+        "Respond with a JSON object containing a 'move' field with an integer value from the valid moves provided."
+    ),
+    'claude': (
+        "You are an expert Connect {length} AI. Analyze the current board state and choose the best move. "
+        "Respond with a JSON object containing a 'move' field with the chosen column number from the valid moves provided."
+    ),
+}
+
+GPT_SYSTEM = SYSTEM_TEMPLATES['gpt'].format(length=DEFAULT_CONFIG.win_length)
+CLAUDE_SYSTEM = SYSTEM_TEMPLATES['claude'].format(length=DEFAULT_CONFIG.win_length)
+
+# Closing instruction of the user prompt for each provider
+FULL_REPLY = {
+    'gpt': "Respond with a JSON object containing a 'move' field with an integer value representing your chosen column number.",
+    'claude': "Respond with a JSON object containing a 'move' field with the chosen column number.",
+}
+
+# Rough stand-in for a BPE tokenizer: lower-case words, capitalised words,
+# up to three digits, runs of dots and single symbols. It splits board rows
+# such as "XOOX" into one token per piece, so it overestimates compact prompts
+_TOKEN_PATTERN = re.compile(r"[a-z]+|[A-Z][a-z]*|\d{1,3}|\.+|[^\w\s]")
+
+
+@functools.lru_cache(maxsize=None)
+def _tokenizer():
+    """tiktoken encoding of GPT-4o, or None if tiktoken or its vocabulary file is not available."""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        # The vocabulary is downloaded on first use
+        return None
+
+
+def count_tokens(text, provider='gpt'):
+    """
+    Number of prompt tokens in `text`. Exact for GPT when tiktoken is
+    installed; otherwise (and for Claude, whose tokenizer is not public) an
+    estimate that counts words and symbols.
+    """
+    tokenizer = _tokenizer() if provider == 'gpt' else None
+    if tokenizer is not None:
+        return len(tokenizer.encode(text))
+    return len(_TOKEN_PATTERN.findall(text))
+
+
+def compact_board(board, rotation_state=0):
+    """Board as one line of symbols per row, top row first."""
+    symbols = '.XO'
+    return '\n'.join(
+        ''.join(symbols[piece] for piece in board[r].tolist()) for r in range(board.shape[0] - 1, -1, -1)
+    )
+
+
+class PromptBuilder:
+    """
+    Builds the LLM prompts for one game. The move history is rendered
+    incrementally as moves are added, so a late-game prompt costs no more
+    Python work than an early one. `encodings` maps 'gpt'/'claude' to FULL or
+    COMPACT (default PROMPT_ENCODINGS) and `config` is the variant the rules
+    text describes. The prompt token count of every built prompt is kept in
+    `tokens` as (turn_number, provider, count).
+    """
+
+    def __init__(self, encodings=None, count=False, config=DEFAULT_CONFIG):
+        self.encodings = dict(PROMPT_ENCODINGS, **(encodings or {}))
+        self.count = count
+        self.config = config
+        self.rules = {FULL: rules_text(config), COMPACT: compact_rules_text(config)}
+        self.systems = {provider: template.format(length=config.win_length)
+                        for provider, template in SYSTEM_TEMPLATES.items()}
+        self.moves = []
+        self.tokens = []
+        # Rendered history per encoding: (moves rendered, text)
+        self._history = {FULL: (0, ""), COMPACT: (0, "")}
+
+    @classmethod
+    def from_history(cls, history, encodings=None, config=DEFAULT_CONFIG):
+        """Builder primed with a list of move dicts, as returned by GameState.history()."""
+        builder = cls(encodings, config=config)
+        for move in history:
+            builder.add_move(move['player'], move['column'])
+        return builder
+
+    def fork(self):
+        """Copy of the builder for prompts of hypothetical moves; it does not count tokens."""
+        builder = PromptBuilder(self.encodings, config=self.config)
+        builder.moves = list(self.moves)
+        builder._history = dict(self._history)
+        return builder
+
+    def add_move(self, player, column):
+        """Record a played move; `column` is 1-indexed as shown to the models."""
+        self.moves.append((player, column))
+
+    def history_block(self, encoding=FULL):
+        """The move history section of the prompt (empty before the first move)."""
+        rendered, text = self._history[encoding]
+        if rendered < len(self.moves):
+            new_moves = self.moves[rendered:]
+            if encoding == FULL:
+                lines = [f"{i}-{player}-{column}" for i, (player, column) in enumerate(new_moves, start=rendered + 1)]
+                text = text + "\n" + "\n".join(lines) if text else "\n".join(lines)
+            else:
+                columns = " ".join(str(column) for _, column in new_moves)
+                text = text + " " + columns if text else columns
+            self._history[encoding] = (len(self.moves), text)
+
+        if not text:
+            return ""
+        if encoding == FULL:
+            return f"Move history (format: turn_number-player-column):\n{text}\n\n"
+        return f"Moves (columns, X first): {text}\n"
+
+    def user_prompt(self, board, player, turn_number, rotation_state=0, provider='gpt'):
+        """The user prompt for the side to move in the provider's encoding."""
+        valid_columns = [col + 1 for col in range(board.shape[1]) if is_valid_location(board, col, rotation_state)]
+        next_rotation = self.config.rotation_due(turn_number)
+        encoding = self.encodings[provider]
+
+        if encoding == FULL:
+            prompt = (
+                f"{self.rules[FULL]}\n\n"
+                f"Current board state (Turn {turn_number}, Rotation: {rotation_state % 4}):\n"
+                f"{board_to_string(board, rotation_state, self.config)}\n\n"
+                f"{'Board will rotate after this move!' if next_rotation else ''}\n\n"
+                f"{self.history_block(FULL)}"
+                f"Valid moves: {valid_columns}\n\n"
+                f"You are playing as {'Player 1 (X)' if player == 1 else 'Player 2 (O)'}. "
+                "Analyze the board and choose the best valid column to drop your piece. "
+                f"{FULL_REPLY[provider]}"
+            )
+        else:
+            prompt = (
+                f"{self.rules[COMPACT]}\n"
+                f"Turn {turn_number}, rotation {rotation_state % 4}"
+                f"{', board rotates after this move' if next_rotation else ''}.\n"
+                f"{compact_board(board, rotation_state)}\n"
+                f"{self.history_block(COMPACT)}"
+                f"Valid: {','.join(map(str, valid_columns))}\n"
+                f"You are {'X' if player == 1 else 'O'}. Reply with JSON {{\"move\": column}}."
+            )
+
+        if self.count:
+            self.tokens.append((turn_number, provider, count_tokens(prompt, provider)))
+        return prompt
+
+    def gpt_messages(self, board, player, turn_number, rotation_state=0):
+        """Chat messages for GPT."""
+        return [
+            {"role": "system", "content": self.systems['gpt']},
+            {"role": "user", "content": self.user_prompt(board, player, turn_number, rotation_state, 'gpt')}
+        ]
+
+    def claude_prompt(self, board, player, turn_number, rotation_state=0):
+        """(system, user) prompts for Claude."""
+        return self.systems['claude'], self.user_prompt(board, player, turn_number, rotation_state, 'claude')
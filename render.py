@@ -0,0 +1,307 @@
+"""
+Connect 5 with Rotation - Offscreen Rendering Module
+Renders recorded games without a GUI: PNG frame sequences, animated GIF or
+MP4 showing every rotation and gravity settle, and colored ANSI text, built
+from pre-rendered cell sprites and spread over a process pool
+"""
+import argparse
+import functools
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from board import rotation_label
+from config import DEFAULT_CONFIG
+from game_records import GameRecords
+from game_state import GameState
+
+# Output formats
+PNG = 'png'    # a directory of numbered PNG frames per game
+GIF = 'gif'    # one animated GIF per game (needs Pillow)
+MP4 = 'mp4'    # one H.264 video per game (needs ffmpeg on the PATH)
+ANSI = 'ansi'  # one text file of colored ANSI frames per game
+
+FORMATS = (PNG, GIF, MP4, ANSI)
+
+# Seconds each kind of frame is shown in animations
+MOVE_SECONDS = 0.5
+ROTATE_SECONDS = 0.4
+SETTLE_SECONDS = 0.08
+FINAL_SECONDS = 2.0
+
+# Frames per second of MP4 output; frames are repeated to match their durations
+MP4_FPS = 25
+
+# Pixel side of one cell sprite
+CELL_PIXELS = 32
+
+# RGB colors, as in visualization.py
+BOARD_COLOR = (0, 0, 255)
+EDGE_COLOR = (0, 0, 0)
+MARGIN_COLOR = (255, 255, 255)
+PIECE_RGB = ((255, 255, 255), (255, 0, 0), (255, 255, 0))
+
+# ANSI cells by piece code on a blue background, and the reset code ending every row
+ANSI_CELLS = np.array(['\x1b[44;97m ○', '\x1b[44;91m ●', '\x1b[44;93m ●'])
+ANSI_RESET = ' \x1b[0m'
+
+
+@functools.lru_cache(maxsize=None)
+def cell_sprites(cell=CELL_PIXELS, supersample=4):
+    """
+    Palette sprites of an empty cell and the two pieces: a disc of radius
+    0.4 cell with a black rim on the blue board, antialiased by
+    supersampling. Returns (palette, sprites): the (n, 3) uint8 RGB palette
+    of every color used (the margin color first) and the (3, cell, cell)
+    uint8 palette indices of the sprites. Built once per size; the few
+    dozen colors let frames be stored and encoded as palette images.
+    """
+    size = cell * supersample
+    center = (size - 1) / 2
+    y, x = np.mgrid[0:size, 0:size]
+    distance = np.hypot(x - center, y - center)
+    radius = 0.4 * size
+    rim = distance <= radius
+    disc = distance <= radius - supersample
+
+    rgb = np.empty((3, size, size, 3))
+    for piece, color in enumerate(PIECE_RGB):
+        rgb[piece] = BOARD_COLOR
+        rgb[piece][rim] = EDGE_COLOR
+        rgb[piece][disc] = color
+    rgb = np.round(rgb.reshape(3, cell, supersample, cell, supersample, 3).mean(axis=(2, 4))).astype(np.uint8)
+
+    # The margin color goes first, so a zeroed canvas is the margin
+    colors = [MARGIN_COLOR] + [color for color in map(tuple, np.unique(rgb.reshape(-1, 3), axis=0).tolist())
+                               if color != MARGIN_COLOR]
+    index = {color: i for i, color in enumerate(colors)}
+    palette = np.array(colors, np.uint8)
+    sprites = np.array([index[color] for color in map(tuple, rgb.reshape(-1, 3).tolist())],
+                       np.uint8).reshape(3, cell, cell)
+    palette.flags.writeable = False
+    sprites.flags.writeable = False
+    return palette, sprites
+
+
+def render_board(board, canvas=None, cell=CELL_PIXELS):
+    """
+    Palette image (uint8 indices into the cell_sprites palette) of a board,
+    top row first. Boards are centered on a square canvas of `canvas` cells
+    (default the longer board side), so every frame of a game has the same
+    size whatever its rotation. to_rgb() converts it to RGB.
+    """
+    rows, cols = board.shape
+    canvas = canvas or max(rows, cols)
+    tiles = cell_sprites(cell)[1][board[::-1]]
+    image = np.zeros((canvas * cell, canvas * cell), np.uint8)
+    top, left = (canvas - rows) // 2 * cell, (canvas - cols) // 2 * cell
+    image[top:top + rows * cell, left:left + cols * cell] = tiles.transpose(0, 2, 1, 3).reshape(rows * cell, cols * cell)
+    return image
+
+
+def to_rgb(image, cell=CELL_PIXELS):
+    """RGB uint8 image of a render_board palette image."""
+    return cell_sprites(cell)[0][image]
+
+
+def settle_steps(board):
+    """Boards of a gravity settle, every falling piece dropping one row per step."""
+    board = board.copy()
+    while True:
+        # A piece above an empty cell falls; row 0 is the bottom
+        falling = (board[1:] != 0) & (board[:-1] == 0)
+        if not falling.any():
+            return
+        settled = board.copy()
+        settled[:-1][falling] = board[1:][falling]
+        settled[1:][falling] = 0
+        board = settled
+        yield board
+
+
+def game_frames(moves, config=DEFAULT_CONFIG):
+    """
+    (board, rotation_state, seconds) of every frame of a game given as
+    0-indexed columns: the empty board, every move, and for every rotation
+    the turned board followed by the steps of its gravity settle.
+    """
+    state = GameState(config)
+    yield state.to_array(), 0, MOVE_SECONDS
+    for col in moves:
+        state.drop(col)
+        board = state.to_array()
+        yield board, state.rotation_state, MOVE_SECONDS
+        if state.rotate_if_due() is not None:
+            turned = np.rot90(board, -1 if config.clockwise else 1)
+            yield turned, state.rotation_state, ROTATE_SECONDS
+            if config.gravity_after_rotation:
+                for settled in settle_steps(turned):
+                    yield settled, state.rotation_state, SETTLE_SECONDS
+        if state.is_over:
+            break
+
+
+def write_png(path, image, palette=None, level=6):
+    """
+    Write a PNG file (zlib only, no imaging library needed) of an RGB uint8
+    image, or of a uint8 palette image with its (n, 3) palette.
+    """
+    height, width = image.shape[:2]
+    # Every scanline starts with filter type 0 (none)
+    raw = np.zeros((height, image[0].size + 1), np.uint8)
+    raw[:, 1:] = image.reshape(height, -1)
+
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data))
+
+    color_type = 2 if palette is None else 3
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, color_type, 0, 0, 0)))
+        if palette is not None:
+            f.write(chunk(b'PLTE', np.asarray(palette, np.uint8).tobytes()))
+        f.write(chunk(b'IDAT', zlib.compress(raw.tobytes(), level)))
+        f.write(chunk(b'IEND', b''))
+
+
+def ansi_board(board, rotation_state=0, config=DEFAULT_CONFIG):
+    """Board as colored ANSI text, top row first, with column numbers below."""
+    lines = [rotation_label(rotation_state, config)]
+    lines.extend(''.join(row) + ANSI_RESET for row in ANSI_CELLS[board[::-1]].tolist())
+    lines.append(''.join(f"{col:>2}" for col in range(1, board.shape[1] + 1)))
+    return '\n'.join(lines)
+
+
+def _save_gif(path, frames, durations, palette):
+    try:
+        from PIL import Image
+    except ImportError:
+        raise RuntimeError("GIF output needs Pillow (pip install pillow)") from None
+    # The frames already are palette images, so nothing is quantized
+    images = []
+    for frame in frames:
+        image = Image.fromarray(frame, 'P')
+        image.putpalette(palette.tobytes())
+        images.append(image)
+    images[0].save(path, save_all=True, append_images=images[1:], loop=0, optimize=False,
+                   duration=[int(seconds * 1000) for seconds in durations])
+
+
+def _save_mp4(path, frames, durations, palette, fps=MP4_FPS):
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        raise RuntimeError("MP4 output needs ffmpeg on the PATH")
+    height, width = frames[0].shape
+    command = [ffmpeg, '-loglevel', 'error', '-y', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+               '-s', f'{width}x{height}', '-r', str(fps), '-i', '-', '-pix_fmt', 'yuv420p', path]
+    with subprocess.Popen(command, stdin=subprocess.PIPE) as process:
+        for frame, seconds in zip(frames, durations):
+            data = palette[frame].tobytes()
+            for _ in range(max(1, round(seconds * fps))):
+                process.stdin.write(data)
+        process.stdin.close()
+    if process.returncode:
+        raise RuntimeError(f"ffmpeg failed on {path} with exit code {process.returncode}")
+
+
+def render_game(moves, path, fmt=GIF, config=DEFAULT_CONFIG, cell=CELL_PIXELS):
+    """Render one game (0-indexed columns) to `path` in a format of FORMATS; returns the frame count."""
+    frames = list(game_frames(moves, config))
+    boards, rotations, durations = zip(*frames)
+    durations = durations[:-1] + (FINAL_SECONDS,)
+
+    if fmt == ANSI:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n\n'.join(ansi_board(board, rotation, config) for board, rotation in zip(boards, rotations)))
+            f.write('\n')
+        return len(frames)
+
+    canvas = max(config.rows, config.cols)
+    palette = cell_sprites(cell)[0]
+    images = [render_board(board, canvas, cell) for board in boards]
+    if fmt == PNG:
+        os.makedirs(path, exist_ok=True)
+        for index, image in enumerate(images):
+            write_png(os.path.join(path, f"frame-{index:04d}.png"), image, palette)
+    elif fmt == GIF:
+        _save_gif(path, images, durations, palette)
+    elif fmt == MP4:
+        _save_mp4(path, images, durations, palette)
+    else:
+        raise ValueError(f"Unknown format {fmt!r}, expected one of {FORMATS}")
+    return len(frames)
+
+
+def output_path(directory, index, fmt):
+    """Output file (or frame directory for PNG) of game `index`."""
+    name = f"game-{index:06d}"
+    return os.path.join(directory, name if fmt == PNG else f"{name}.{'ans' if fmt == ANSI else fmt}")
+
+
+@functools.lru_cache(maxsize=None)
+def _records(path):
+    return GameRecords(path)
+
+
+def _render_job(job):
+    """Process pool entry point: render a chunk of games of a record file."""
+    path, directory, fmt, indices, cell = job
+    records = _records(path)
+    return sum(render_game(records[index].moves, output_path(directory, index, fmt), fmt, records.config, cell)
+               for index in indices)
+
+
+def render_games(path, directory, fmt=GIF, indices=None, workers=None, cell=CELL_PIXELS, chunk=16):
+    """
+    Render games of a game record file (all by default) into `directory`,
+    `chunk` games per task across a process pool. Every worker maps the
+    record file itself, so only game indices are sent to it. Returns the
+    number of frames rendered.
+    """
+    os.makedirs(directory, exist_ok=True)
+    if indices is None:
+        indices = range(len(GameRecords(path)))
+    indices = list(indices)
+    jobs = [(path, directory, fmt, indices[start:start + chunk], cell) for start in range(0, len(indices), chunk)]
+    if workers == 1:
+        return sum(_render_job(job) for job in jobs)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return sum(executor.map(_render_job, jobs))
+
+
+def play_ansi(moves, config=DEFAULT_CONFIG, speed=1.0, out=sys.stdout):
+    """Animate a game in the terminal."""
+    for board, rotation, seconds in game_frames(moves, config):
+        out.write('\x1b[H\x1b[2J' + ansi_board(board, rotation, config) + '\n')
+        out.flush()
+        time.sleep(seconds / speed)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('records', help="game record file (see game_records.py)")
+    parser.add_argument('--output', default='renders', help="output directory")
+    parser.add_argument('--format', choices=FORMATS, default=GIF)
+    parser.add_argument('--games', type=int, nargs='*', metavar='INDEX', help="game indices (default all)")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--cell', type=int, default=CELL_PIXELS, help="pixels per cell")
+    parser.add_argument('--play', type=int, metavar='INDEX', help="animate one game in the terminal instead")
+    args = parser.parse_args()
+
+    if args.play is not None:
+        records = GameRecords(args.records)
+        play_ansi(records[args.play].moves, records.config)
+    else:
+        start = time.perf_counter()
+        frames = render_games(args.records, args.output, args.format, args.games, args.workers, args.cell)
+        elapsed = time.perf_counter() - start
+        games = len(args.games) if args.games else len(GameRecords(args.records))
+        print(f"Rendered {games} games ({frames} frames) to {args.output} in {elapsed:.1f}s "
+              f"({games / elapsed if elapsed else 0:.1f} games/s)")
@@ -0,0 +1,285 @@
+"""
+Connect 5 with Rotation - Search Player Module
+Contains a local negamax/alpha-beta player with iterative deepening
+"""
+import time
+from collections import namedtuple
+from functools import lru_cache
+
+from bitboard import Bitboard, WIN_LENGTH
+from config import DEFAULT_CONFIG
+from zobrist import ZobristHasher, TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+
+# Default wall-clock budget per move in seconds
+DEFAULT_TIME_BUDGET = 1.0
+
+# Score for a won position; wins found sooner score higher
+WIN_SCORE = 1_000_000
+
+# Evaluation weight for a window of WIN_LENGTH cells holding N own pieces and
+# no opponent pieces
+WINDOW_WEIGHTS = {1: 1, 2: 4, 3: 32, 4: 256}
+
+# Scores beyond this are wins/losses at a known distance
+MATE_THRESHOLD = WIN_SCORE - 10_000
+
+# How many nodes to search between two clock checks
+NODES_PER_CLOCK_CHECK = 512
+
+# Searcher shared by get_move_from_search calls, so the transposition table persists
+_default_search = None
+
+SearchResult = namedtuple('SearchResult', ['move', 'score', 'depth', 'nodes', 'elapsed'])
+
+
+class _SearchTimeout(Exception):
+    """Raised inside the search when the time budget runs out."""
+
+
+@lru_cache(maxsize=None)
+def _window_weights(length):
+    """WINDOW_WEIGHTS for `length`-cell windows, keyed the same by pieces missing."""
+    return {n: WINDOW_WEIGHTS.get(n + WIN_LENGTH - length, 1) for n in range(1, length)}
+
+
+@lru_cache(maxsize=None)
+def _window_masks(rows, cols, length=WIN_LENGTH):
+    """All `length`-cell windows of a board geometry as bitboard masks."""
+    stride = rows + 1
+    span = length - 1
+    windows = []
+    for dr, dc in ((0, 1), (1, 0), (1, 1), (-1, 1)):
+        for r in range(rows):
+            for c in range(cols):
+                end_r, end_c = r + span * dr, c + span * dc
+                if not (0 <= end_r < rows and end_c < cols):
+                    continue
+                mask = 0
+                for i in range(length):
+                    mask |= 1 << ((c + i * dc) * stride + r + i * dr)
+                windows.append(mask)
+    return tuple(windows)
+
+
+@lru_cache(maxsize=None)
+def _center_order(cols):
+    """Columns sorted center-first."""
+    center = (cols - 1) / 2
+    return tuple(sorted(range(cols), key=lambda c: abs(c - center)))
+
+
+def evaluate(bitboard, player, length=WIN_LENGTH):
+    """
+    Static evaluation from the point of view of `player`: weighted count of
+    windows that can still become a line of `length` for one side.
+    """
+    own = bitboard.masks[player - 1]
+    opp = bitboard.masks[2 - player]
+    weights = WINDOW_WEIGHTS if length == WIN_LENGTH else _window_weights(length)
+    score = 0
+    for window in _window_masks(bitboard.rows, bitboard.cols, length):
+        mine = own & window
+        theirs = opp & window
+        if mine and not theirs:
+            score += weights[bin(mine).count('1')]
+        elif theirs and not mine:
+            score -= weights[bin(theirs).count('1')]
+    return score
+
+
+class AlphaBetaSearch:
+    """
+    Negamax with alpha-beta pruning, iterative deepening under a wall-clock
+    budget, center-first move ordering and killer/history heuristics.
+    The search plays the rotation step of `config` after every
+    rotation_interval-th move, so it sees rotation wins and losses coming.
+    Positions are cached in a transposition table keyed by Zobrist hash;
+    the table is kept between searches of the same instance.
+    """
+
+    def __init__(self, config=DEFAULT_CONFIG, table=None):
+        self.config = config
+        self.rotation_interval = config.rotation_interval
+        self.hasher = ZobristHasher(config.rotation_interval)
+        self.table = table if table is not None else TranspositionTable()
+        self.killers = {}
+        self.history = {}
+        self.nodes = 0
+        self.deadline = None
+
+    def search(self, board, player, turn_number, time_budget=DEFAULT_TIME_BUDGET, max_depth=64, rotation_state=0):
+        """
+        Search the position for the side `player` to move.
+        turn_number is 1-based, as passed to the LLM players.
+        Returns a SearchResult for the deepest completed iteration.
+        """
+        start = time.perf_counter()
+        self.deadline = start + time_budget
+        self.nodes = 0
+        self.killers = {}
+        self.history = {}
+
+        root = Bitboard.from_array(board)
+        # Without a completed iteration the move ordering's first choice is played
+        moves = self._ordered_moves(root, 0, player)
+        if not moves:
+            return SearchResult(None, 0, 0, 0, 0.0)
+
+        turn = turn_number - 1
+        root_hash = self.hasher.hash_bitboard(root, turn, rotation_state)
+        best_move, best_score, completed = moves[0], 0, 0
+        for depth in range(1, max_depth + 1):
+            try:
+                move, score = self._search_root(root.copy(), depth, player, turn, rotation_state, root_hash, best_move)
+            except _SearchTimeout:
+                break
+            best_move, best_score, completed = move, score, depth
+            # A forced result will not change with more depth
+            if abs(score) >= WIN_SCORE - max_depth:
+                break
+            if time.perf_counter() >= self.deadline:
+                break
+
+        return SearchResult(best_move, best_score, completed, self.nodes, time.perf_counter() - start)
+
+    def _search_root(self, bitboard, depth, player, turn, rotation, h, previous_best):
+        """Search all root moves at a fixed depth, trying the previous best first."""
+        alpha, beta = -WIN_SCORE - 1, WIN_SCORE + 1
+        moves = self._ordered_moves(bitboard, 0, player, previous_best)
+
+        best_move = moves[0]
+        for col in moves:
+            score = self._score_move(bitboard, col, depth, alpha, beta, 0, turn, rotation, h, player)
+            if score > alpha:
+                alpha = score
+                best_move = col
+        return best_move, alpha
+
+    def _ordered_moves(self, bitboard, ply, player, best=None):
+        """Order moves: hash/previous best, killers, history score, then center-first."""
+        moves = bitboard.valid_moves()
+        center = _center_order(bitboard.cols)
+        rank = {col: i for i, col in enumerate(center)}
+        killers = self.killers.get(ply, ())
+        return sorted(moves, key=lambda col: (
+            col != best,
+            col not in killers,
+            -self.history.get((player, col), 0),
+            rank[col],
+        ))
+
+    def _score_move(self, bitboard, col, depth, alpha, beta, ply, turn, rotation, h, player):
+        """Play `col`, score the resulting position for `player`, and take the move back."""
+        self.nodes += 1
+        if self.nodes % NODES_PER_CLOCK_CHECK == 0 and time.perf_counter() >= self.deadline:
+            raise _SearchTimeout()
+
+        shape = (bitboard.rows, bitboard.cols)
+        config = self.config
+        row = bitboard.drop(col, player)
+        if bitboard.has_five(player, config.win_length):
+            bitboard.undrop(col, player)
+            return WIN_SCORE - ply
+        if bitboard.is_full():
+            bitboard.undrop(col, player)
+            return 0
+
+        h = self.hasher.update_drop(h, shape, row, col, player, turn)
+        turn += 1
+        if self.rotation_interval and turn % self.rotation_interval == 0:
+            # Rotation is not reversible, so keep a snapshot to restore from
+            snapshot = (bitboard.rows, bitboard.cols, list(bitboard.masks), list(bitboard.heights))
+            bitboard.rotate(config.clockwise, config.gravity_after_rotation)
+            winners = bitboard.winners(config.win_length)
+            if winners:
+                score = 0 if len(winners) == 2 else (WIN_SCORE - ply if player in winners else -WIN_SCORE + ply)
+            else:
+                # Every cell moved, so the hash is recomputed for the new geometry
+                h = self.hasher.hash_bitboard(bitboard, turn, rotation + 1)
+                score = -self._negamax(bitboard, depth - 1, -beta, -alpha, ply + 1, turn, rotation + 1, h, 3 - player)
+            bitboard.rows, bitboard.cols, bitboard.masks, bitboard.heights = snapshot
+        else:
+            score = -self._negamax(bitboard, depth - 1, -beta, -alpha, ply + 1, turn, rotation, h, 3 - player)
+
+        bitboard.undrop(col, player)
+        return score
+
+    def _negamax(self, bitboard, depth, alpha, beta, ply, turn, rotation, h, player):
+        """Negamax value of the position for the side to move (`player`)."""
+        if depth <= 0:
+            return evaluate(bitboard, player, self.config.win_length)
+
+        hash_move = None
+        entry = self.table.probe(h)
+        if entry is not None:
+            stored_depth, stored_score, flag, hash_move = entry
+            if stored_depth >= depth:
+                stored_score = _score_from_table(stored_score, ply)
+                if flag == EXACT:
+                    return stored_score
+                if flag == LOWER_BOUND:
+                    alpha = max(alpha, stored_score)
+                elif flag == UPPER_BOUND:
+                    beta = min(beta, stored_score)
+                if alpha >= beta:
+                    return stored_score
+
+        moves = self._ordered_moves(bitboard, ply, player, hash_move)
+        if not moves:
+            return 0
+
+        original_alpha = alpha
+        best_move = moves[0]
+        for col in moves:
+            score = self._score_move(bitboard, col, depth, alpha, beta, ply, turn, rotation, h, player)
+            if score > alpha:
+                alpha = score
+                best_move = col
+            if alpha >= beta:
+                # Remember quiet refutations for move ordering
+                killers = self.killers.setdefault(ply, [])
+                if col not in killers:
+                    killers.insert(0, col)
+                    del killers[2:]
+                self.history[(player, col)] = self.history.get((player, col), 0) + depth * depth
+                break
+
+        if alpha >= beta:
+            flag = LOWER_BOUND
+        elif alpha > original_alpha:
+            flag = EXACT
+        else:
+            flag = UPPER_BOUND
+        self.table.store(h, depth, _score_to_table(alpha, ply), flag, best_move)
+        return alpha
+
+
+def _score_to_table(score, ply):
+    """Store win/loss scores relative to the node so they stay valid at other plies."""
+    if score > MATE_THRESHOLD:
+        return score + ply
+    if score < -MATE_THRESHOLD:
+        return score - ply
+    return score
+
+
+def _score_from_table(score, ply):
+    """Convert a stored win/loss score back to the distance from the root."""
+    if score > MATE_THRESHOLD:
+        return score - ply
+    if score < -MATE_THRESHOLD:
+        return score + ply
+    return score
+
+
+def get_move_from_search(board, player, turn_number, rotation_state=0, time_budget=DEFAULT_TIME_BUDGET, max_depth=64):
+    """
+    Get a move from the local alpha-beta search.
+    Same call signature as get_move_from_gpt; returns a 0-indexed column or
+    None if there is no valid move.
+    """
+    global _default_search
+    if _default_search is None:
+        _default_search = AlphaBetaSearch()
+    result = _default_search.search(board, player, turn_number, time_budget, max_depth, rotation_state)
+    return result.move
@@ -0,0 +1,293 @@
+"""
+Connect 5 with Rotation - Self-Play Module
+Generates training samples by self-play of local players across worker
+processes, streamed through bounded queues to a single writer of fixed-size
+.npy shards that can be memory-mapped for training
+"""
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import queue
+import random
+import time
+
+import numpy as np
+
+from config import DEFAULT_CONFIG, VARIANTS, get_config
+from game_state import GameState
+from players import PLAYERS, get_player
+from symmetry import NONE, POLICIES, mirrors
+
+MANIFEST = 'manifest.json'
+
+# Samples per shard file and games in flight per worker
+SHARD_SIZE = 1 << 16
+QUEUE_GAMES = 4
+
+# Seconds between progress lines of the writer
+REPORT_INTERVAL = 10.0
+
+
+def sample_dtype(config=DEFAULT_CONFIG):
+    """
+    Structured dtype of one training sample. Boards of both orientations are
+    stored in the bottom-left corner of a size x size square (size = the
+    longer side), like batch_engine.BatchGame:
+
+    board     int8 (size, size): 0 empty, 1/2 pieces, row 0 at the bottom
+    player    side to move (1 or 2)
+    phase     moves played since the last rotation (turn % rotation_interval)
+    rotation  rotation state % 4 (its parity gives the board shape)
+    policy    float32 (size,): share of search visits per column, or the
+              played move for players without visit counts
+    outcome   final result for the side to move: 1 win, 0 draw, -1 loss
+    """
+    size = max(config.rows, config.cols)
+    return np.dtype([
+        ('board', 'i1', (size, size)),
+        ('player', 'i1'),
+        ('phase', 'i1'),
+        ('rotation', 'i1'),
+        ('policy', '<f4', (size,)),
+        ('outcome', 'i1'),
+    ])
+
+
+def _policy(move_fn, col, size):
+    """Visit shares of the last search of a move function, or a one-hot of the played move."""
+    policy = np.zeros(size, np.float32)
+    visits = getattr(getattr(move_fn, 'last_result', None), 'visits', None)
+    if visits:
+        total = sum(visits.values())
+        for move, count in visits.items():
+            policy[move] = count / total
+    else:
+        policy[col] = 1.0
+    return policy
+
+
+def play_selfplay_game(players, config=DEFAULT_CONFIG):
+    """
+    Play one game between two move functions {1: fn, 2: fn} and return its
+    samples as a sample_dtype array, one per move played.
+    """
+    dtype = sample_dtype(config)
+    interval = config.rotation_interval
+    samples = []
+    state = GameState(config)
+    while not state.is_over:
+        board = state.to_array()
+        player = state.current_player
+        col = players[player](board, player, state.turn + 1, state.rotation_state)
+        # Same fallback as the tournament
+        if col is None or not state.can_play(col):
+            moves = state.valid_moves()
+            if not moves:
+                break
+            col = random.choice(moves)
+
+        sample = np.zeros((), dtype)
+        rows, cols = board.shape
+        sample['board'][:rows, :cols] = board
+        sample['player'] = player
+        sample['phase'] = state.turn % interval if interval else 0
+        sample['rotation'] = state.rotation_state % 4
+        sample['policy'] = _policy(players[player], col, dtype['policy'].shape[0])
+        samples.append(sample)
+        state.make(col)
+
+    samples = np.array(samples, dtype).reshape(-1)
+    winners = state.result or set()
+    if len(winners) == 1:
+        samples['outcome'] = np.where(samples['player'] == next(iter(winners)), 1, -1)
+    return samples
+
+
+def mirror_samples(samples, config=DEFAULT_CONFIG):
+    """Left-right mirror images of samples: the board columns and the policy are reversed."""
+    mirrored = samples.copy()
+    odd = samples['rotation'] % 2 == 1
+    for parity, (rows, cols) in ((False, config.shape(0)), (True, config.shape(1))):
+        group = odd == parity
+        mirrored['board'][group, :rows, :cols] = samples['board'][group, :rows, cols - 1::-1]
+        mirrored['policy'][group, :cols] = samples['policy'][group, cols - 1::-1]
+    return mirrored
+
+
+def position_hashes(samples):
+    """64-bit hash of every sample's position (board, side to move, phase and rotation)."""
+    positions = np.concatenate([
+        samples['board'].reshape(len(samples), -1),
+        np.stack([samples['player'], samples['phase'], samples['rotation']], axis=1),
+    ], axis=1)
+    return [int.from_bytes(hashlib.blake2b(row.tobytes(), digest_size=8).digest(), 'little') for row in positions]
+
+
+def _worker(index, names, games, config, seed, samples_queue):
+    """Worker process: play `games` games and put one message per game on the queue."""
+    random.seed(seed)
+    players = {1: get_player(names[0], config=config), 2: get_player(names[1], config=config)}
+    start = time.perf_counter()
+    produced = 0
+    # Players may print their reasoning; keep worker output clean
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(games):
+            samples = play_selfplay_game(players, config)
+            produced += len(samples)
+            samples_queue.put((index, samples, produced, time.perf_counter() - start))
+    samples_queue.put((index, None, produced, time.perf_counter() - start))
+
+
+class ShardWriter:
+    """
+    Writes samples to `directory` as shard-00000.npy, shard-00001.npy, ...
+    of exactly `shard_size` samples each (the last one may be shorter), and
+    a manifest listing them. Only one shard is held in memory.
+    """
+
+    def __init__(self, directory, config=DEFAULT_CONFIG, shard_size=SHARD_SIZE):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.config = config
+        self.shard_size = shard_size
+        self.buffer = np.zeros(shard_size, sample_dtype(config))
+        self.filled = 0
+        self.shards = []
+
+    def write(self, samples):
+        while len(samples):
+            take = min(len(samples), self.shard_size - self.filled)
+            self.buffer[self.filled:self.filled + take] = samples[:take]
+            self.filled += take
+            samples = samples[take:]
+            if self.filled == self.shard_size:
+                self._write_shard()
+
+    def _write_shard(self):
+        name = f"shard-{len(self.shards):05d}.npy"
+        np.save(os.path.join(self.directory, name), self.buffer[:self.filled])
+        self.shards.append({'file': name, 'samples': self.filled})
+        self.filled = 0
+
+    def close(self, **info):
+        """Write the last shard and the manifest; `info` is added to the manifest."""
+        if self.filled:
+            self._write_shard()
+        manifest = dict(info, config=list(self.config), shard_size=self.shard_size, shards=self.shards,
+                        samples=sum(shard['samples'] for shard in self.shards))
+        with open(os.path.join(self.directory, MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
+
+def load_shards(directory):
+    """Memory-mapped sample arrays of every shard listed in a directory's manifest."""
+    with open(os.path.join(directory, MANIFEST), encoding='utf-8') as f:
+        manifest = json.load(f)
+    return [np.load(os.path.join(directory, shard['file']), mmap_mode='r') for shard in manifest['shards']]
+
+
+def run_selfplay(directory, names, games, workers=None, config=DEFAULT_CONFIG, seed=0, augment=NONE,
+                 dedup=False, shard_size=SHARD_SIZE, queue_games=QUEUE_GAMES, report=True):
+    """
+    Self-play `games` games of players names[0] (first) vs names[1] across
+    `workers` processes and write their samples to shards in `directory`.
+    Every worker may have at most `queue_games` finished games waiting for
+    the writer, so memory stays flat however many games are played. `augment`
+    is a symmetry policy: mirror images are added where it folds them (see
+    symmetry.py). With `dedup` only the first sample of every position is
+    kept. Returns the manifest, which includes per-worker samples/sec.
+    """
+    workers = workers or os.cpu_count() or 1
+    base, extra = divmod(games, workers)
+    context = multiprocessing.get_context()
+    samples_queue = context.Queue(maxsize=queue_games * workers)
+    processes = [
+        context.Process(target=_worker, args=(i, names, base + (i < extra), config, seed + i, samples_queue))
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    writer = ShardWriter(directory, config, shard_size)
+    seen = set() if dedup else None
+    rates = {}
+    written = duplicates = 0
+    running = workers
+    start = last_report = time.perf_counter()
+    try:
+        while running:
+            try:
+                index, samples, produced, elapsed = samples_queue.get(timeout=1.0)
+            except queue.Empty:
+                if not any(process.is_alive() for process in processes):
+                    raise RuntimeError("Self-play workers exited without finishing") from None
+                continue
+            rates[index] = (produced, elapsed)
+            if samples is None:
+                running -= 1
+                continue
+
+            if mirrors(config, augment):
+                samples = np.concatenate([samples, mirror_samples(samples, config)])
+            if seen is not None:
+                keep = []
+                for i, h in enumerate(position_hashes(samples)):
+                    if h not in seen:
+                        seen.add(h)
+                        keep.append(i)
+                duplicates += len(samples) - len(keep)
+                samples = samples[keep]
+            writer.write(samples)
+            written += len(samples)
+
+            now = time.perf_counter()
+            if report and now - last_report >= REPORT_INTERVAL:
+                last_report = now
+                print(f"{written} samples written ({written / (now - start):.0f}/s), {duplicates} duplicates")
+    finally:
+        for process in processes:
+            process.join(timeout=0 if running else None)
+            if process.is_alive():
+                process.terminate()
+
+    elapsed = time.perf_counter() - start
+    worker_rates = {index: produced / seconds if seconds else 0.0 for index, (produced, seconds) in rates.items()}
+    return writer.close(
+        players=list(names),
+        games=games,
+        augment=augment,
+        dedup=dedup,
+        duplicates=duplicates,
+        seconds=elapsed,
+        samples_per_second=written / elapsed if elapsed else 0.0,
+        worker_samples_per_second=[worker_rates.get(i, 0.0) for i in range(workers)],
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('directory', help="output directory for the shards and manifest")
+    parser.add_argument('--players', nargs=2, choices=sorted(PLAYERS), default=['mcts', 'mcts'],
+                        metavar=('FIRST', 'SECOND'))
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--augment', choices=POLICIES, default=NONE,
+                        help="add mirror images of the samples (see symmetry.py)")
+    parser.add_argument('--dedup', action='store_true', help="keep only the first sample of every position")
+    parser.add_argument('--shard-size', type=int, default=SHARD_SIZE, help="samples per shard file")
+    parser.add_argument('--queue-games', type=int, default=QUEUE_GAMES, help="finished games queued per worker")
+    parser.add_argument('--variant', choices=sorted(VARIANTS), default='default')
+    args = parser.parse_args()
+
+    manifest = run_selfplay(args.directory, args.players, args.games, args.workers, get_config(args.variant),
+                            args.seed, args.augment, args.dedup, args.shard_size, args.queue_games)
+    print(f"{manifest['samples']} samples in {len(manifest['shards'])} shards, {manifest['seconds']:.1f}s "
+          f"({manifest['samples_per_second']:.0f} samples/s, {manifest['duplicates']} duplicates dropped)")
+    for index, rate in enumerate(manifest['worker_samples_per_second']):
+        print(f"  worker {index}: {rate:.0f} samples/s")
@@ -0,0 +1,192 @@
+"""
+Connect 5 with Rotation - Speculative Prefetch Module
+While one LLM is choosing its move, sends the opponent's requests for the
+most likely replies so the opponent's answer is often ready when needed
+"""
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import ai_players
+from bitboard import Bitboard
+from board import get_valid_moves, drop_and_check, rotate_if_due
+from config import DEFAULT_CONFIG
+from llm_record import request_key
+from prompts import count_tokens
+from search_player import evaluate, WIN_SCORE
+
+# Which provider plays each side in play_gpt_vs_claude
+PROVIDERS = {1: 'gpt', 2: 'claude'}
+
+
+def heuristic_ranking(board, player, turn_number, rotation_state=0, config=DEFAULT_CONFIG):
+    """
+    Valid moves of `player` ranked by a one-ply look-ahead: wins first, then
+    the static evaluation after the drop (and the rotation, when one is due).
+    """
+    scores = {}
+    for col in get_valid_moves(board, rotation_state):
+        after = board.copy()
+        _, result = drop_and_check(after, col, player, rotation_state, config)
+        if result is not None:
+            scores[col] = WIN_SCORE if result else 0
+            continue
+        after, _, winners = rotate_if_due(after, turn_number, rotation_state, config)
+        if winners:
+            scores[col] = WIN_SCORE if winners == {player} else -WIN_SCORE
+            continue
+        scores[col] = evaluate(Bitboard.from_array(after), player, config.win_length)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+def cache_ranking(players, fallback=heuristic_ranking):
+    """
+    Ranking from the moves the llm_cache.CachedPlayer of the side to move
+    (`players` maps each side to one) holds for the position, most frequent
+    first, followed by the rest of `fallback`'s ranking. The cache is only
+    peeked at, so speculative lookups do not count in its hit rate.
+    """
+    def rank(board, player, turn_number, rotation_state=0, config=DEFAULT_CONFIG):
+        counts = Counter(players[player].stored_moves(board, player, turn_number, rotation_state))
+        cached = [move for move, _ in counts.most_common()]
+        ranking = fallback(board, player, turn_number, rotation_state, config)
+        return cached + [move for move in ranking if move not in counts]
+    return rank
+
+
+class _Prefetch:
+    """One speculative request in flight."""
+    __slots__ = ('generation', 'future', 'tokens', 'started', 'finished')
+
+    def __init__(self, generation, tokens):
+        self.generation = generation
+        self.tokens = tokens
+        self.started = time.perf_counter()
+        self.finished = None
+        self.future = None
+
+
+class Speculator:
+    """
+    Transport wrapper for play_gpt_vs_claude. Before a side is asked for its
+    move, prefetch() sends the opponent's requests for the `k` most likely
+    replies (ranked by `rank`). When the opponent's real request matches a
+    prefetched one, its response is used instead of a new call; the others
+    are cancelled if not started yet, or their responses are dropped.
+
+    `budget` caps the extra prompt tokens spent on speculation per game
+    (None for no cap). Prompt tokens of requests that were not used are
+    counted in `wasted_tokens`, and `saved_seconds` adds up how much earlier
+    each used response was ready than a fresh request would have been.
+    Replies are played out with the rules of `config`.
+    """
+
+    def __init__(self, k=2, budget=None, rank=heuristic_ranking, inner=None, config=DEFAULT_CONFIG):
+        self.k = k
+        self.config = config
+        self.budget = budget
+        self.rank = rank
+        self.inner = inner or ai_players.get_transport()
+        self.pending = {}
+        self.executor = ThreadPoolExecutor(max_workers=max(1, 2 * k))
+        self._lock = threading.Lock()
+        self.issued = 0
+        self.hits = 0
+        self.misses = 0
+        self.spent_tokens = 0
+        self.wasted_tokens = 0
+        self.saved_seconds = 0.0
+
+    def setup(self, provider):
+        self.inner.setup(provider)
+
+    def send(self, provider, request):
+        key = request_key(provider, request)
+        with self._lock:
+            prefetch = self.pending.pop(key, None)
+        if prefetch is None:
+            self.misses += 1
+            return self.inner.send(provider, request)
+
+        asked = time.perf_counter()
+        try:
+            return prefetch.future.result()
+        finally:
+            self.hits += 1
+            # A fresh request sent now would have taken as long as the prefetched one did
+            duration = prefetch.finished - prefetch.started
+            self.saved_seconds += max(0.0, min(duration, asked - prefetch.started))
+
+    def _send_prefetch(self, prefetch, provider, request):
+        try:
+            return self.inner.send(provider, request)
+        finally:
+            prefetch.finished = time.perf_counter()
+
+    def prefetch(self, board, player, turn_number, rotation_state, prompt):
+        """
+        Called before `player` is asked for move `turn_number`: send the
+        opponent's requests for the replies to its top-k moves. `prompt` is
+        the game's PromptBuilder (left unchanged).
+        """
+        self._discard(before=turn_number - 1)
+        opponent = 3 - player
+        provider = PROVIDERS[opponent]
+        config = self.config
+        for col in self.rank(board, player, turn_number, rotation_state, config)[:self.k]:
+            # Position and prompt the opponent sees if `player` plays col
+            after = board.copy()
+            _, result = drop_and_check(after, col, player, rotation_state, config)
+            if result is not None:
+                continue
+            after, after_rotation, winners = rotate_if_due(after, turn_number, rotation_state, config)
+            if winners:
+                continue
+            builder = prompt.fork()
+            builder.add_move(player, col + 1)
+            request = ai_players.build_request(provider, after, opponent, turn_number + 1, after_rotation, prompt=builder)
+
+            tokens = sum(count_tokens(message['content'], provider) for message in request['messages'])
+            tokens += count_tokens(request.get('system', ''), provider)
+            if self.budget is not None and self.spent_tokens + tokens > self.budget:
+                break
+            key = request_key(provider, request)
+            with self._lock:
+                if key in self.pending:
+                    continue
+                prefetch = _Prefetch(turn_number, tokens)
+                prefetch.future = self.executor.submit(self._send_prefetch, prefetch, provider, request)
+                self.pending[key] = prefetch
+            self.issued += 1
+            self.spent_tokens += tokens
+
+    def _discard(self, before=None):
+        """Drop prefetched requests made before a generation (all if None)."""
+        with self._lock:
+            stale = [key for key, prefetch in self.pending.items() if before is None or prefetch.generation < before]
+            for key in stale:
+                prefetch = self.pending.pop(key)
+                if prefetch.future.cancel():
+                    # Never sent
+                    self.issued -= 1
+                    self.spent_tokens -= prefetch.tokens
+                else:
+                    self.wasted_tokens += prefetch.tokens
+
+    def close(self):
+        """Discard what is still pending and stop the worker threads."""
+        self._discard()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        """Speculation counters for one game."""
+        return {
+            'issued': self.issued,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / (self.hits + self.misses) if self.hits + self.misses else 0.0,
+            'spent_tokens': self.spent_tokens,
+            'wasted_tokens': self.wasted_tokens,
+            'saved_seconds': self.saved_seconds,
+        }
@@ -0,0 +1,239 @@
+"""
+Connect 5 with Rotation - Symmetry Module
+Contains canonical position keys that fold equivalent positions together,
+with the move transform back to the actual board, and a table wrapper that
+applies them to any position-keyed cache
+"""
+import argparse
+import hashlib
+import random
+from collections import namedtuple
+
+from bitboard import Bitboard
+from config import DEFAULT_CONFIG, VARIANTS, get_config
+from game_state import GameState
+
+# Mirror policies. The rotation state never matters for the rest of the game
+# (the board shape already tells the orientation), so every policy folds it.
+# The left-right mirror image of a position is only equivalent while no
+# rotation is left to play: mirroring and then rotating clockwise gives the
+# mirror image of rotating counterclockwise, so in a rotating variant the two
+# games part ways at the next rotation
+NONE = 'none'      # fold the rotation state only
+EXACT = 'exact'    # also fold mirror images, in variants without rotation
+ALWAYS = 'always'  # also fold mirror images in rotating variants (approximate)
+
+POLICIES = (NONE, EXACT, ALWAYS)
+
+
+class Canonical(namedtuple('Canonical', ['key', 'mirrored', 'cols'])):
+    """
+    Canonical form of a position. `key` is a tuple of ints (geometry, both
+    player masks of the canonical board, rotation phase and side to move);
+    `mirrored` tells if the canonical board is the mirror image of the
+    actual one, and moves are mapped between the two with to_canonical()
+    and to_board() (the mirror is its own inverse).
+    """
+    __slots__ = ()
+
+    def to_canonical(self, col):
+        """Column of the canonical board for a column of the actual board."""
+        return self.cols - 1 - col if self.mirrored and col is not None else col
+
+    to_board = to_canonical
+
+    def map_moves(self, value):
+        """Map a move, or a list or tuple of moves, with to_canonical (or to_board)."""
+        if isinstance(value, (list, tuple)):
+            return type(value)(self.to_canonical(col) for col in value)
+        return self.to_canonical(value)
+
+    def digest(self):
+        """The key as a hex string, for tables keyed by strings (e.g. llm_cache.DiskTier)."""
+        return hashlib.blake2b(repr(self.key).encode(), digest_size=16).hexdigest()
+
+
+def mirrors(config=DEFAULT_CONFIG, policy=EXACT):
+    """Check if a policy folds mirror images in this variant."""
+    return policy == ALWAYS or (policy == EXACT and not config.rotation_interval)
+
+
+def mirror_masks(masks, rows, cols):
+    """Player masks of the left-right mirror image of a bitboard."""
+    stride = rows + 1
+    column = (1 << rows) - 1
+    mirrored = []
+    for mask in masks:
+        out = 0
+        for c in range(cols):
+            out |= ((mask >> (c * stride)) & column) << ((cols - 1 - c) * stride)
+        mirrored.append(out)
+    return mirrored
+
+
+def canonical_bitboard(bitboard, turn, config=DEFAULT_CONFIG, policy=EXACT):
+    """Canonical form of a Bitboard position reached after `turn` moves."""
+    rows, cols = bitboard.rows, bitboard.cols
+    interval = config.rotation_interval
+    state = (turn % interval if interval else 0, turn % 2)
+    masks = tuple(bitboard.masks)
+    mirrored = False
+    if mirrors(config, policy):
+        flipped = tuple(mirror_masks(masks, rows, cols))
+        if flipped < masks:
+            masks, mirrored = flipped, True
+    return Canonical((rows, cols) + masks + state, mirrored, cols)
+
+
+def canonical(board, turn, config=DEFAULT_CONFIG, policy=EXACT):
+    """Canonical form of a NumPy board position reached after `turn` moves."""
+    return canonical_bitboard(Bitboard.from_array(board), turn, config, policy)
+
+
+def canonical_board(board, turn, config=DEFAULT_CONFIG, policy=EXACT):
+    """(canonical NumPy board, Canonical) for a position; the board may be a view."""
+    form = canonical(board, turn, config, policy)
+    return (board[:, ::-1] if form.mirrored else board), form
+
+
+class SymmetryStats:
+    """
+    Counts distinct positions seen by a canonicalizing table, before and
+    after folding, to show how much smaller the table is.
+    """
+
+    def __init__(self):
+        self.raw = set()
+        self.folded = set()
+        self.mirrored = 0
+        self.lookups = 0
+        self.hits = 0
+
+    def record(self, raw_key, form):
+        self.raw.add(raw_key)
+        self.folded.add(form.key)
+        self.mirrored += form.mirrored
+
+    def summary(self):
+        raw, folded = len(self.raw), len(self.folded)
+        return {
+            'positions': raw,
+            'canonical_positions': folded,
+            'reduction': 1 - folded / raw if raw else 0.0,
+            'mirrored': self.mirrored,
+            'lookups': self.lookups,
+            'hits': self.hits,
+            'hit_rate': self.hits / self.lookups if self.lookups else 0.0,
+        }
+
+
+def _raw_key(bitboard, turn, rotation_state):
+    return (bitboard.rows, bitboard.cols, *bitboard.masks, turn, rotation_state % 4)
+
+
+class CanonicalTable:
+    """
+    Position-keyed table storing every position under its canonical key.
+    `table` is any store with get(key)/put(key, value), such as
+    llm_cache.MoveCache, or a dict (the default). Values are moves or
+    lists/tuples of moves (0-indexed columns) of the actual board; they are
+    stored in the canonical frame and mapped back on lookup. With
+    `string_keys` the store gets Canonical.digest() strings.
+    """
+
+    def __init__(self, table=None, config=DEFAULT_CONFIG, policy=EXACT, string_keys=False):
+        self.table = {} if table is None else table
+        self.config = config
+        self.policy = policy
+        self.string_keys = string_keys
+        self.stats = SymmetryStats()
+
+    def _key(self, form):
+        return form.digest() if self.string_keys else form.key
+
+    def _form(self, board, turn, rotation_state):
+        bitboard = board if isinstance(board, Bitboard) else Bitboard.from_array(board)
+        form = canonical_bitboard(bitboard, turn, self.config, self.policy)
+        self.stats.record(_raw_key(bitboard, turn, rotation_state), form)
+        return form
+
+    def get(self, board, turn, rotation_state=0, default=None):
+        """Stored value for a position (NumPy board or Bitboard after `turn` moves), or `default`."""
+        form = self._form(board, turn, rotation_state)
+        self.stats.lookups += 1
+        value = self.table.get(self._key(form))
+        if value is None:
+            return default
+        self.stats.hits += 1
+        return form.map_moves(value)
+
+    def put(self, board, turn, value, rotation_state=0):
+        """Store a value for a position."""
+        form = self._form(board, turn, rotation_state)
+        key = self._key(form)
+        value = form.map_moves(value)
+        if isinstance(self.table, dict):
+            self.table[key] = value
+        else:
+            self.table.put(key, value)
+
+
+def table_reduction(positions, config=DEFAULT_CONFIG):
+    """
+    Reduction in distinct keys for each policy over an iterable of
+    (bitboard, turn, rotation_state) positions: {policy: SymmetryStats.summary()}.
+    """
+    stats = {policy: SymmetryStats() for policy in POLICIES}
+    for bitboard, turn, rotation_state in positions:
+        raw = _raw_key(bitboard, turn, rotation_state)
+        for policy, policy_stats in stats.items():
+            policy_stats.record(raw, canonical_bitboard(bitboard, turn, config, policy))
+    return {policy: policy_stats.summary() for policy, policy_stats in stats.items()}
+
+
+def enumerate_positions(depth, config=DEFAULT_CONFIG):
+    """Every position reached by up to `depth` moves from the empty board (with repeats)."""
+    state = GameState(config)
+
+    def walk(remaining):
+        yield state.bitboard.copy(), state.turn, state.rotation_state
+        if remaining == 0 or state.is_over:
+            return
+        for col in state.valid_moves():
+            state.make(col)
+            yield from walk(remaining - 1)
+            state.unmake()
+
+    return walk(depth)
+
+
+def random_game_positions(games, config=DEFAULT_CONFIG, seed=0):
+    """Every position of `games` uniformly random games."""
+    rng = random.Random(seed)
+    for _ in range(games):
+        state = GameState(config)
+        while True:
+            yield state.bitboard.copy(), state.turn, state.rotation_state
+            if state.is_over:
+                break
+            state.make(rng.choice(state.valid_moves()))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--depth', type=int, default=None, help="enumerate every position to this depth")
+    parser.add_argument('--games', type=int, default=1000, help="otherwise use the positions of random games")
+    parser.add_argument('--variant', choices=sorted(VARIANTS), default='default')
+    args = parser.parse_args()
+
+    config = get_config(args.variant)
+    if args.depth is not None:
+        positions = enumerate_positions(args.depth, config)
+        print(f"All positions up to depth {args.depth}, variant {args.variant}")
+    else:
+        positions = random_game_positions(args.games, config)
+        print(f"Positions of {args.games} random games, variant {args.variant}")
+    print(f"{'policy':<8} {'positions':>10} {'canonical':>10} {'reduction':>10} {'mirrored':>9}")
+    for policy, summary in table_reduction(positions, config).items():
+        print(f"{policy:<8} {summary['positions']:>10} {summary['canonical_positions']:>10} "
+              f"{summary['reduction']:>10.1%} {summary['mirrored']:>9}")
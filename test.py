@@ -1,10 +1,8 @@
 import numpy as np
 
+from board import ROW_COUNT, COLUMN_COUNT
 from visualization import draw_board
 
-ROW_COUNT = 8
-COLUMN_COUNT = 9
-
 def create_board():
     board = np.zeros((ROW_COUNT, COLUMN_COUNT), dtype=int)
     return board
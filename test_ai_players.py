@@ -0,0 +1,53 @@
+"""
+Tests of the LLM players' fallbacks, through a fake transport
+"""
+import numpy as np
+import pytest
+
+import ai_players
+
+
+class FakeTransport:
+    """Answers every request with `response`; setup fails if `missing_key`."""
+
+    def __init__(self, response='{"move": 5}', missing_key=False):
+        self.response = response
+        self.missing_key = missing_key
+        self.sent = 0
+
+    def setup(self, provider):
+        if self.missing_key:
+            raise RuntimeError(f"Could not find the {provider} API key")
+
+    def send(self, provider, request):
+        self.sent += 1
+        return self.response
+
+
+@pytest.fixture
+def transport():
+    fake = FakeTransport()
+    previous = ai_players.set_transport(fake)
+    yield fake
+    ai_players.set_transport(previous)
+
+
+@pytest.mark.parametrize('get_move', [ai_players.get_move_from_gpt, ai_players.get_move_from_claude])
+def test_valid_response_is_played(transport, get_move):
+    assert get_move(np.zeros((8, 9), dtype=int), 1, 1) == 4
+
+
+@pytest.mark.parametrize('get_move', [ai_players.get_move_from_gpt, ai_players.get_move_from_claude])
+def test_missing_key_falls_back(transport, get_move):
+    transport.missing_key = True
+    move = get_move(np.zeros((8, 9), dtype=int), 1, 1, fallback=lambda board, rotation_state: 7)
+    assert move == 7
+    assert transport.sent == 0
+
+
+@pytest.mark.parametrize('get_move', [ai_players.get_move_from_gpt, ai_players.get_move_from_claude])
+@pytest.mark.parametrize('response', ['no move here', '{"move": 42}'])
+def test_bad_response_falls_back(transport, get_move, response):
+    transport.response = response
+    move = get_move(np.zeros((8, 9), dtype=int), 1, 1, fallback=lambda board, rotation_state: 7)
+    assert move == 7
@@ -0,0 +1,176 @@
+"""
+Tests of the async players: rate limiting, retries and concurrent games against the mock server
+"""
+import asyncio
+import contextlib
+import io
+import time
+
+import pytest
+
+from async_players import (
+    AnthropicClient, HttpxBackend, OpenAIClient, ProviderClient, ProviderError, TokenBucket,
+    play_gpt_vs_claude_async, run_concurrent_games
+)
+from ai_players import CLAUDE_MAX_TOKENS, CLAUDE_MODEL, GPT_MODEL, TEMPERATURE, build_request
+from config import VARIANTS, GameConfig
+from game_records import GameRecordWriter, GameRecords
+from game_state import GameState
+from mock_llm_server import MockLLMServer
+
+SMALL = GameConfig(rows=5, cols=6, rotation_interval=4)
+
+# Moves of a 'floating' game whose 9th rotation leaves every column full
+ROTATION_FILLS_BOARD = [
+    3, 5, 1, 3, 3, 3, 2, 7, 1, 1, 5, 7, 0, 6, 6, 0, 6, 4, 4, 4, 4, 2, 3, 0, 5, 7, 4,
+    3, 5, 1, 5, 4, 4, 4, 2, 6, 4, 0, 0, 0, 0, 6, 1, 7, 4, 3, 2, 2, 7, 6, 7, 5, 6, 6,
+]
+
+
+class ScriptedBackend:
+    """Backend answering with a fixed list of (status, body, headers) replies."""
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.calls = 0
+
+    async def post(self, path, payload, headers):
+        self.calls += 1
+        self.payload = payload
+        return self.replies.pop(0)
+
+
+class ScriptedClient:
+    """Stands in for both provider clients, answering the moves of a list in turn."""
+
+    def __init__(self, moves):
+        self.moves = list(moves)
+        self.requests = 0
+
+    async def _next(self):
+        self.requests += 1
+        return f'{{"move": {self.moves.pop(0) + 1 if self.moves else 1}}}'
+
+    async def chat(self, messages):
+        return await self._next()
+
+    async def message(self, system, messages):
+        return await self._next()
+
+
+def test_token_bucket_allows_a_burst_then_the_rate():
+    async def acquire_all(bucket, count):
+        times = []
+        for _ in range(count):
+            await bucket.acquire()
+            times.append(time.monotonic())
+        return times
+
+    start = time.monotonic()
+    times = asyncio.run(acquire_all(TokenBucket(rate=50, capacity=2), 6))
+    # Two tokens are there at once, the other four come at 50 per second
+    assert times[1] - start < 0.02
+    assert times[-1] - start >= 4 / 50 - 0.005
+
+
+def test_retries_rate_limits_and_server_errors():
+    backend = ScriptedBackend([
+        (429, {'error': 'slow down'}, {'retry-after': '0.05'}),
+        (503, 'unavailable', {}),
+        (200, {'ok': True}, {}),
+    ])
+    client = ProviderClient(backend, requests_per_second=1000, backoff=0.001)
+    start = time.monotonic()
+    assert asyncio.run(client.post('/v1/messages', {}, {})) == {'ok': True}
+    # Retry-After is honored over the shorter backoff
+    assert time.monotonic() - start >= 0.05
+    assert (client.requests, client.retries, backend.calls) == (3, 2, 3)
+
+
+def test_gives_up_on_client_errors_and_after_the_last_retry():
+    client = ProviderClient(ScriptedBackend([(400, 'bad request', {})]), requests_per_second=1000)
+    with pytest.raises(ProviderError) as error:
+        asyncio.run(client.post('/v1/messages', {}, {}))
+    assert error.value.status == 400 and client.retries == 0
+
+    client = ProviderClient(ScriptedBackend([(429, 'limited', {})] * 3), requests_per_second=1000,
+                            max_retries=2, backoff=0.001)
+    with pytest.raises(ProviderError) as error:
+        asyncio.run(client.post('/v1/messages', {}, {}))
+    assert error.value.status == 429 and client.retries == 2
+
+
+def test_requests_use_the_sync_players_settings():
+    # The settings are part of the move cache key, so both players must send the same ones
+    board = GameState().to_array()
+    gpt = OpenAIClient(ScriptedBackend([(200, {'choices': [{'message': {'content': '{}'}}]}, {})]))
+    asyncio.run(gpt.chat([]))
+    expected = build_request('gpt', board, 1, 1)
+    for key, value in (('model', GPT_MODEL), ('temperature', TEMPERATURE)):
+        assert gpt.backend.payload[key] == expected[key] == value
+
+    claude = AnthropicClient(ScriptedBackend([(200, {'content': [{'text': '{}'}]}, {})]))
+    asyncio.run(claude.message('', []))
+    expected = build_request('claude', board, 1, 1)
+    for key, value in (('model', CLAUDE_MODEL), ('max_tokens', CLAUDE_MAX_TOKENS), ('temperature', TEMPERATURE)):
+        assert claude.backend.payload[key] == expected[key] == value
+
+
+def test_concurrent_games_against_the_mock_server(tmp_path):
+    path = str(tmp_path / 'games.c5g')
+
+    async def scenario():
+        server = await MockLLMServer(port=0, latency=0.0, jitter=0.0, error_rate=0.3, seed=1).start()
+        gpt = OpenAIClient(HttpxBackend(server.base_url), api_key='test', requests_per_second=1000,
+                           max_retries=20, backoff=0.001)
+        claude = AnthropicClient(HttpxBackend(server.base_url), api_key='test', requests_per_second=1000,
+                                 max_retries=20, backoff=0.001)
+        try:
+            with GameRecordWriter(path, SMALL, buffer_games=1) as writer:
+                results = await run_concurrent_games(4, gpt, claude, SMALL, writer)
+        finally:
+            await gpt.aclose()
+            await claude.aclose()
+            await server.stop()
+        return results, server, gpt, claude
+
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        results, server, gpt, claude = asyncio.run(scenario())
+
+    # Every move came from the server: no request failed for good
+    assert '❌' not in output.getvalue()
+    assert server.requests == gpt.requests + claude.requests
+    assert gpt.retries + claude.retries > 0
+    assert gpt.requests - gpt.retries + claude.requests - claude.retries == sum(r['length'] for r in results)
+
+    assert len(results) == 4
+    # Games are saved in the order they finished
+    saved = sorted((game.moves, game.winner) for game in GameRecords(path))
+    assert saved == sorted(([move['column'] - 1 for move in r['history']], r['winner']) for r in results)
+    for result in results:
+        state = GameState(SMALL)
+        for move in result['history']:
+            state.make(move['column'] - 1)
+        assert state.is_over
+        assert result['length'] == state.turn
+        assert result['rotations'] == state.rotation_state
+        winners = state.result
+        assert result['winner'] == (winners.pop() if len(winners) == 1 else 0)
+
+
+def test_rotation_that_fills_the_board_ends_the_game():
+    config = VARIANTS['floating']
+    state = GameState(config)
+    for col in ROTATION_FILLS_BOARD:
+        state.make(col)
+    assert state.result == set() and state.rotation_state == 9
+
+    client = ScriptedClient(ROTATION_FILLS_BOARD)
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        result = asyncio.run(play_gpt_vs_claude_async(client, client, config))
+    # No request is sent for a move on the full board
+    assert client.requests == len(ROTATION_FILLS_BOARD)
+    assert '❌' not in output.getvalue()
+    assert result['winner'] == 0
+    assert (result['length'], result['rotations']) == (len(ROTATION_FILLS_BOARD), 9)
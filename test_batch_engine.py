@@ -0,0 +1,50 @@
+"""
+Tests of BatchGame against the board.py rules played one game at a time
+"""
+import numpy as np
+import pytest
+
+from batch_engine import BOTH_WIN, BatchGame
+from board import drop_and_check, get_valid_moves, is_board_full, rotate_if_due
+from config import VARIANTS
+
+
+def reference_step(board, turn, rotation_state, col, config):
+    """One move with the board.py functions; returns (board, rotation_state, winner, done)."""
+    piece = turn % 2 + 1
+    board = board.copy()
+    _, result = drop_and_check(board, col, piece, rotation_state, config)
+    if result is not None:
+        return board, rotation_state, next(iter(result)) if result else 0, True
+    board, rotation_state, winners = rotate_if_due(board, turn + 1, rotation_state, config)
+    if winners:
+        return board, rotation_state, BOTH_WIN if len(winners) == 2 else next(iter(winners)), True
+    # Without gravity a rotation can leave every column full
+    return board, rotation_state, 0, winners is not None and is_board_full(board)
+
+
+@pytest.mark.parametrize('variant', sorted(VARIANTS))
+def test_batch_matches_board_rules(variant):
+    config = VARIANTS[variant]
+    games = 300
+    batch = BatchGame(games, config)
+    boards = [np.zeros((config.rows, config.cols), dtype=int) for _ in range(games)]
+    rotations = [0] * games
+    rng = np.random.default_rng(len(variant))
+
+    while not batch.done.all():
+        live = np.flatnonzero(~batch.done)
+        for game in live:
+            assert get_valid_moves(boards[game]) == np.flatnonzero(batch.valid_moves()[game]).tolist()
+        moves = batch.random_moves(rng)
+        turns = batch.turn.copy()
+        batch.step(moves)
+
+        for game in live:
+            board, rotations[game], winner, done = reference_step(
+                boards[game], turns[game], rotations[game], moves[game], config)
+            boards[game] = board
+            assert np.array_equal(batch.get_board(game), board)
+            assert batch.rotation_state[game] == rotations[game]
+            assert batch.done[game] == done
+            assert batch.winner[game] == winner
@@ -0,0 +1,185 @@
+"""
+Tests of the board functions against frozen copies of the original
+nested-loop implementations
+"""
+import itertools
+import random
+
+import numpy as np
+import pytest
+
+from bitboard import Bitboard
+from board import (
+    apply_gravity_after_rotation, board_to_string, get_next_open_row, get_valid_moves, is_board_full,
+    rotate_and_settle, winning_move
+)
+from config import VARIANTS
+
+
+# Original implementations, kept verbatim as the reference
+
+def original_get_next_open_row(board, col):
+    ROWS, COLS = board.shape
+    if not 0 <= col < COLS:
+        return None
+    for r in range(ROWS):
+        if board[r, col] == 0:
+            return r
+    return None
+
+def original_get_valid_moves(board):
+    ROWS, COLS = board.shape
+    return [col for col in range(COLS) if 0 <= col < COLS and board[ROWS - 1, col] == 0]
+
+def original_rotate_board_clockwise(board):
+    rows, cols = board.shape
+    rotated = np.zeros((cols, rows), dtype=int)
+    for r in range(rows):
+        for c in range(cols):
+            rotated[c][rows - 1 - r] = board[r][c]
+    return rotated
+
+def original_apply_gravity_after_rotation(board):
+    CURRENT_ROWS, CURRENT_COLS = board.shape
+    new_board = np.zeros_like(board)
+    for col in range(CURRENT_COLS):
+        pieces = []
+        for row in range(CURRENT_ROWS):
+            if board[row, col] != 0:
+                pieces.append(board[row, col])
+        for i, piece in enumerate(pieces):
+            if i < CURRENT_ROWS:
+                new_board[i, col] = piece
+    return new_board
+
+def original_winning_move(board, piece):
+    rows, cols = board.shape
+    if rows < 5 and cols < 5:
+        return False
+    for r in range(rows):
+        for c in range(cols - 4):
+            if all(board[r, c + i] == piece for i in range(5)):
+                return True
+    for c in range(cols):
+        for r in range(rows - 4):
+            if all(board[r + i, c] == piece for i in range(5)):
+                return True
+    for c in range(cols - 4):
+        for r in range(rows - 4):
+            if all(board[r + i, c + i] == piece for i in range(5)):
+                return True
+    for c in range(cols - 4):
+        for r in range(4, rows):
+            if all(board[r - i, c + i] == piece for i in range(5)):
+                return True
+    return False
+
+def original_is_board_full(board):
+    current_rows, current_cols = board.shape
+    return all(board[current_rows-1, c] != 0 for c in range(current_cols))
+
+
+def random_positions(games, seed=0, rows=8, cols=9, interval=6):
+    """Every position of random games played with the original rules, rotations included."""
+    rng = random.Random(seed)
+    for _ in range(games):
+        board = np.zeros((rows, cols), dtype=int)
+        for turn in range(rows * cols):
+            yield board
+            moves = original_get_valid_moves(board)
+            if not moves:
+                break
+            col = rng.choice(moves)
+            board = board.copy()
+            board[original_get_next_open_row(board, col), col] = turn % 2 + 1
+            if (turn + 1) % interval == 0:
+                board = original_apply_gravity_after_rotation(original_rotate_board_clockwise(board))
+
+
+@pytest.mark.parametrize('shape', [(8, 9), (6, 7), (5, 5), (3, 2)])
+def test_board_functions_match_original(shape):
+    for board in random_positions(20, seed=sum(shape), rows=shape[0], cols=shape[1]):
+        assert get_valid_moves(board) == original_get_valid_moves(board)
+        assert is_board_full(board) == original_is_board_full(board)
+        for col in range(-1, board.shape[1] + 1):
+            assert get_next_open_row(board, col) == original_get_next_open_row(board, col)
+        for piece in (1, 2):
+            assert winning_move(board, piece) == original_winning_move(board, piece)
+
+
+def test_apply_gravity_matches_original():
+    rng = np.random.default_rng(0)
+    for shape in [(8, 9), (9, 8), (1, 1), (4, 6)]:
+        for _ in range(200):
+            board = rng.choice(3, size=shape, p=[0.5, 0.25, 0.25])
+            settled = apply_gravity_after_rotation(board)
+            assert settled.dtype == board.dtype
+            assert np.array_equal(settled, original_apply_gravity_after_rotation(board))
+
+
+def test_next_open_row_lands_on_floating_pieces():
+    # Without gravity after a rotation pieces can float; a drop lands on the highest one
+    rng = np.random.default_rng(1)
+    for _ in range(500):
+        board = rng.choice(3, size=(8, 9), p=[0.6, 0.2, 0.2])
+        bitboard = Bitboard.from_array(board)
+        for col in range(board.shape[1]):
+            assert get_next_open_row(board, col) == bitboard.next_open_row(col)
+
+
+def settled_boards(rows, cols):
+    """Every reachable position on a rows x cols board: all column heights and piece colourings."""
+    # Every settled column: a height followed by a colour for each piece
+    columns = [
+        colours + (0,) * (rows - height)
+        for height in range(rows + 1)
+        for colours in itertools.product((1, 2), repeat=height)
+    ]
+    boards = np.array(list(itertools.product(columns, repeat=cols)), dtype=int)
+    return boards.reshape(-1, cols, rows).transpose(0, 2, 1)
+
+
+@pytest.mark.parametrize('rows, cols', [
+    (rows, cols) for rows in range(1, 10) for cols in range(1, 9 // rows + 1)
+])
+def test_rotate_and_settle_matches_original(rows, cols):
+    boards = settled_boards(rows, cols)
+    stacked = rotate_and_settle(boards)
+    buffered = np.empty_like(stacked)
+    rotate_and_settle(boards, out=buffered)
+    for board, fused, into in zip(boards, stacked, buffered):
+        expected = original_apply_gravity_after_rotation(original_rotate_board_clockwise(board))
+        assert np.array_equal(rotate_and_settle(board), expected)
+        assert np.array_equal(fused, expected)
+        assert np.array_equal(into, expected)
+        if rows == cols:
+            in_place = board.copy()
+            rotate_and_settle(in_place, out=in_place)
+            assert np.array_equal(in_place, expected)
+
+
+def test_rotate_and_settle_counterclockwise():
+    # Three clockwise quarter turns make one counterclockwise turn
+    for board in settled_boards(3, 3):
+        turned = board
+        for _ in range(3):
+            turned = original_rotate_board_clockwise(turned)
+        expected = original_apply_gravity_after_rotation(turned)
+        assert np.array_equal(rotate_and_settle(board, clockwise=False), expected)
+
+
+def test_rotate_and_settle_rejects_wrong_out_shape():
+    with pytest.raises(ValueError):
+        rotate_and_settle(np.zeros((8, 9), dtype=int), out=np.zeros((8, 9), dtype=int))
+
+
+def test_board_to_string_labels():
+    board = np.zeros((8, 9), dtype=int)
+    board[0, 4] = 1
+    board[1, 4] = 2
+    lines = board_to_string(board).split('\n')
+    assert lines[0] == "Original orientation (gravity pulls down)"
+    assert lines[-3:] == [". . . . O . . . .", ". . . . X . . . .", "1 2 3 4 5 6 7 8 9"]
+    assert board_to_string(board.T, 1, VARIANTS['ccw']).startswith("Rotated 90° counterclockwise (gravity pulls down)")
+    assert board_to_string(board.T, 3, VARIANTS['floating']).startswith(
+        "Rotated 270° clockwise (pieces float after rotation)")
@@ -0,0 +1,35 @@
+"""
+Tests of the interactive game loop, with scripted players and no drawing
+"""
+import contextlib
+import io
+
+import pytest
+
+pytest.importorskip('matplotlib')
+
+import game
+from config import VARIANTS
+from game_state import GameState
+from prompts import PromptBuilder
+from test_async_players import ROTATION_FILLS_BOARD
+
+
+def test_rotation_that_fills_the_board_is_a_draw(monkeypatch):
+    monkeypatch.setattr(game, 'draw_board', lambda *args, **kwargs: None)
+    config = VARIANTS['floating']
+    moves = list(ROTATION_FILLS_BOARD)
+    calls = []
+
+    def mover(board, player, turn_number, rotation_state, prompt=None):
+        calls.append(turn_number)
+        return moves.pop(0) if moves else 0
+
+    state = GameState(config)
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        game._play_moves(state, PromptBuilder(config=config), None, 0, {1: mover, 2: mover})
+    # The game ends on the rotation, without asking for another move
+    assert len(calls) == len(ROTATION_FILLS_BOARD)
+    assert state.result == set()
+    assert 'Invalid move' not in output.getvalue()
+    assert 'the game is a draw' in output.getvalue().splitlines()[-1]
@@ -0,0 +1,126 @@
+"""
+Tests of the binary game record files
+"""
+import os
+import random
+
+import numpy as np
+import pytest
+
+from config import VARIANTS
+from game_records import (
+    DRAW, HEADER_SIZE, UNFINISHED, GameRecordWriter, GameRecords, record_dtype, replay, summarize, winner_code
+)
+from game_state import GameState
+
+
+def random_games(count, config, seed=0):
+    """Finished random games as GameStates."""
+    rng = random.Random(seed)
+    games = []
+    for _ in range(count):
+        state = GameState(config)
+        while not state.is_over:
+            state.make(rng.choice(state.valid_moves()))
+        games.append(state)
+    return games
+
+
+def test_winner_codes():
+    assert winner_code(None) == UNFINISHED
+    assert winner_code(set()) == DRAW
+    assert winner_code({1, 2}) == DRAW
+    assert winner_code({2}) == 2
+
+
+@pytest.mark.parametrize('variant', sorted(VARIANTS))
+def test_round_trip_and_replay(tmp_path, variant):
+    config = VARIANTS[variant]
+    path = str(tmp_path / 'games.c5g')
+    games = random_games(40, config, seed=len(variant))
+    # A small buffer so the games reach the file in several writes
+    with GameRecordWriter(path, config, buffer_games=7) as writer:
+        for i, state in enumerate(games):
+            writer.append_state(state, ('random', 'mcts' if i % 2 else 'search'))
+
+    records = GameRecords(path)
+    assert records.config == config
+    assert len(records) == len(games)
+    for state, game in zip(games, records):
+        assert game.moves == [move[0] for move in state.moves]
+        assert game.winner == winner_code(state.result)
+        assert game.rotations == state.rotation_state
+        assert replay(game.moves, config).result == state.result
+
+    for ply in (0, 5, 13, config.rows * config.cols):
+        batch = records.replay_batch(ply)
+        for index in range(len(records)):
+            assert np.array_equal(batch.get_board(index), records.board_at(index, ply))
+
+
+def test_reopen_appends_and_drops_a_partial_record(tmp_path):
+    config = VARIANTS['default']
+    path = str(tmp_path / 'games.c5g')
+    games = random_games(2, config)
+    with GameRecordWriter(path, config) as writer:
+        writer.append_state(games[0], ('gpt', 'claude'))
+    # A crash in the middle of a write leaves part of a record behind
+    with open(path, 'ab') as f:
+        f.write(b'\x01' * (record_dtype(config).itemsize // 2))
+
+    with GameRecordWriter(path, config) as writer:
+        writer.append_state(games[1], ('gpt', 'search'))
+        writer.append([0, 1, 2], UNFINISHED)
+
+    records = GameRecords(path)
+    assert len(records) == 3
+    assert os.path.getsize(path) == HEADER_SIZE + 3 * record_dtype(config).itemsize
+    assert records[0].players == ('gpt', 'claude')
+    assert records[1].players == ('gpt', 'search')
+    assert records[2] == ([0, 1, 2], UNFINISHED, 0, (None, None))
+    assert summarize(records)['unfinished'] == 1
+
+
+def test_config_mismatch_is_rejected(tmp_path):
+    path = str(tmp_path / 'games.c5g')
+    GameRecordWriter(path, VARIANTS['default']).close()
+    with pytest.raises(ValueError):
+        GameRecordWriter(path, VARIANTS['main-cpp'])
+
+
+class CrashingFile:
+    """File wrapper whose write number `crash_at` raises, as if the process died there."""
+
+    def __init__(self, f, crash_at):
+        self.f = f
+        self.writes = 0
+        self.crash_at = crash_at
+
+    def write(self, data):
+        self.writes += 1
+        if self.writes == self.crash_at:
+            raise OSError("simulated crash")
+        return self.f.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.f, name)
+
+
+def test_crash_between_header_and_records_leaves_a_readable_file(tmp_path):
+    config = VARIANTS['default']
+    path = str(tmp_path / 'games.c5g')
+    games = random_games(2, config)
+    with GameRecordWriter(path, config) as writer:
+        writer.append_state(games[0], ('gpt', 'claude'))
+
+    writer = GameRecordWriter(path, config)
+    # New player names make the flush write both the header and the records
+    writer.append_state(games[1], ('search', 'mcts'))
+    writer._file = CrashingFile(writer._file, crash_at=2)
+    with pytest.raises(OSError):
+        writer.flush()
+    writer._file.f.close()
+
+    records = GameRecords(path)
+    assert [game.players for game in records] == [('gpt', 'claude')]
+    assert records.players == ['gpt', 'claude', 'search', 'mcts']
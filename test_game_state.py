@@ -0,0 +1,69 @@
+"""
+Tests of GameState make/unmake against the board.py rules
+"""
+import random
+
+import numpy as np
+import pytest
+
+from board import drop_and_check, get_valid_moves, is_board_full, rotate_if_due
+from config import VARIANTS
+from game_state import GameState
+
+
+def play_random_game(config, rng):
+    """Random game checked move by move against board.py; returns the final state and a snapshot before every move."""
+    state = GameState(config)
+    board = np.zeros((config.rows, config.cols), dtype=int)
+    rotation_state = 0
+    snapshots = []
+    while not state.is_over:
+        assert state.valid_moves() == get_valid_moves(board)
+        snapshots.append((state.to_array(), state.turn, state.rotation_state, state.result))
+        col = rng.choice(state.valid_moves())
+        piece = state.current_player
+
+        state.make(col)
+        _, result = drop_and_check(board, col, piece, rotation_state, config)
+        if result is None:
+            board, rotation_state, winners = rotate_if_due(board, state.turn, rotation_state, config)
+            if winners:
+                result = winners
+            elif winners is not None and is_board_full(board):
+                # Without gravity a rotation can leave every column full
+                result = set()
+
+        assert np.array_equal(state.to_array(), board)
+        assert state.rotation_state == rotation_state
+        assert state.result == result
+    return state, snapshots
+
+
+@pytest.mark.parametrize('variant', sorted(VARIANTS))
+def test_make_matches_board_rules(variant):
+    rng = random.Random(variant)
+    for _ in range(60):
+        play_random_game(VARIANTS[variant], rng)
+
+
+@pytest.mark.parametrize('variant', sorted(VARIANTS))
+def test_unmake_restores_every_position(variant):
+    rng = random.Random(variant)
+    for _ in range(30):
+        state, snapshots = play_random_game(VARIANTS[variant], rng)
+        for board, turn, rotation_state, result in reversed(snapshots):
+            state.unmake()
+            assert np.array_equal(state.to_array(), board)
+            assert (state.turn, state.rotation_state, state.result) == (turn, rotation_state, result)
+        assert state.moves == []
+
+
+def test_history_matches_moves():
+    state = GameState()
+    for col in (4, 4, 3, 5, 2, 6, 1):
+        state.make(col)
+    history = state.history()
+    assert [move['column'] for move in history] == [5, 5, 4, 6, 3, 7, 2]
+    assert [move['player'] for move in history] == [1, 2, 1, 2, 1, 2, 1]
+    # The 7th move is played after the first rotation
+    assert history[-1]['rotation'] == 1
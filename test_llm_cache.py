@@ -0,0 +1,57 @@
+"""
+Tests of the LLM move cache and the cached players of the registry
+"""
+import numpy as np
+import pytest
+
+import ai_players
+from llm_cache import REUSE, open_cache
+from players import get_player
+
+
+class CountingTransport:
+    """Answers every request with column 5 and counts the requests."""
+
+    def __init__(self):
+        self.sent = 0
+
+    def setup(self, provider):
+        pass
+
+    def send(self, provider, request):
+        self.sent += 1
+        return '{"move": 5}'
+
+
+@pytest.fixture
+def transport():
+    fake = CountingTransport()
+    previous = ai_players.set_transport(fake)
+    yield fake
+    ai_players.set_transport(previous)
+
+
+@pytest.mark.parametrize('name', ['gpt-cached', 'claude-cached'])
+def test_registry_player_reuses_cached_move(transport, tmp_path, name):
+    path = str(tmp_path / 'cache.sqlite')
+    player = get_player(name, path=path, policy=REUSE)
+    board = np.zeros((8, 9), dtype=int)
+    assert player(board, 1, 1) == 4
+    assert player(board, 1, 1) == 4
+    assert transport.sent == 1
+
+    # A new process would start with an empty memory tier and read the disk tier
+    open_cache(path).memory.entries.clear()
+    assert get_player(name, path=path, policy=REUSE)(board, 1, 1) == 4
+    assert transport.sent == 1
+    assert open_cache(path).stats()['disk_hits'] == 1
+
+
+def test_failed_calls_are_not_cached(transport, tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    player = get_player('gpt-cached', path=path, policy=REUSE)
+    board = np.zeros((8, 9), dtype=int)
+    # Column 5 is full, so the model's move is invalid and a random move is played
+    board[:, 4] = [1, 2] * 4
+    assert player(board, 1, 9) != 4
+    assert open_cache(path).stores == 0
@@ -0,0 +1,107 @@
+"""
+Tests of recording LLM calls to a log and replaying them offline
+"""
+import contextlib
+import io
+import itertools
+import time
+
+import pytest
+
+import ai_players
+from game_state import GameState
+from llm_record import ORIGINAL, ZERO, ReplayTransport, read_log, recording, replaying
+
+
+class ScriptedTransport:
+    """Answers with a repeating list of moves after a fixed latency; counts what it sends."""
+
+    def __init__(self, moves=(5, 5, 4, 6, 5, 3, 7, 5), latency=0.01):
+        self.moves = itertools.cycle(moves)
+        self.latency = latency
+        self.sent = 0
+
+    def setup(self, provider):
+        pass
+
+    def send(self, provider, request):
+        self.sent += 1
+        time.sleep(self.latency)
+        return f'{{"move": {next(self.moves)}}}'
+
+
+@pytest.fixture
+def transport():
+    fake = ScriptedTransport()
+    previous = ai_players.set_transport(fake)
+    yield fake
+    ai_players.set_transport(previous)
+
+
+def play(moves, first_column=None):
+    """Alternate GPT and Claude moves through the current transport; returns the columns played."""
+    state = GameState()
+    if first_column is not None:
+        state.make(first_column)
+    players = {1: ai_players.get_move_from_gpt, 2: ai_players.get_move_from_claude}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(moves):
+            player = state.current_player
+            state.make(players[player](state.to_array(), player, state.turn + 1, state.rotation_state,
+                                       state.history()))
+    return [col for col, *_ in state.moves]
+
+
+def test_replay_plays_the_recorded_game_without_sending(tmp_path, transport):
+    path = str(tmp_path / 'calls.jsonl')
+    with recording(path, seed=7) as recorder:
+        # The repeated columns fill up, so some moves are seeded random fallbacks
+        recorded = play(16)
+    assert recorder.requests == transport.sent == 16
+    header, records = read_log(path)
+    assert header['seed'] == 7 and len(records) == 16
+    recorded_latency = sum(record['latency'] for record in records)
+
+    start = time.perf_counter()
+    with replaying(path, ZERO) as replayer:
+        replayed = play(16)
+    elapsed = time.perf_counter() - start
+    assert replayed == recorded
+    assert transport.sent == 16
+    assert (replayer.requests, replayer.misses) == (16, 0)
+    assert elapsed < recorded_latency
+
+
+def test_original_latency_is_replayed(tmp_path, transport):
+    path = str(tmp_path / 'calls.jsonl')
+    with recording(path):
+        play(2)
+    replayer = ReplayTransport(path, ORIGINAL)
+    _, records = read_log(path)
+    start = time.perf_counter()
+    replayer.send(records[0]['provider'], records[0]['request'])
+    assert time.perf_counter() - start >= records[0]['latency']
+
+
+def test_replay_miss_fails_loudly(tmp_path, transport):
+    path = str(tmp_path / 'calls.jsonl')
+    with recording(path, seed=1):
+        play(4)
+    with replaying(path, ZERO) as replayer:
+        # Another opening asks for prompts that were never recorded
+        with pytest.raises(ai_players.ReplayMiss):
+            play(4, first_column=0)
+    assert replayer.misses == 1
+    assert transport.sent == 4
+
+
+def test_runs_are_kept_apart(tmp_path, transport):
+    path = str(tmp_path / 'calls.jsonl')
+    with recording(path, seed=1):
+        first = play(3)
+    with recording(path, seed=2):
+        play(5)
+    assert read_log(path, session=0)[0]['seed'] == 1
+    assert len(read_log(path)[1]) == 5
+    with replaying(path, ZERO, session=0):
+        assert play(3) == first
@@ -0,0 +1,68 @@
+"""
+Tests of the MCTS player
+"""
+import numpy as np
+import pytest
+
+from mcts_player import MCTSPlayer
+
+
+def forced_win_board():
+    """Player 1 to move with four in a row on the bottom row, open at both ends."""
+    board = np.zeros((8, 9), dtype=int)
+    board[0, 1:5] = 1
+    board[1, 1:5] = 2
+    return board
+
+
+@pytest.mark.parametrize('options', [
+    {'playouts': 0},
+    {'playouts': -5},
+    {'playouts': None, 'time_budget': 0},
+    {'playouts': None, 'time_budget': None},
+])
+def test_rejects_budgets_that_are_not_positive(options):
+    with pytest.raises(ValueError):
+        MCTSPlayer(**options)
+
+
+def test_tiny_deadline_still_plays_a_move():
+    player = MCTSPlayer(playouts=None, time_budget=1e-9, seed=0)
+    result = player.search(np.zeros((8, 9), dtype=int), 1, 1)
+    assert result.playouts >= 1
+    assert result.move in range(9)
+    assert player.last_result is result
+
+
+def test_more_workers_than_playouts():
+    player = MCTSPlayer(workers=3, playouts=2, seed=0)
+    try:
+        result = player.search(np.zeros((8, 9), dtype=int), 1, 1)
+    finally:
+        player.close()
+    assert result.playouts == 2
+    assert sum(result.visits.values()) == 2
+
+
+def test_full_board_has_no_move():
+    board = np.tile([1, 2], (8, 5))[:, :9]
+    assert MCTSPlayer(playouts=10).search(board, 1, 73).move is None
+
+
+@pytest.mark.parametrize('workers, threads', [(2, 1), (1, 4)], ids=['root-parallel', 'tree-parallel'])
+def test_finds_the_winning_move(workers, threads):
+    player = MCTSPlayer(workers=workers, threads=threads, playouts=400, seed=1)
+    try:
+        result = player.search(forced_win_board(), 1, 9)
+    finally:
+        player.close()
+    assert result.move in (0, 5)
+    assert result.workers == workers
+    # Per-move statistics: every playout goes through one root move
+    assert result.playouts == 400
+    assert sum(result.visits.values()) == 400
+    assert set(result.values) == set(result.visits) == set(range(9))
+    for move, visits in result.visits.items():
+        assert 0 <= result.values[move] <= visits
+    # Every playout through a winning move is a win
+    assert result.values[result.move] == result.visits[result.move]
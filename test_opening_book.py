@@ -0,0 +1,140 @@
+"""
+Tests of building, writing and serving the opening book
+"""
+import numpy as np
+import pytest
+
+from config import VARIANTS
+from game_records import UNFINISHED, GameRecordWriter
+from game_state import GameState
+from opening_book import (
+    BookPlayer, OpeningBook, book_key, book_positions, build_from_games, build_from_search, read_games, write_book
+)
+from symmetry import EXACT, canonical
+
+NO_ROTATION = VARIANTS['no-rotation']
+
+
+class Fallback:
+    """Move function recording its calls and always playing column 0."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, board, player, turn_number, rotation_state=0, **kwargs):
+        self.calls.append(turn_number)
+        return 0
+
+
+@pytest.fixture(scope='module')
+def searched():
+    """{key: move} searched for every position before move 3 of the no-rotation variant."""
+    return build_from_search(2, NO_ROTATION, time_budget=0.02, workers=1)
+
+
+def test_book_positions_fold_mirror_images():
+    # The empty board and the first move in 5 of 9 columns, up to the mirror image
+    assert len(book_positions(2, NO_ROTATION)) == 6
+    assert len(book_positions(2, VARIANTS['default'])) == 10
+
+
+def test_written_book_serves_the_searched_moves(tmp_path, searched):
+    path = str(tmp_path / 'book.bin')
+    write_book(path, searched, NO_ROTATION, 2, EXACT, source='test')
+    book = OpeningBook(path)
+    assert (book.config, book.ply, book.policy, book.source) == (NO_ROTATION, 2, EXACT, 'test')
+    assert len(book) == len(searched) == 6
+    assert list(book.keys) == sorted(book.keys)
+    for key, move in searched.items():
+        assert book.lookup(key) == move
+    assert book.lookup(max(searched) + 1) is None
+
+    # The first search move is the center column, which is its own mirror image
+    board = np.zeros((8, 9), dtype=int)
+    assert book.probe(board, 0) == 4
+    # A first move and its mirror image get mirror image replies
+    board[0, 1] = 1
+    reply = book.probe(board, 1)
+    assert reply is not None
+    assert book.probe(board[:, ::-1].copy(), 1) == 8 - reply
+    # Positions at the book depth are not looked up
+    board[0, reply] = 2
+    assert book.probe(board, 2) is None
+
+
+def test_book_player_counts_hits_and_falls_back_on_a_miss(tmp_path, searched):
+    board = np.zeros((8, 9), dtype=int)
+    board[0, 3] = 1
+    # Leave one position out of the book
+    missing = book_key(canonical(board, 1, NO_ROTATION, EXACT))
+    path = str(tmp_path / 'book.bin')
+    write_book(path, {key: move for key, move in searched.items() if key != missing}, NO_ROTATION, 2)
+
+    fallback = Fallback()
+    player = BookPlayer(OpeningBook(path), fallback)
+    assert player(np.zeros((8, 9), dtype=int), 1, 1) == 4
+    assert fallback.calls == []
+    # Miss: the normal player moves
+    assert player(board, 2, 2) == 0
+    assert fallback.calls == [2]
+    # Past the book depth the fallback moves without a lookup
+    board[0, 4] = 2
+    assert player(board, 1, 3) == 0
+    assert fallback.calls == [2, 3]
+    assert player.stats() == {'hits': 1, 'misses': 1, 'hit_rate': 0.5}
+
+
+def test_book_player_skips_a_full_column(tmp_path):
+    board = np.zeros((8, 9), dtype=int)
+    board[:, 4] = [1, 2] * 4
+    form = canonical(board, 0, NO_ROTATION, EXACT)
+    path = str(tmp_path / 'book.bin')
+    write_book(path, {book_key(form): form.to_canonical(4)}, NO_ROTATION, 10)
+    player = BookPlayer(OpeningBook(path), Fallback())
+    assert player(board, 1, 1) == 0
+    assert player.stats()['misses'] == 1
+
+
+def test_empty_book(tmp_path):
+    path = str(tmp_path / 'book.bin')
+    write_book(path, {}, NO_ROTATION, 4)
+    book = OpeningBook(path)
+    assert len(book) == 0
+    assert book.probe(np.zeros((8, 9), dtype=int), 0) is None
+
+
+def test_not_a_book(tmp_path):
+    path = tmp_path / 'book.bin'
+    path.write_bytes(b'not a book at all')
+    with pytest.raises(ValueError):
+        OpeningBook(str(path))
+
+
+def test_build_from_games_keeps_the_best_scoring_move():
+    # Column 3 won twice for player 1, column 4 lost once and drew once
+    games = [([3, 0, 3], 1), ([3, 8, 2], 1), ([4, 4], 2), ([4, 0], 0)]
+    entries = build_from_games(games, 2, NO_ROTATION)
+    root = canonical(GameState(NO_ROTATION).to_array(), 0, NO_ROTATION, EXACT)
+    assert root.to_board(entries[book_key(root)]) == 3
+
+    # With two games needed, the replies played once drop out
+    entries = build_from_games(games, 2, NO_ROTATION, min_games=2)
+    assert list(entries) == [book_key(root)]
+    # Both root moves have two games now; 3 still scores best
+    assert root.to_board(entries[book_key(root)]) == 3
+
+
+def test_unfinished_games_are_not_scored(tmp_path):
+    path = str(tmp_path / 'games.c5g')
+    with GameRecordWriter(path, NO_ROTATION) as writer:
+        writer.append([3, 0, 3], 1)
+        # Aborted games would count as a loss for both sides
+        writer.append([3, 8], UNFINISHED)
+        writer.append([3, 8], UNFINISHED)
+    assert list(read_games([path], NO_ROTATION)) == [([3, 0, 3], 1)]
+
+    entries = build_from_games(read_games([path], NO_ROTATION), 2, NO_ROTATION, min_games=2)
+    # Only one finished game played 3, so no move has the two games it needs
+    assert entries == {}
+    with pytest.raises(ValueError):
+        list(read_games([path], VARIANTS['default']))
@@ -0,0 +1,58 @@
+"""
+Tests of perft on GameState against the NumPy rules of board.py
+"""
+import random
+
+import pytest
+
+from config import COUNTERCLOCKWISE, GameConfig, VARIANTS
+from game_state import GameState
+from perft import Perft, perft, perft_reference, state_from_moves, total
+
+CONFIGS = {
+    'default': VARIANTS['default'],
+    'ccw': VARIANTS['ccw'],
+    'floating': VARIANTS['floating'],
+    'small': GameConfig(rows=4, cols=5, win_length=3, rotation_interval=3),
+    'small-ccw-floating': GameConfig(rows=4, cols=4, win_length=3, rotation_interval=2,
+                                     rotation_direction=COUNTERCLOCKWISE, gravity_after_rotation=False),
+}
+
+
+def start_positions(config, count, seed=0):
+    """Random positions of unfinished games, some of them a move or two before a rotation."""
+    rng = random.Random(seed)
+    positions = [GameState(config)]
+    while len(positions) < count:
+        state = GameState(config)
+        for _ in range(rng.randrange(1, config.rows * config.cols // 2)):
+            state.make(rng.choice(state.valid_moves()))
+            if state.is_over:
+                break
+        if not state.is_over:
+            positions.append(state)
+    return positions
+
+
+@pytest.mark.parametrize('name', sorted(CONFIGS))
+def test_counts_match_reference(name):
+    config = CONFIGS[name]
+    depth = 3 if config.rows * config.cols > 20 else 4
+    for state in start_positions(config, 4):
+        expected = perft_reference(state.to_array(), depth, state.turn, state.rotation_state, config)
+        assert Perft(config).count(state, depth) == expected
+        assert Perft(config, memo=True).count(state, depth) == expected
+        bulk = Perft(config, bulk=True).count(state, depth)
+        assert bulk.nodes == expected.nodes
+
+
+def test_divide_sums_to_count():
+    config = CONFIGS['small']
+    state = state_from_moves([3, 3, 2], config)
+    divide, _ = perft(state, 4)
+    assert total(list(divide.values())) == Perft(config).count(state, 4)
+
+
+def test_state_from_moves_rejects_full_column():
+    with pytest.raises(ValueError):
+        state_from_moves([1] * 5, GameConfig(rows=4, cols=5, rotation_interval=0))
@@ -0,0 +1,77 @@
+"""
+Tests of the game renderer
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+from config import VARIANTS
+from render import ANSI, MP4, MP4_FPS, PNG, cell_sprites, game_frames, render_board, render_game
+
+# A stand-in for ffmpeg: it records the size argument and the byte count of the raw video it is sent
+FAKE_FFMPEG = f"""#!{sys.executable}
+import sys
+data = sys.stdin.buffer.read()
+with open(sys.argv[-1], 'w') as f:
+    f.write(sys.argv[sys.argv.index('-s') + 1] + ' ' + str(len(data)))
+"""
+
+MOVES = [4, 4, 3, 5, 2, 6, 1, 0]
+
+
+@pytest.fixture
+def fake_ffmpeg(tmp_path, monkeypatch):
+    directory = tmp_path / 'bin'
+    directory.mkdir()
+    script = directory / 'ffmpeg'
+    script.write_text(FAKE_FFMPEG)
+    script.chmod(0o755)
+    monkeypatch.setenv('PATH', f"{directory}{os.pathsep}{os.environ['PATH']}")
+
+
+def test_render_board_is_a_square_palette_image():
+    palette = cell_sprites(8)[0]
+    image = render_board(np.zeros((8, 9), dtype=int), cell=8)
+    assert image.shape == (72, 72) and image.dtype == np.uint8
+    assert image.max() < len(palette)
+
+
+@pytest.mark.parametrize('variant', ['default', 'floating'])
+def test_mp4_sends_every_frame_to_ffmpeg(tmp_path, fake_ffmpeg, variant):
+    config = VARIANTS[variant]
+    path = str(tmp_path / 'game.mp4')
+    count = render_game(MOVES, path, MP4, config, cell=8)
+    assert count == len(list(game_frames(MOVES, config)))
+
+    with open(path) as f:
+        size, length = f.read().split()
+    side = max(config.rows, config.cols) * 8
+    assert size == f'{side}x{side}'
+    # Every frame is repeated for its duration, and shown at least once
+    frame_bytes = side * side * 3
+    assert int(length) % frame_bytes == 0
+    assert int(length) // frame_bytes >= count
+    assert int(length) // frame_bytes >= 2 * MP4_FPS
+
+
+def test_png_writes_one_file_per_frame(tmp_path):
+    path = str(tmp_path / 'frames')
+    count = render_game(MOVES, path, PNG, VARIANTS['default'], cell=8)
+    names = sorted(os.listdir(path))
+    assert names == [f"frame-{index:04d}.png" for index in range(count)]
+    Image = pytest.importorskip('PIL.Image')
+    with Image.open(os.path.join(path, names[-1])) as image:
+        assert image.mode == 'P'
+        frame = np.array(image)
+    last_board = list(game_frames(MOVES))[-1][0]
+    assert np.array_equal(frame, render_board(last_board, 9, 8))
+
+
+def test_ansi_writes_one_board_per_frame(tmp_path):
+    path = str(tmp_path / 'game.ans')
+    count = render_game(MOVES, path, ANSI, VARIANTS['default'])
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    assert len(text.strip('\n').split('\n\n')) == count
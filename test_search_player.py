@@ -0,0 +1,31 @@
+"""
+Tests of the alpha-beta search player
+"""
+import numpy as np
+
+import search_player
+from search_player import AlphaBetaSearch
+
+
+def test_timeout_before_first_iteration_plays_center(monkeypatch):
+    # Check the clock on every node, with a deadline already passed
+    monkeypatch.setattr(search_player, 'NODES_PER_CLOCK_CHECK', 1)
+    board = np.zeros((8, 9), dtype=int)
+    result = AlphaBetaSearch().search(board, 1, 1, time_budget=-1.0)
+    assert result.depth == 0
+    assert result.move == 4
+
+
+def test_timeout_skips_full_columns(monkeypatch):
+    monkeypatch.setattr(search_player, 'NODES_PER_CLOCK_CHECK', 1)
+    board = np.zeros((8, 9), dtype=int)
+    board[:, 4] = [1, 2] * 4
+    result = AlphaBetaSearch().search(board, 1, 9, time_budget=-1.0)
+    assert result.move in (3, 5)
+
+
+def test_takes_immediate_win():
+    board = np.zeros((8, 9), dtype=int)
+    board[0, 1:5] = 1
+    board[1, 1:5] = 2
+    assert AlphaBetaSearch().search(board, 1, 9, time_budget=0.5).move in (0, 5)
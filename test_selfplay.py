@@ -0,0 +1,112 @@
+"""
+Tests of the self-play sample pipeline
+"""
+import json
+import os
+import random
+
+import numpy as np
+import pytest
+
+from config import VARIANTS
+from game_state import GameState
+from players import get_player
+from selfplay import (
+    MANIFEST, load_shards, mirror_samples, play_selfplay_game, position_hashes, run_selfplay, sample_dtype
+)
+from symmetry import ALWAYS, EXACT
+
+NO_ROTATION = VARIANTS['no-rotation']
+
+
+def unpack(sample, config):
+    """The board of a sample at its real shape."""
+    rows, cols = config.shape(int(sample['rotation']))
+    return sample['board'][:rows, :cols]
+
+
+def assert_legal(sample, config):
+    """A board reachable with gravity, the right side to move and a policy over open columns."""
+    board = unpack(sample, config)
+    # No piece floats over an empty cell
+    assert not ((board[1:] != 0) & (board[:-1] == 0)).any()
+    ones, twos = np.count_nonzero(board == 1), np.count_nonzero(board == 2)
+    assert ones - twos == (0 if sample['player'] == 1 else 1)
+    assert sample['policy'].sum() == pytest.approx(1.0)
+    assert (board[-1][sample['policy'][:board.shape[1]] > 0] == 0).all()
+    assert not sample['policy'][board.shape[1]:].any()
+
+
+def test_outcome_labels_follow_the_winner():
+    random.seed(3)
+    players = {1: get_player('random'), 2: get_player('random')}
+    for _ in range(10):
+        samples = play_selfplay_game(players, NO_ROTATION)
+        state = GameState(NO_ROTATION)
+        for sample in samples:
+            assert np.array_equal(unpack(sample, NO_ROTATION), state.to_array())
+            state.make(int(np.argmax(sample['policy'])))
+        assert state.is_over
+        if len(state.result) == 1:
+            winner = next(iter(state.result))
+            assert (samples['outcome'] == np.where(samples['player'] == winner, 1, -1)).all()
+        else:
+            assert not samples['outcome'].any()
+
+
+def test_search_players_record_visit_shares():
+    random.seed(0)
+    players = {1: get_player('mcts', playouts=40), 2: get_player('random')}
+    samples = play_selfplay_game(players, NO_ROTATION)
+    first = samples[samples['player'] == 1]
+    assert (first['policy'].sum(axis=1) == pytest.approx(1.0))
+    # Visits spread over several columns, unlike a played-move one-hot
+    assert (np.count_nonzero(first['policy'], axis=1) > 1).any()
+
+
+@pytest.mark.parametrize('variant', ['default', 'ccw'])
+def test_mirror_matches_a_flipped_board(variant):
+    config = VARIANTS[variant]
+    random.seed(1)
+    samples = play_selfplay_game({1: get_player('random'), 2: get_player('random')}, config)
+    mirrored = mirror_samples(samples, config)
+    assert (samples['rotation'] % 2 == 1).any()
+    for sample, image in zip(samples, mirrored):
+        assert np.array_equal(unpack(image, config), unpack(sample, config)[:, ::-1])
+    assert np.array_equal(mirror_samples(mirrored, config), samples)
+
+
+def test_sharded_run_with_augmentation(tmp_path):
+    directory = str(tmp_path / 'samples')
+    manifest = run_selfplay(directory, ['random', 'random'], 6, workers=2, config=NO_ROTATION, seed=0,
+                            augment=EXACT, shard_size=50, report=False)
+    with open(os.path.join(directory, MANIFEST), encoding='utf-8') as f:
+        assert json.load(f) == manifest
+
+    shards = load_shards(directory)
+    assert [len(shard) for shard in shards] == [shard['samples'] for shard in manifest['shards']]
+    assert all(len(shard) == 50 for shard in shards[:-1]) and 0 < len(shards[-1]) <= 50
+    assert all(shard.dtype == sample_dtype(NO_ROTATION) and isinstance(shard, np.memmap) for shard in shards)
+    assert manifest['samples'] == sum(len(shard) for shard in shards)
+    assert (manifest['games'], manifest['duplicates']) == (6, 0)
+    assert len(manifest['worker_samples_per_second']) == 2
+    assert all(rate > 0 for rate in manifest['worker_samples_per_second'])
+
+    samples = np.concatenate(shards)
+    # Every game was written with its mirror image
+    assert len(samples) % 2 == 0
+    hashes = set(position_hashes(samples))
+    assert set(position_hashes(mirror_samples(samples, NO_ROTATION))) == hashes
+    for sample in samples:
+        assert_legal(sample, NO_ROTATION)
+
+
+def test_dedup_keeps_one_sample_per_position(tmp_path):
+    directory = str(tmp_path / 'samples')
+    manifest = run_selfplay(directory, ['random', 'random'], 6, workers=2, config=VARIANTS['default'], seed=0,
+                            augment=ALWAYS, dedup=True, shard_size=1000, report=False)
+    samples = np.concatenate(load_shards(directory))
+    hashes = position_hashes(samples)
+    assert len(hashes) == len(set(hashes)) == manifest['samples']
+    # At least the empty board of every game after the first is a duplicate
+    assert manifest['duplicates'] >= 5
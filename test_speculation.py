@@ -0,0 +1,78 @@
+"""
+Tests of the move rankings of the speculative prefetch
+"""
+import numpy as np
+import pytest
+
+import ai_players
+from config import VARIANTS
+from llm_cache import REUSE, MoveCache, cached_claude, cached_gpt
+from speculation import cache_ranking, heuristic_ranking
+from symmetry import ALWAYS
+
+
+class ColumnTransport:
+    """Answers every request with column 2 (1-indexed)."""
+
+    def setup(self, provider):
+        pass
+
+    def send(self, provider, request):
+        return '{"move": 2}'
+
+
+@pytest.fixture(autouse=True)
+def transport():
+    previous = ai_players.set_transport(ColumnTransport())
+    yield
+    ai_players.set_transport(previous)
+
+
+def opening():
+    board = np.zeros((8, 9), dtype=int)
+    board[0, 2] = 1
+    return board
+
+
+def test_heuristic_ranking_puts_wins_first():
+    board = np.zeros((8, 9), dtype=int)
+    board[0, 1:5] = 1
+    board[1, 1:5] = 2
+    assert set(heuristic_ranking(board, 1, 9)[:2]) == {0, 5}
+
+
+@pytest.mark.parametrize('symmetry', [None, ALWAYS])
+def test_cache_ranking_reads_cached_moves_in_the_board_frame(symmetry):
+    config = VARIANTS['default']
+    cache = MoveCache()
+    players = {1: cached_gpt(cache, config, policy=REUSE, symmetry=symmetry),
+               2: cached_claude(cache, config, policy=REUSE, symmetry=symmetry)}
+    rank = cache_ranking(players)
+    board = opening()
+    assert players[2](board, 2, 2) == 1
+
+    ranking = rank(board, 2, 2)
+    assert ranking[0] == 1
+    assert sorted(ranking) == list(range(9))
+    if symmetry is not None:
+        # The mirror image position shares the entry, with the move mirrored
+        assert rank(board[:, ::-1].copy(), 2, 2)[0] == 7
+
+    # Nothing cached for the other side: the heuristic ranking alone
+    assert rank(board, 1, 2) == heuristic_ranking(board, 1, 2)
+    # Only the real move counted as a cache lookup
+    stats = cache.stats()
+    assert (stats['memory_hits'], stats['misses']) == (0, 1)
+
+
+def test_peek_does_not_refresh_recency(tmp_path):
+    cache = MoveCache(memory_entries=2, disk_path=str(tmp_path / 'cache.sqlite'))
+    cache.put('a', [1])
+    cache.put('b', [2])
+    assert cache.peek('a') == [1]
+    cache.put('c', [3])
+    # 'a' stayed the least recently used, so it left the memory tier, and the disk tier still has it
+    assert 'a' not in cache.memory.entries
+    assert cache.peek('a') == [1]
+    assert cache.peek('d') is None
+    assert cache.stats()['hit_rate'] == 0.0 and cache.stats()['misses'] == 0
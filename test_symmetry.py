@@ -0,0 +1,87 @@
+"""
+Tests of the canonical position keys and the mirror transform
+"""
+import random
+
+import numpy as np
+import pytest
+
+from bitboard import Bitboard
+from config import VARIANTS
+from game_state import GameState
+from perft import Perft
+from symmetry import (
+    ALWAYS, EXACT, NONE, CanonicalTable, canonical, canonical_board, mirror_masks, mirrors, random_game_positions
+)
+
+NO_ROTATION = VARIANTS['no-rotation']
+
+
+def random_boards(games, config, seed=0):
+    """(board, turn) of every position of random games."""
+    for bitboard, turn, _ in random_game_positions(games, config, seed):
+        yield bitboard.to_array(), turn
+
+
+def test_mirror_policies():
+    assert not mirrors(VARIANTS['default'], NONE)
+    assert not mirrors(VARIANTS['default'], EXACT)
+    assert mirrors(VARIANTS['default'], ALWAYS)
+    assert mirrors(NO_ROTATION, EXACT)
+
+
+def test_mirror_masks_match_numpy_flip():
+    for board, _ in random_boards(20, VARIANTS['default']):
+        bitboard = Bitboard.from_array(board)
+        flipped = Bitboard.from_array(board[:, ::-1].copy())
+        assert mirror_masks(bitboard.masks, bitboard.rows, bitboard.cols) == flipped.masks
+
+
+@pytest.mark.parametrize('policy', [EXACT, ALWAYS])
+def test_mirror_images_share_a_key(policy):
+    config = NO_ROTATION if policy == EXACT else VARIANTS['default']
+    for board, turn in random_boards(20, config):
+        form = canonical(board, turn, config, policy)
+        mirror = canonical(board[:, ::-1].copy(), turn, config, policy)
+        assert form.key == mirror.key
+        # The canonical board is the same whichever image it came from
+        canonical_array, _ = canonical_board(board, turn, config, policy)
+        mirror_array, _ = canonical_board(board[:, ::-1].copy(), turn, config, policy)
+        assert np.array_equal(canonical_array, mirror_array)
+
+
+def test_exact_keeps_mirror_images_apart_in_rotating_variants():
+    config = VARIANTS['default']
+    for board, turn in random_boards(20, config):
+        if np.array_equal(board, board[:, ::-1]):
+            continue
+        form = canonical(board, turn, config, EXACT)
+        assert not form.mirrored
+        assert canonical(board[:, ::-1].copy(), turn, config, EXACT).key != form.key
+
+
+def test_mirror_images_have_equal_perft_without_rotation():
+    rng = random.Random(3)
+    perft = Perft(NO_ROTATION)
+    for _ in range(5):
+        state = GameState(NO_ROTATION)
+        for _ in range(rng.randrange(12)):
+            state.make(rng.choice(state.valid_moves()))
+        if state.is_over:
+            continue
+        mirror = GameState.from_board(state.to_array()[:, ::-1].copy(), state.turn, config=NO_ROTATION)
+        assert perft.count(state, 3) == perft.count(mirror, 3)
+
+
+def test_table_maps_moves_back_to_the_board():
+    table = CanonicalTable(config=NO_ROTATION, policy=EXACT)
+    board = np.zeros((8, 9), dtype=int)
+    board[0, 1] = 1
+    table.put(board, 1, [2, 7])
+    assert table.get(board, 1) == [2, 7]
+    # The mirror image position gets the mirror image moves
+    assert table.get(board[:, ::-1].copy(), 1) == [6, 1]
+    # The same board with the other side to move is another position
+    assert table.get(board, 2) is None
+    summary = table.stats.summary()
+    assert summary['positions'] == 3 and summary['canonical_positions'] == 2
@@ -0,0 +1,76 @@
+"""
+Tests of the threat evaluator against a recount and the search evaluation
+"""
+import random
+
+import numpy as np
+import pytest
+
+from bitboard import Bitboard
+from config import VARIANTS
+from game_state import GameState
+from search_player import evaluate
+from threats import ThreatEvaluator, get_evaluator, win_lines
+
+
+def random_positions(games, config, seed=0):
+    """(board, player to move) of every position of random games."""
+    rng = random.Random(seed)
+    for _ in range(games):
+        state = GameState(config)
+        while not state.is_over:
+            yield state.to_array(), state.current_player
+            state.make(rng.choice(state.valid_moves()))
+
+
+def test_win_line_counts():
+    assert len(win_lines(8, 9)) == 116
+    assert len(win_lines(9, 8)) == 116
+
+
+def test_scores_match_search_evaluation():
+    for board, player in random_positions(50, VARIANTS['default']):
+        evaluator = get_evaluator(*board.shape)
+        assert evaluator.evaluate(board, player) == evaluate(Bitboard.from_array(board), player)
+
+
+@pytest.mark.parametrize('variant', ['default', 'floating'])
+def test_incremental_state_matches_recount(variant):
+    config = VARIANTS[variant]
+    rng = random.Random(1)
+    for _ in range(30):
+        state = GameState(config)
+        evaluator = get_evaluator(config.rows, config.cols)
+        threats = evaluator.state(state.to_array())
+        while not state.is_over:
+            col = rng.choice(state.valid_moves())
+            player = state.current_player
+            row, _ = state.drop(col)
+            threats.drop(row, col, player)
+            board = state.to_array()
+            assert np.array_equal(threats.counts, evaluator.line_counts(board))
+            assert np.array_equal(threats.features(player), evaluator.features(board, player))
+
+            threats.undrop(row, col, player)
+            assert np.array_equal(threats.counts, evaluator.line_counts(_without(board, row, col)))
+            threats.drop(row, col, player)
+
+            if state.rotate_if_due() is not None:
+                # A rotation moves every piece: start over from the new board
+                evaluator = get_evaluator(*state.shape)
+                threats = evaluator.state(state.to_array())
+
+
+def _without(board, row, col):
+    board = board.copy()
+    board[row, col] = 0
+    return board
+
+
+def test_batch_matches_single_boards():
+    positions = [(board, player) for board, player in random_positions(20, VARIANTS['no-rotation'], seed=2)]
+    boards = np.array([board for board, _ in positions])
+    players = np.array([player for _, player in positions])
+    evaluator = ThreatEvaluator(8, 9, weights={'own_open3': 40})
+    scores = evaluator.evaluate_batch(boards, players)
+    assert scores.tolist() == [evaluator.evaluate(board, player) for board, player in positions]
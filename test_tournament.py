@@ -0,0 +1,103 @@
+"""
+Tests of the tournament Elo fit, ranking and game saving
+"""
+import math
+
+import pytest
+
+import tournament
+from config import VARIANTS
+from game_records import GameRecordWriter, GameRecords
+from game_state import GameState
+from tournament import ELO_SCALE, fit_elo, rank_players, run_tournament
+
+
+def game(first, second, winner, length=30):
+    """A result dict as returned by play_headless_game."""
+    return {'players': (first, second), 'winner': winner, 'length': length,
+            'latencies': {1: [0.01] * (length // 2), 2: [0.02] * (length // 2)}}
+
+
+def results(first, second, wins, draws, losses):
+    """Games of `first` against `second`, half of them with each side moving first."""
+    games = []
+    for outcome, count in ((1, wins), (0, draws), (2, losses)):
+        for i in range(count):
+            if i % 2:
+                games.append(game(second, first, {1: 2, 2: 1, 0: 0}[outcome]))
+            else:
+                games.append(game(first, second, outcome))
+    return games
+
+
+def dominated_tournament():
+    return results('a', 'b', 18, 2, 0) + results('a', 'c', 20, 0, 0) + results('b', 'c', 14, 2, 4)
+
+
+def test_dominant_player_rates_highest():
+    ratings = fit_elo(['a', 'b', 'c'], dominated_tournament())
+    assert ratings['a'] > ratings['b'] > ratings['c']
+    assert sum(ratings.values()) == pytest.approx(0, abs=1e-6)
+    # The prior keeps an unbeaten player's rating finite
+    assert math.isfinite(ratings['a'])
+
+
+def test_symmetric_results_rate_equal():
+    names = ['a', 'b', 'c']
+    draws = results('a', 'b', 0, 10, 0) + results('b', 'c', 0, 10, 0) + results('a', 'c', 0, 10, 0)
+    assert all(r == pytest.approx(0, abs=1e-6) for r in fit_elo(names, draws).values())
+
+    split = results('a', 'b', 6, 0, 6)
+    ratings = fit_elo(['a', 'b'], split)
+    assert ratings['a'] == pytest.approx(ratings['b'], abs=1e-6)
+
+
+def test_two_player_rating_gap_follows_the_score():
+    # 3:1 in games, plus the prior's half win each way, is 3.5:1.5 in strength
+    ratings = fit_elo(['a', 'b'], results('a', 'b', 3, 0, 1))
+    assert ratings['a'] - ratings['b'] == pytest.approx(ELO_SCALE * math.log(3.5 / 1.5), abs=1e-3)
+
+
+def test_ranking_table_and_confidence_intervals():
+    table = rank_players(['c', 'b', 'a'], dominated_tournament(), bootstrap=100)
+    assert [row['name'] for row in table] == ['a', 'b', 'c']
+    for row in table:
+        assert row['elo_low'] <= row['elo'] <= row['elo_high']
+        assert row['wins'] + row['draws'] + row['losses'] == row['games'] == 40
+    assert (table[0]['wins'], table[0]['draws'], table[0]['losses']) == (38, 2, 0)
+    # The dominant player's interval clears the weakest player's
+    assert table[0]['elo_low'] > table[2]['elo_high']
+    assert table[0]['mean_latency'] == pytest.approx(0.015)
+
+    draws = rank_players(['a', 'b'], results('a', 'b', 0, 10, 0), bootstrap=50)
+    for row in draws:
+        assert row['elo_low'] == pytest.approx(0, abs=1e-6)
+        assert row['elo_high'] == pytest.approx(0, abs=1e-6)
+
+
+def test_games_are_saved_as_they_finish(tmp_path, monkeypatch):
+    config = VARIANTS['default']
+    path = str(tmp_path / 'games.c5g')
+    play_job = tournament._play_job
+    played = []
+
+    def crash_on_the_third_game(job):
+        if len(played) == 2:
+            raise KeyboardInterrupt
+        played.append(play_job(job))
+        return played[-1]
+
+    monkeypatch.setattr(tournament, '_play_job', crash_on_the_third_game)
+    with pytest.raises(KeyboardInterrupt):
+        with GameRecordWriter(path, config, buffer_games=1) as writer:
+            run_tournament(['random', 'search'], 2, workers=1, config=config, writer=writer)
+
+    records = GameRecords(path)
+    assert len(records) == 2
+    for game, result in zip(records, played):
+        assert game.players == result['players']
+        assert game.moves == [column - 1 for column in result['moves']]
+        state = GameState(config)
+        for col in game.moves:
+            state.make(col)
+        assert game.winner == result['winner'] and game.rotations == state.rotation_state
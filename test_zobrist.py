@@ -0,0 +1,89 @@
+"""
+Tests of the Zobrist hashing and the transposition table
+"""
+import random
+
+import numpy as np
+import pytest
+
+from bitboard import Bitboard
+from board import drop_piece, get_next_open_row, get_valid_moves, rotate_board
+from config import VARIANTS
+from zobrist import EXACT, LOWER_BOUND, UPPER_BOUND, TranspositionTable, ZobristHasher
+
+
+@pytest.mark.parametrize('variant', ['default', 'ccw', 'floating'])
+def test_incremental_hash_matches_full_hash_across_rotations(variant):
+    config = VARIANTS[variant]
+    hasher = ZobristHasher(config.rotation_interval)
+    rng = random.Random(variant)
+    for _ in range(20):
+        board = np.zeros((config.rows, config.cols), dtype=int)
+        rotation_state = 0
+        h = hasher.hash_board(board, 0)
+        for turn in range(40):
+            moves = get_valid_moves(board)
+            if not moves:
+                break
+            col = rng.choice(moves)
+            row = get_next_open_row(board, col)
+            drop_piece(board, row, col, turn % 2 + 1)
+            h = hasher.update_drop(h, board.shape, row, col, turn % 2 + 1, turn)
+            if (turn + 1) % config.rotation_interval == 0:
+                board = rotate_board(board, config)
+                rotation_state += 1
+                # A rotation moves every cell, so the hash is recomputed
+                h = hasher.hash_bitboard(Bitboard.from_array(board), turn + 1, rotation_state)
+            assert h == hasher.hash_board(board, turn + 1, rotation_state)
+
+
+def test_hash_includes_side_phase_and_rotation():
+    hasher = ZobristHasher(8)
+    board = np.zeros((8, 9), dtype=int)
+    board[0, 4] = 1
+    keys = {hasher.hash_board(board, turn, rotation) for turn in range(8) for rotation in range(4)}
+    assert len(keys) == 32
+    # The rotated geometry has its own cell keys
+    assert hasher.hash_board(np.rot90(board), 1) != hasher.hash_board(board, 1)
+
+
+def test_depth_preferred_and_always_replace_slots():
+    # Two buckets, so every even hash lands in bucket 0
+    table = TranspositionTable(size_bits=1)
+    table.store(2, 5, 10, EXACT, 3)
+    table.store(4, 3, 20, LOWER_BOUND, 4)
+    assert table.probe(2) == (5, 10, EXACT, 3)
+    assert table.probe(4) == (3, 20, LOWER_BOUND, 4)
+
+    # A shallower entry replaces the always-replace slot only
+    table.store(6, 2, 30, UPPER_BOUND, None)
+    assert table.probe(4) is None
+    assert table.probe(6) == (2, 30, UPPER_BOUND, -1)
+    assert table.probe(2) == (5, 10, EXACT, 3)
+
+    # A deeper entry takes the depth-preferred slot and demotes the old one
+    table.store(8, 7, 40, EXACT, 1)
+    assert table.probe(8) == (7, 40, EXACT, 1)
+    assert table.probe(2) == (5, 10, EXACT, 3)
+    assert table.probe(6) is None
+
+    # The same position is updated in place, even from a shallower search
+    table.store(8, 1, 50, EXACT, 2)
+    assert table.probe(8) == (1, 50, EXACT, 2)
+    assert table.probe(2) == (5, 10, EXACT, 3)
+
+
+def test_counters_and_clear():
+    table = TranspositionTable(size_bits=1)
+    table.store(2, 4, 0, EXACT, 0)
+    assert table.probe(2) is not None
+    assert table.probe(4) is None
+    assert table.probe(1) is None
+    stats = table.stats()
+    assert (stats['hits'], stats['misses'], stats['collisions']) == (1, 2, 1)
+    assert stats['hit_rate'] == pytest.approx(1 / 3)
+    assert stats['fill'] == 0.25
+
+    table.clear()
+    assert table.probe(2) is None
+    assert table.stats()['fill'] == 0.0
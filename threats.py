@@ -0,0 +1,195 @@
+"""
+Connect 5 with Rotation - Threat Evaluation Module
+Contains precomputed win-line tables per board geometry and a NumPy
+evaluator counting open 1/2/3/4 windows, with incremental and batched forms.
+It is standalone, for batched scoring and feature extraction: the engines
+keep search_player.evaluate, which is faster on one bitboard at a time
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from bitboard import WIN_LENGTH
+from board import LINE_DIRECTIONS
+
+# Feature weights: a window holding N pieces of one side and none of the other
+# is an "open N". own_* windows count for the side being evaluated, opp_* against it.
+# These are search_player.WINDOW_WEIGHTS, so both evaluations agree
+DEFAULT_WEIGHTS = {
+    'own_open1': 1, 'own_open2': 4, 'own_open3': 32, 'own_open4': 256,
+    'opp_open1': -1, 'opp_open2': -4, 'opp_open3': -32, 'opp_open4': -256,
+}
+
+
+@lru_cache(maxsize=None)
+def win_lines(rows, cols, length=WIN_LENGTH):
+    """
+    Every `length`-cell line of a rows x cols board as an (n_lines, length)
+    array of flat cell indices (row * cols + col). Built once per geometry.
+    """
+    span = length - 1
+    lines = []
+    for dr, dc in LINE_DIRECTIONS:
+        for r in range(rows):
+            for c in range(cols):
+                if 0 <= r + span * dr < rows and c + span * dc < cols:
+                    lines.append([(r + i * dr) * cols + c + i * dc for i in range(length)])
+    table = np.array(lines, dtype=np.intp).reshape(-1, length)
+    table.flags.writeable = False
+    return table
+
+
+@lru_cache(maxsize=None)
+def cell_lines(rows, cols, length=WIN_LENGTH):
+    """
+    Cell -> lines incidence for a geometry: an (rows * cols, max_lines) array
+    of the line indices through every cell, padded with n_lines (an index
+    one past the last line, so padded entries can point at a dummy slot).
+    """
+    lines = win_lines(rows, cols, length)
+    n_lines = len(lines)
+    per_cell = [[] for _ in range(rows * cols)]
+    for index, line in enumerate(lines.tolist()):
+        for cell in line:
+            per_cell[cell].append(index)
+    width = max((len(cells) for cells in per_cell), default=0)
+    table = np.full((rows * cols, width), n_lines, dtype=np.intp)
+    for cell, indices in enumerate(per_cell):
+        table[cell, :len(indices)] = indices
+    table.flags.writeable = False
+    return table
+
+
+class ThreatState:
+    """
+    Per-line piece counts of one board, updated incrementally by drop() and
+    undrop() in time proportional to the lines through the cell. `open` is
+    the (2, length + 1) histogram of lines holding k pieces of a player and
+    none of the other; its entries k = 1..length-1 are the features.
+    """
+    __slots__ = ('evaluator', 'counts', 'open')
+
+    def __init__(self, evaluator, counts):
+        self.evaluator = evaluator
+        self.counts = np.array(counts, dtype=np.intp)
+        self.open = np.array(evaluator.histogram(self.counts))
+
+    def drop(self, row, col, piece):
+        """Account for a piece placed at (row, col)."""
+        lines = self.evaluator.lines_through[row * self.evaluator.cols + col]
+        size = self.evaluator.length + 2
+        own = self.counts[piece - 1, lines]
+        other = self.counts[2 - piece, lines]
+        # Lines open for the mover move up one bin; the opponent's lines through the cell close
+        moved = np.bincount(own[other == 0], minlength=size)
+        self.open[piece - 1] -= moved[:-1]
+        self.open[piece - 1, 1:] += moved[:-2]
+        self.open[2 - piece] -= np.bincount(other[own == 0], minlength=size)[:-1]
+        self.counts[piece - 1, lines] = own + 1
+
+    def undrop(self, row, col, piece):
+        """Account for the piece at (row, col) being removed."""
+        lines = self.evaluator.lines_through[row * self.evaluator.cols + col]
+        size = self.evaluator.length + 2
+        own = self.counts[piece - 1, lines] - 1
+        other = self.counts[2 - piece, lines]
+        moved = np.bincount(own[other == 0], minlength=size)
+        self.open[piece - 1, 1:] -= moved[:-2]
+        self.open[piece - 1] += moved[:-1]
+        self.open[2 - piece] += np.bincount(other[own == 0], minlength=size)[:-1]
+        self.counts[piece - 1, lines] = own
+
+    def features(self, player):
+        """Feature vector in the evaluator's feature order for `player`."""
+        return self.evaluator.feature_vector(self.open, player)
+
+    def score(self, player):
+        """Weighted feature score from the point of view of `player`."""
+        return float(self.features(player) @ self.evaluator.weight_vector)
+
+    def has_line(self, player):
+        """Check if `player` has a complete line."""
+        return bool(self.open[player - 1, self.evaluator.length])
+
+
+class ThreatEvaluator:
+    """
+    Static evaluator for one board geometry. Counts, for both players, the
+    windows holding 1 to 4 of their pieces and none of the opponent's, and
+    scores them with tunable `weights` (see DEFAULT_WEIGHTS). The tables are
+    shared by all evaluators of the same geometry.
+    """
+
+    def __init__(self, rows, cols, weights=None, length=WIN_LENGTH):
+        self.rows = rows
+        self.cols = cols
+        self.length = length
+        self.lines = win_lines(rows, cols, length)
+        self.incidence = cell_lines(rows, cols, length)
+        self.n_lines = len(self.lines)
+        self.lines_through = [cells[cells < self.n_lines] for cells in self.incidence]
+        weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        self.feature_names = [f"{side}_open{k}" for side in ('own', 'opp') for k in range(1, length)]
+        self.weight_vector = np.array([weights.get(name, 0) for name in self.feature_names], dtype=float)
+
+    def line_counts(self, boards):
+        """
+        Pieces of each player in every line: (..., 2, n_lines) for boards of
+        shape (..., rows, cols).
+        """
+        boards = np.asarray(boards)
+        # Player 1 pieces count 1 and player 2 pieces count length + 1, so one
+        # sum per line holds both counts
+        base = self.length + 1
+        codes = np.array([0, 1, base], dtype=np.intp)[boards.reshape(boards.shape[:-2] + (-1,))]
+        total = codes[..., self.lines].sum(-1)
+        return np.stack([total % base, total // base], axis=-2)
+
+    def histogram(self, counts):
+        """Open-line histogram (..., 2, length + 1) from line counts (..., 2, n_lines)."""
+        counts = np.asarray(counts)
+        size = self.length + 2
+        # Bin of every line per player: its own count, or the last (discard) bin
+        # when the other player has a piece in it
+        bins = np.where(counts[..., ::-1, :] == 0, counts, size - 1)
+        # Every (board, player) pair gets its own range of bins, so one bincount does all
+        groups = bins.size // counts.shape[-1]
+        bins = bins + size * np.arange(groups).reshape(counts.shape[:-1] + (1,))
+        histogram = np.bincount(bins.ravel(), minlength=size * groups)
+        return histogram.reshape(counts.shape[:-1] + (size,))[..., :-1]
+
+    def feature_vector(self, histogram, player):
+        """Own then opponent open-1..open-(length-1) counts for `player`."""
+        own = histogram[..., player - 1, 1:self.length]
+        opp = histogram[..., 2 - player, 1:self.length]
+        return np.concatenate([own, opp], axis=-1)
+
+    def state(self, board):
+        """Incremental ThreatState for a board."""
+        return ThreatState(self, self.line_counts(board))
+
+    def features(self, board, player):
+        """Feature vector of one board for `player`."""
+        return self.feature_vector(self.histogram(self.line_counts(board)), player)
+
+    def evaluate(self, board, player):
+        """Weighted score of one board for `player`."""
+        return float(self.features(board, player) @ self.weight_vector)
+
+    def evaluate_batch(self, boards, player):
+        """
+        Scores of many boards of this geometry at once: boards is
+        (N, rows, cols) and player a scalar or an (N,) array.
+        """
+        histogram = self.histogram(self.line_counts(boards))
+        player = np.broadcast_to(np.asarray(player), histogram.shape[:1])
+        own = np.take_along_axis(histogram, (player - 1)[:, None, None], axis=1)[:, 0]
+        opp = np.take_along_axis(histogram, (2 - player)[:, None, None], axis=1)[:, 0]
+        features = np.concatenate([own[:, 1:self.length], opp[:, 1:self.length]], axis=-1)
+        return features @ self.weight_vector
+
+
+@lru_cache(maxsize=None)
+def get_evaluator(rows, cols, length=WIN_LENGTH):
+    """Shared evaluator with the default weights for a geometry."""
+    return ThreatEvaluator(rows, cols, length=length)
@@ -0,0 +1,234 @@
+"""
+Connect 5 with Rotation - Tournament Module
+Contains a headless tournament runner for any pairing of registered players
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import math
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from config import DEFAULT_CONFIG, VARIANTS, get_config
+from game_records import GameRecordWriter
+from game_state import GameState
+from llm_record import log_context, ORIGINAL, ZERO
+from players import PLAYERS, get_player
+
+# Elo scale: a 400 point gap means 10:1 odds
+ELO_SCALE = 400 / math.log(10)
+
+
+def play_headless_game(first, second, seed=None, quiet=True, config=DEFAULT_CONFIG):
+    """
+    Play one game between two registered players without sleeps or rendering.
+    Uses the same GameState rules as play_gpt_vs_claude, for the variant `config`.
+    Returns a dict with the winner (0 for a draw), the number of moves and the
+    move latencies of each side, and the moves (1-indexed columns) and rotations played.
+    """
+    rng_state = random.getstate()
+    random.seed(seed)
+    players = {1: get_player(first, config=config), 2: get_player(second, config=config)}
+    latencies = {1: [], 2: []}
+    state = GameState(config)
+
+    # Players print their reasoning; keep worker output clean unless asked
+    output = contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext()
+    with output:
+        while not state.is_over:
+            current_player = state.current_player
+            start = time.perf_counter()
+            col = players[current_player](state.to_array(), current_player, state.turn + 1, state.rotation_state)
+            latencies[current_player].append(time.perf_counter() - start)
+
+            # Same fallback as the interactive game
+            if col is None or not state.can_play(col):
+                moves = state.valid_moves()
+                if not moves:
+                    break
+                col = random.choice(moves)
+
+            state.make(col)
+
+    random.setstate(rng_state)
+    winners = state.result or set()
+    return {
+        'players': (first, second),
+        'winner': winners.pop() if len(winners) == 1 else 0,
+        'length': state.turn,
+        'latencies': latencies,
+        'moves': [col + 1 for col, *_ in state.moves],
+        'rotations': state.rotation_state,
+    }
+
+
+def _play_job(job):
+    """Process pool entry point."""
+    first, second, seed, config = job
+    return play_headless_game(first, second, seed, config=config)
+
+
+def fit_elo(names, games, iterations=200):
+    """
+    Fit Bradley-Terry ratings (Elo scale, mean 0) to game results with the
+    MM algorithm. Draws count as half a win for each side.
+    """
+    index = {name: i for i, name in enumerate(names)}
+    n = len(names)
+    wins = [0.0] * n
+    pair_games = [[0] * n for _ in range(n)]
+    for game in games:
+        a, b = (index[p] for p in game['players'])
+        pair_games[a][b] += 1
+        pair_games[b][a] += 1
+        if game['winner'] == 1:
+            wins[a] += 1
+        elif game['winner'] == 2:
+            wins[b] += 1
+        else:
+            wins[a] += 0.5
+            wins[b] += 0.5
+
+    # A small prior keeps ratings finite for players that won or lost everything
+    strength = [1.0] * n
+    for _ in range(iterations):
+        updated = []
+        for i in range(n):
+            denominator = sum(
+                (pair_games[i][j] + 1) / (strength[i] + strength[j]) for j in range(n) if j != i
+            )
+            updated.append((wins[i] + 0.5 * (n - 1)) / denominator if denominator else 1.0)
+        mean_log = sum(math.log(s) for s in updated) / n
+        strength = [s / math.exp(mean_log) for s in updated]
+
+    return {name: ELO_SCALE * math.log(strength[index[name]]) for name in names}
+
+
+def rank_players(names, games, bootstrap=200, seed=0):
+    """
+    Summarize a tournament: per-player record, game length, move latency and
+    Elo with a 95% bootstrap confidence interval. Sorted best first.
+    """
+    rng = random.Random(seed)
+    elo = fit_elo(names, games)
+    samples = {name: [] for name in names}
+    for _ in range(bootstrap):
+        resampled = [rng.choice(games) for _ in games]
+        for name, rating in fit_elo(names, resampled).items():
+            samples[name].append(rating)
+
+    table = []
+    for name in names:
+        record = {'wins': 0, 'draws': 0, 'losses': 0}
+        lengths, latencies = [], []
+        for game in games:
+            for side, player in enumerate(game['players'], start=1):
+                if player != name:
+                    continue
+                if game['winner'] == side:
+                    record['wins'] += 1
+                elif game['winner'] == 0:
+                    record['draws'] += 1
+                else:
+                    record['losses'] += 1
+                lengths.append(game['length'])
+                latencies.extend(game['latencies'][side])
+
+        ratings = sorted(samples[name])
+        low = ratings[int(0.025 * (len(ratings) - 1))] if ratings else elo[name]
+        high = ratings[int(0.975 * (len(ratings) - 1))] if ratings else elo[name]
+        latencies.sort()
+        table.append(dict(
+            record,
+            name=name,
+            elo=elo[name],
+            elo_low=low,
+            elo_high=high,
+            games=len(lengths),
+            mean_length=sum(lengths) / len(lengths) if lengths else 0.0,
+            mean_latency=sum(latencies) / len(latencies) if latencies else 0.0,
+            p95_latency=latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0,
+        ))
+
+    return sorted(table, key=lambda row: row['elo'], reverse=True)
+
+
+def run_tournament(names, games_per_pairing=10, workers=None, seed=0, config=DEFAULT_CONFIG, writer=None):
+    """
+    Play every ordered pairing of the named players (each side moves first
+    equally often) across a process pool and return the list of game results.
+    With a game record `writer` (game_records.GameRecordWriter) every game is
+    appended as soon as it comes back, so an interrupted run keeps its games.
+    """
+    rng = random.Random(seed)
+    jobs = [
+        (first, second, rng.randrange(1 << 30), config)
+        for first, second in itertools.permutations(names, 2)
+        for _ in range(games_per_pairing)
+    ]
+    if workers == 1:
+        return _collect(map(_play_job, jobs), writer)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return _collect(executor.map(_play_job, jobs, chunksize=max(1, len(jobs) // 64)), writer)
+
+
+def _collect(games, writer=None):
+    """List the games of an iterator of results, appending each to `writer` as it arrives."""
+    results = []
+    for game in games:
+        if writer is not None:
+            writer.append([column - 1 for column in game['moves']], game['winner'], game['players'],
+                          game['rotations'])
+        results.append(game)
+    return results
+
+
+def print_ranking(table):
+    """Print the ranking table produced by rank_players."""
+    print(f"{'#':>2} {'player':<12} {'elo':>7} {'95% CI':>17} {'W':>5} {'D':>5} {'L':>5} "
+          f"{'len':>6} {'ms/move':>8} {'p95 ms':>8}")
+    for rank, row in enumerate(table, start=1):
+        interval = f"[{row['elo_low']:+.0f}, {row['elo_high']:+.0f}]"
+        print(f"{rank:>2} {row['name']:<12} {row['elo']:>+7.0f} {interval:>17} "
+              f"{row['wins']:>5} {row['draws']:>5} {row['losses']:>5} {row['mean_length']:>6.1f} "
+              f"{row['mean_latency'] * 1000:>8.1f} {row['p95_latency'] * 1000:>8.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('players', nargs='+', choices=sorted(PLAYERS))
+    parser.add_argument('--games', type=int, default=10, help="games per ordered pairing")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--record', metavar='LOG', help="append every LLM request and response to LOG")
+    parser.add_argument('--replay', metavar='LOG', help="serve LLM responses from LOG instead of the APIs")
+    parser.add_argument('--zero-latency', action='store_true', help="replay without the recorded latencies")
+    parser.add_argument('--variant', choices=sorted(VARIANTS), default='default',
+                        help="board size and rotation rules (see config.VARIANTS)")
+    parser.add_argument('--save-games', metavar='LOG', help="append every game to LOG (see game_records.py)")
+    args = parser.parse_args()
+
+    # The log is one ordered stream of requests, so recorded and replayed runs play in this process
+    workers = 1 if args.record or args.replay else args.workers
+    config = get_config(args.variant)
+    # Games are written one by one as they finish, not buffered until the end of the run
+    writer = GameRecordWriter(args.save_games, config, buffer_games=1) if args.save_games else None
+    start = time.perf_counter()
+    with log_context(args.record, args.replay, ZERO if args.zero_latency else ORIGINAL, args.seed), \
+            writer or contextlib.nullcontext():
+        # Check the API keys of the LLM players once, before any game starts; during
+        # the games a missing key only makes the player fall back to random moves
+        providers = sorted({'gpt', 'claude'} & {name.split('-')[0] for name in args.players})
+        if providers:
+            from ai_players import get_transport
+            try:
+                for provider in providers:
+                    get_transport().setup(provider)
+            except RuntimeError as e:
+                sys.exit(str(e))
+        results = run_tournament(args.players, args.games, workers, args.seed, config, writer)
+    print(f"Played {len(results)} games in {time.perf_counter() - start:.1f}s\n")
+    print_ranking(rank_players(args.players, results))
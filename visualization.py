@@ -1,81 +1,159 @@
 """
 Connect 5 with Rotation - Visualization Module
-Contains functions for visualizing the game board
+Contains a live matplotlib view of the game board that keeps one figure and
+redraws only the pieces on every move
 """
+import time
+
 import matplotlib.pyplot as plt
 import numpy as np
-from matplotlib.patches import Circle, Rectangle, Arrow
+from matplotlib.collections import EllipseCollection
+from matplotlib.patches import Rectangle, Arrow
+
+from config import DEFAULT_CONFIG
+
+# Face colors of the cells by piece code: empty, player 1, player 2
+PIECE_COLORS = np.array([
+    [1.0, 1.0, 1.0, 1.0],  # white
+    [1.0, 0.0, 0.0, 1.0],  # red
+    [1.0, 1.0, 0.0, 1.0],  # yellow
+])
+
+
+class LiveBoard:
+    """
+    Live view of a board in a single persistent figure.
+
+    Every cell is one ellipse of a single EllipseCollection, so a frame only
+    sets the face colors of that collection and blits it over a cached
+    background. The cell positions are rebuilt only when the board shape
+    changes, i.e. when a rotation flips 8x9 to 9x8; the background (blue
+    board, gravity arrow and caption) is redrawn only then or when the
+    caption changes, as text layout alone costs several milliseconds. Render
+    times in seconds are kept in `frame_times` for blitted frames and in
+    `redraw_times` for frames that needed a full redraw.
+    """
+
+    def __init__(self, config=DEFAULT_CONFIG):
+        self.config = config
+        self.fig = None
+        self.ax = None
+        self.cells = None
+        self.caption = None
+        self.decorations = []
+        self.shape = None
+        self.background = None
+        self.frame_times = []
+        self.redraw_times = []
+
+    def _create_figure(self, rows, cols):
+        plt.ion()
+        size = max(rows, cols)
+        self.fig, self.ax = plt.subplots(figsize=(size, size))
+        self.ax.set_aspect('equal')
+        self.ax.axis('off')
+        self.caption = self.fig.text(0.5, 0.01, "", ha="center", fontsize=12)
+        # The cached background is stale after a resize or any full redraw
+        self.fig.canvas.mpl_connect('draw_event', self._capture_background)
+        plt.show(block=False)
+
+    def _build_geometry(self, rows, cols):
+        """Lay out the background and the cell positions for a rows x cols board."""
+        for artist in self.decorations:
+            artist.remove()
+        if self.cells is not None:
+            self.cells.remove()
+
+        background = Rectangle((0, 0), cols, rows, color='blue')
+        # Gravity always pulls down: an arrow above the board pointing down
+        arrow = Arrow(cols / 2, rows + 0.5, 0, -1, width=0.5, color='black')
+        self.decorations = [self.ax.add_patch(background), self.ax.add_patch(arrow)]
 
-def draw_board(board, rotation_state=0):
+        # Cell centers in board order (row-major, row 0 at the bottom)
+        r, c = np.mgrid[0:rows, 0:cols]
+        centers = np.column_stack([c.ravel() + 0.5, r.ravel() + 0.5])
+        self.cells = EllipseCollection(
+            0.8, 0.8, 0, units='xy', offsets=centers, offset_transform=self.ax.transData,
+            facecolors=PIECE_COLORS[0], edgecolors='black', animated=True,
+        )
+        self.ax.add_collection(self.cells)
+
+        # Extra space around the board for the arrow
+        self.ax.set_xlim(-1, cols + 1)
+        self.ax.set_ylim(-1, rows + 1)
+        self.shape = (rows, cols)
+
+    def _capture_background(self, event=None):
+        self.background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        self.ax.draw_artist(self.cells)
+
+    def update(self, board, rotation_state=0):
+        """Show a board; returns the render time of the frame in seconds."""
+        start = time.perf_counter()
+        rows, cols = board.shape
+        if self.fig is None or not plt.fignum_exists(self.fig.number):
+            self.fig = None
+            self.cells = None
+            self.decorations = []
+            self.shape = None
+            self._create_figure(rows, cols)
+        caption = (f"Connect {self.config.win_length} | Rotation State: {rotation_state % 4} | "
+                   f"Gravity: ↓ | Board: {rows}x{cols}")
+        canvas = self.fig.canvas
+        redraw = self.shape != (rows, cols) or caption != self.caption.get_text()
+        if redraw:
+            if self.shape != (rows, cols):
+                self._build_geometry(rows, cols)
+            self.caption.set_text(caption)
+            # A full redraw, which captures the new background through the draw event
+            canvas.draw()
+
+        self.cells.set_facecolor(PIECE_COLORS[np.asarray(board).ravel()])
+        canvas.restore_region(self.background)
+        self.ax.draw_artist(self.cells)
+        canvas.blit(self.fig.bbox)
+        canvas.flush_events()
+
+        elapsed = time.perf_counter() - start
+        (self.redraw_times if redraw else self.frame_times).append(elapsed)
+        return elapsed
+
+    def stats(self):
+        """Count, mean, median and max time in milliseconds of the blitted frames and the full redraws."""
+        stats = {}
+        for name, seconds in (('frames', self.frame_times), ('redraws', self.redraw_times)):
+            times = np.array(seconds) * 1000
+            stats[name] = {
+                'count': len(times),
+                'mean_ms': float(times.mean()) if len(times) else 0.0,
+                'median_ms': float(np.median(times)) if len(times) else 0.0,
+                'max_ms': float(times.max()) if len(times) else 0.0,
+            }
+        return stats
+
+    def close(self):
+        if self.fig is not None:
+            plt.close(self.fig)
+            self.fig = None
+
+
+# Shared live view used by draw_board
+_live_board = None
+
+
+def draw_board(board, rotation_state=0, config=DEFAULT_CONFIG):
     """
     Visualizes the Connect board using matplotlib with rotation support.
-    
+    All calls draw into one persistent figure (see LiveBoard).
+
     Parameters:
         board (np.array): A NumPy array representing the board state.
         rotation_state (int): The current rotation state of the board (0-3).
+        config (GameConfig): The variant being played, named in the caption.
     """
-    # Get current dimensions of the board (may have changed after rotation)
-    current_rows, current_cols = board.shape
-
-    # Close any existing figures to prevent multiple windows
-    plt.close('all')
-    
-    # Create a new figure
-    fig, ax = plt.subplots(figsize=(max(current_cols, current_rows), max(current_cols, current_rows)))
-
-    # Draw background
-    board_width = current_cols
-    board_height = current_rows
-    board_background = Rectangle((0, 0), board_width, board_height, color='blue')
-    ax.add_patch(board_background)
-    
-    # Draw empty spaces and pieces
-    try:
-        # Draw empty spaces
-        for c in range(current_cols):
-            for r in range(current_rows):
-                x = c + 0.5
-                y = r + 0.5
-                circle = Circle((x, y), 0.4, facecolor='white', edgecolor='black')
-                ax.add_patch(circle)
-        
-        # Draw pieces
-        for c in range(current_cols):
-            for r in range(current_rows):
-                piece = board[r, c]
-                if piece == 1 or piece == 2:
-                    x = c + 0.5
-                    y = r + 0.5
-                    color = 'red' if piece == 1 else 'yellow'
-                    piece_circle = Circle((x, y), 0.4, facecolor=color, edgecolor='black')
-                    ax.add_patch(piece_circle)
-    except IndexError as e:
-        # If there's an index error, add text explaining the issue
-        plt.figtext(0.5, 0.5, f"Error drawing board: {str(e)}\nBoard shape: {board.shape}", 
-                    ha="center", fontsize=12, color='red')
-
-    # Always show gravity arrow pointing down
-    gravity_direction = "↓"
-    
-    # Position gravity indicator at the top of the board pointing down
-    arrow_x = board_width / 2
-    arrow_y = board_height + 0.5
-    arrow_dx = 0
-    arrow_dy = -1
-    
-    # Add text to indicate gravity and rotation state
-    plt.figtext(0.5, 0.01, f"Rotation State: {rotation_state % 4} | Gravity: {gravity_direction} | Board: {current_rows}x{current_cols}", 
-                ha="center", fontsize=12)
-    
-    # Add an arrow to show gravity direction
-    arrow = Arrow(arrow_x, arrow_y, arrow_dx, arrow_dy, width=0.5, color='black')
-    ax.add_patch(arrow)
-    
-    # Set plot limits with extra space for arrows
-    ax.set_xlim(-1, current_cols + 1)
-    ax.set_ylim(-1, current_rows + 1)
-    ax.set_aspect('equal')
-    ax.axis('off')
-    
-    plt.draw()  
-    plt.pause(0.1)
\ No newline at end of file
+    global _live_board
+    if _live_board is None or _live_board.config != config:
+        if _live_board is not None:
+            _live_board.close()
+        _live_board = LiveBoard(config)
+    return _live_board.update(board, rotation_state)
@@ -0,0 +1,170 @@
+"""
+Connect 5 with Rotation - Zobrist Hashing Module
+Contains rotation-aware Zobrist hashing and a bounded transposition table
+"""
+import zlib
+from functools import lru_cache
+
+import numpy as np
+
+from board import ROTATION_INTERVAL
+
+# 64-bit hash values
+HASH_MASK = (1 << 64) - 1
+
+# Transposition table entry flags
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+
+
+@lru_cache(maxsize=None)
+def _random_keys(seed, label, count):
+    """Deterministic list of `count` random 64-bit keys for a table label."""
+    # crc32 rather than hash() so every worker process derives the same keys
+    rng = np.random.default_rng([seed, zlib.crc32(repr(label).encode())])
+    return tuple(int(k) for k in rng.integers(0, 1 << 64, size=count, dtype=np.uint64))
+
+
+class ZobristHasher:
+    """
+    Zobrist keys for positions of the rotation game.
+
+    Each board geometry (8x9 and the rotated 9x8) has its own cell keys.
+    The hash also includes the side to move, the move counter modulo the
+    rotation interval and the rotation state, since those change the future
+    of the game even for identical boards.
+    """
+
+    def __init__(self, rotation_interval=ROTATION_INTERVAL, seed=20250501):
+        self.rotation_interval = rotation_interval
+        self.seed = seed
+        self.phase_keys = _random_keys(seed, 'phase', max(rotation_interval, 1))
+        self.rotation_keys = _random_keys(seed, 'rotation', 4)
+        self.side_key = _random_keys(seed, 'side', 1)[0]
+
+    def cell_keys(self, rows, cols):
+        """Keys for a (rows, cols) geometry as [piece - 1][row * cols + col]."""
+        keys = _random_keys(self.seed, ('cells', rows, cols), 2 * rows * cols)
+        return keys[:rows * cols], keys[rows * cols:]
+
+    def state_key(self, turn, rotation_state):
+        """Hash contribution of the move counter and rotation state (turn is 0-based)."""
+        key = self.rotation_keys[rotation_state % 4]
+        if self.rotation_interval:
+            key ^= self.phase_keys[turn % self.rotation_interval]
+        if turn % 2:
+            key ^= self.side_key
+        return key
+
+    def hash_board(self, board, turn, rotation_state=0):
+        """Compute the full hash of a NumPy board."""
+        rows, cols = board.shape
+        keys = self.cell_keys(rows, cols)
+        h = self.state_key(turn, rotation_state)
+        flat = board.ravel()
+        for index in np.flatnonzero(flat):
+            h ^= keys[flat[index] - 1][index]
+        return h
+
+    def hash_bitboard(self, bitboard, turn, rotation_state=0):
+        """Compute the full hash of a Bitboard (used after a rotation)."""
+        rows, cols = bitboard.rows, bitboard.cols
+        stride = rows + 1
+        keys = self.cell_keys(rows, cols)
+        h = self.state_key(turn, rotation_state)
+        for piece_keys, mask in zip(keys, bitboard.masks):
+            while mask:
+                low = mask & -mask
+                col, row = divmod(low.bit_length() - 1, stride)
+                h ^= piece_keys[row * cols + col]
+                mask ^= low
+        return h
+
+    def update_drop(self, h, shape, row, col, piece, turn):
+        """
+        Incrementally update a hash for a drop_piece at (row, col) played on
+        move `turn` (0-based). Returns the hash of the position after the move.
+        """
+        rows, cols = shape
+        h ^= self.cell_keys(rows, cols)[piece - 1][row * cols + col]
+        if self.rotation_interval:
+            h ^= self.phase_keys[turn % self.rotation_interval]
+            h ^= self.phase_keys[(turn + 1) % self.rotation_interval]
+        return h ^ self.side_key
+
+
+class TranspositionTable:
+    """
+    Fixed-memory transposition table with two-tier buckets.
+
+    Slot 0 of every bucket is depth-preferred: it is only replaced by an
+    entry searched at least as deep (the old entry moves down to slot 1).
+    Slot 1 is always-replace. Memory is allocated once up front.
+    """
+
+    def __init__(self, size_bits=18):
+        self.n_buckets = 1 << size_bits
+        self.keys = np.zeros((self.n_buckets, 2), dtype=np.uint64)
+        self.depths = np.full((self.n_buckets, 2), -1, dtype=np.int16)
+        self.scores = np.zeros((self.n_buckets, 2), dtype=np.int32)
+        self.flags = np.zeros((self.n_buckets, 2), dtype=np.int8)
+        self.moves = np.full((self.n_buckets, 2), -1, dtype=np.int8)
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+
+    def clear(self):
+        """Empty the table and reset the counters."""
+        self.depths.fill(-1)
+        self.hits = self.misses = self.collisions = 0
+
+    def probe(self, h):
+        """
+        Look up a hash. Returns (depth, score, flag, move) or None.
+        A miss on a bucket holding another position counts as a collision.
+        """
+        bucket = h & (self.n_buckets - 1)
+        key = np.uint64(h & HASH_MASK)
+        for slot in (0, 1):
+            if self.depths[bucket, slot] >= 0 and self.keys[bucket, slot] == key:
+                self.hits += 1
+                return (
+                    int(self.depths[bucket, slot]), int(self.scores[bucket, slot]),
+                    int(self.flags[bucket, slot]), int(self.moves[bucket, slot]),
+                )
+        self.misses += 1
+        if self.depths[bucket, 0] >= 0 or self.depths[bucket, 1] >= 0:
+            self.collisions += 1
+        return None
+
+    def store(self, h, depth, score, flag, move):
+        """Store a search result using the depth-preferred/always-replace policy."""
+        bucket = h & (self.n_buckets - 1)
+        key = np.uint64(h & HASH_MASK)
+        same = self.keys[bucket, 0] == key and self.depths[bucket, 0] >= 0
+        if same or depth >= self.depths[bucket, 0]:
+            if not same and self.depths[bucket, 0] >= 0:
+                # Demote the old deep entry instead of losing it
+                self._write(bucket, 1, self.keys[bucket, 0], self.depths[bucket, 0],
+                            self.scores[bucket, 0], self.flags[bucket, 0], self.moves[bucket, 0])
+            self._write(bucket, 0, key, depth, score, flag, move)
+        else:
+            self._write(bucket, 1, key, depth, score, flag, move)
+
+    def _write(self, bucket, slot, key, depth, score, flag, move):
+        """Write one entry into a bucket slot."""
+        self.keys[bucket, slot] = key
+        self.depths[bucket, slot] = depth
+        self.scores[bucket, slot] = score
+        self.flags[bucket, slot] = flag
+        self.moves[bucket, slot] = -1 if move is None else move
+
+    def stats(self):
+        """Hit/miss/collision counters and the fill ratio of the table."""
+        probes = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'collisions': self.collisions,
+            'hit_rate': self.hits / probes if probes else 0.0,
+            'fill': float(np.count_nonzero(self.depths >= 0)) / self.depths.size,
+        }